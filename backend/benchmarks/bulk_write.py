@@ -0,0 +1,72 @@
+"""
+Write throughput of the single-object endpoints vs the bulk endpoints.
+
+    python -m benchmarks.bulk_write --rows 2000 --batch 1000
+"""
+import argparse
+import time
+
+from .utils import setup_django, scratch_database, report
+
+
+def throughput(count, fn):
+    start = time.perf_counter()
+    fn()
+    elapsed = time.perf_counter() - start
+    return {'seconds': round(elapsed, 3), 'rows_per_sec': round(count / elapsed, 1)}
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--rows', type=int, default=2000)
+    parser.add_argument('--batch', type=int, default=1000)
+    args = parser.parse_args()
+
+    setup_django()
+    from rest_framework.test import APIClient
+    from core.models import Tenant, User
+
+    with scratch_database():
+        tenant = Tenant.objects.create(name='Bench', subdomain='bench')
+        user = User.objects.create_user('bench', password='bench', tenant=tenant, role=User.Role.OWNER)
+        client = APIClient()
+        client.force_authenticate(user)
+        headers = {'HTTP_X_TENANT_ID': str(tenant.pk)}
+
+        def invoice(prefix, i):
+            return {'invoice_number': f'{prefix}-{i}', 'amount': '1000.00', 'due_date': '2026-01-01'}
+
+        def client_row(prefix, i):
+            return {'name': f'{prefix} {i}', 'phone': f'05{i:08d}'}
+
+        def single(url, build, prefix):
+            def run():
+                for i in range(args.rows):
+                    response = client.post(url, build(prefix, i), format='json', **headers)
+                    assert response.status_code == 201, response.content
+            return run
+
+        def bulk(url, build, prefix):
+            def run():
+                for start in range(0, args.rows, args.batch):
+                    items = [build(prefix, i) for i in range(start, min(start + args.batch, args.rows))]
+                    response = client.post(url, items, format='json', **headers)
+                    assert response.status_code == 201, response.content
+            return run
+
+        report({
+            'rows': args.rows,
+            'batch': args.batch,
+            'invoices': {
+                'single': throughput(args.rows, single('/api/finance/', invoice, 'SINGLE')),
+                'bulk': throughput(args.rows, bulk('/api/finance/bulk/', invoice, 'BULK')),
+            },
+            'clients': {
+                'single': throughput(args.rows, single('/api/clients/', client_row, 'Single')),
+                'bulk': throughput(args.rows, bulk('/api/clients/bulk/', client_row, 'Bulk')),
+            },
+        })
+
+
+if __name__ == '__main__':
+    main()
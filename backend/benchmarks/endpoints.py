@@ -0,0 +1,176 @@
+"""
+Latency and throughput of every API endpoint in config/urls.py, plus
+invoice PDF rendering, against synthetic tenants (core.synthetic).
+Requests are made as the largest tenant's owner.
+
+    python -m benchmarks.endpoints --tenants 5 --invoices 100000 --repeat 50
+    python -m benchmarks.endpoints --only finance
+"""
+import argparse
+import itertools
+import tempfile
+
+from .utils import setup_django, scratch_database, measure, report
+
+BULK_ROWS = 100
+
+
+def endpoints(owner, admin, tenant):
+    """
+    (name, client, method, url, payload factory, expected status) per case
+    """
+    from clients.models import Client
+    from contracts.models import Contract
+    from finance.models import Invoice
+    from properties.models import Property
+
+    prop = Property.objects.filter(tenant=tenant).first()
+    client_row = Client.objects.filter(tenant=tenant).first()
+    contract = Contract.objects.filter(tenant=tenant, status='ACTIVE').first()
+    invoice = Invoice.objects.filter(tenant=tenant).exclude(pdf_file='').exclude(pdf_file=None).first()
+    invoice_ids = ','.join(str(pk) for pk in Invoice.objects.filter(tenant=tenant).values_list('pk', flat=True)[:20])
+    refresh = _token(admin)['refresh']
+    serial = itertools.count()
+
+    def new_property():
+        return {
+            'title': f'Bench {next(serial)}', 'property_type': 'APARTMENT', 'city': 'الرياض',
+            'address': 'طريق الملك فهد', 'area': '120.00', 'price': '60000.00',
+        }
+
+    def new_client():
+        return {'name': f'Bench {next(serial)}', 'phone': '0500000000'}
+
+    def new_contract():
+        return {
+            'property': prop.pk, 'client': client_row.pk, 'start_date': '2030-01-01', 'end_date': '2030-12-31',
+            'monthly_amount': '5000.00', 'total_amount': '60000.00', 'status': 'ACTIVE',
+        }
+
+    def new_invoice():
+        return {'contract': contract.pk, 'amount': '5000.00', 'due_date': '2030-01-01'}
+
+    def new_user():
+        number = next(serial)
+        return {'username': f'bench{number}', 'password': 'password', 'tenant_name': 'Bench', 'subdomain': f'bench{number}'}
+
+    def bulk(factory):
+        return lambda: [factory() for _ in range(BULK_ROWS)]
+
+    return [
+        ('api_root', owner, 'get', '/', None, 200),
+        ('admin_index', admin, 'get', '/admin/', None, 200),
+        ('auth_register', None, 'post', '/api/auth/register/', new_user, 201),
+        ('auth_token', None, 'post', '/api/auth/token/', lambda: {'username': 'demo1_owner', 'password': 'password'}, 200),
+        ('auth_token_refresh', None, 'post', '/api/auth/token/refresh/', lambda: {'refresh': refresh}, 200),
+        ('auth_me', owner, 'get', '/api/auth/me/', None, 200),
+        ('auth_tenant_cache', admin, 'get', '/api/auth/tenant-cache/', None, 200),
+
+        ('properties_list', owner, 'get', '/api/properties/', None, 200),
+        ('properties_search', owner, 'get', '/api/properties/?search=الرياض', None, 200),
+        ('properties_filter_ordered', owner, 'get', '/api/properties/?property_type=VILLA&ordering=-price', None, 200),
+        ('properties_detail', owner, 'get', f'/api/properties/{prop.pk}/', None, 200),
+        ('properties_create', owner, 'post', '/api/properties/', new_property, 201),
+        ('properties_bulk', owner, 'post', '/api/properties/bulk/', bulk(new_property), 201),
+        ('properties_export_csv', owner, 'get', '/api/properties/export/?output=csv', None, 200),
+
+        ('clients_list', owner, 'get', '/api/clients/', None, 200),
+        ('clients_detail', owner, 'get', f'/api/clients/{client_row.pk}/', None, 200),
+        ('clients_create', owner, 'post', '/api/clients/', new_client, 201),
+        ('clients_bulk', owner, 'post', '/api/clients/bulk/', bulk(new_client), 201),
+        ('clients_export_csv', owner, 'get', '/api/clients/export/?output=csv', None, 200),
+
+        ('contracts_list', owner, 'get', '/api/contracts/', None, 200),
+        ('contracts_detail', owner, 'get', f'/api/contracts/{contract.pk}/', None, 200),
+        ('contracts_create', owner, 'post', '/api/contracts/', new_contract, 201),
+        ('contracts_export_csv', owner, 'get', '/api/contracts/export/?output=csv', None, 200),
+
+        ('finance_list', owner, 'get', '/api/finance/', None, 200),
+        ('finance_list_overdue', owner, 'get', '/api/finance/?status=OVERDUE', None, 200),
+        ('finance_detail', owner, 'get', f'/api/finance/{invoice.pk}/', None, 200),
+        ('finance_create', owner, 'post', '/api/finance/', new_invoice, 201),
+        ('finance_bulk', owner, 'post', '/api/finance/bulk/', bulk(new_invoice), 201),
+        ('finance_export_csv', owner, 'get', '/api/finance/export/?output=csv', None, 200),
+        ('finance_numbering', owner, 'get', '/api/finance/numbering/', None, 200),
+        ('finance_generate', owner, 'post', '/api/finance/generate/', lambda: {}, 202),
+        ('finance_download_pdf', owner, 'get', f'/api/finance/{invoice.pk}/download_pdf/', None, 200),
+        ('finance_batch_pdf_zip', owner, 'get', f'/api/finance/batch_pdf/?ids={invoice_ids}', None, 200),
+        ('finance_batch_pdf_merged', owner, 'get', f'/api/finance/batch_pdf/?ids={invoice_ids}&output=merged', None, 200),
+
+        ('dashboard_stats', owner, 'get', '/api/dashboard/stats/', None, 200),
+        ('imports_list', owner, 'get', '/api/imports/', None, 200),
+        ('metrics', admin, 'get', '/api/metrics', None, 200),
+        ('swagger_ui', None, 'get', '/swagger/', None, 200),
+        ('swagger_schema', None, 'get', '/swagger/?format=openapi', None, 200),
+        ('redoc', None, 'get', '/redoc/', None, 200),
+    ]
+
+
+def _token(user):
+    from rest_framework_simplejwt.tokens import RefreshToken
+    refresh = RefreshToken.for_user(user)
+    return {'refresh': str(refresh), 'access': str(refresh.access_token)}
+
+
+def request(api, method, url, payload, expected, headers):
+    def run():
+        if payload is None:
+            response = getattr(api, method)(url, **headers)
+        else:
+            response = getattr(api, method)(url, payload(), format='json', **headers)
+        assert response.status_code == expected, (url, response.status_code, getattr(response, 'content', b'')[:300])
+        # Drain streamed exports and archives so the whole body is timed
+        if response.streaming:
+            for _ in response.streaming_content:
+                pass
+    return run
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--tenants', type=int, default=3)
+    parser.add_argument('--invoices', type=int, default=20000)
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--repeat', type=int, default=20)
+    parser.add_argument('--only', help="Only endpoints whose name contains this")
+    args = parser.parse_args()
+
+    setup_django()
+    from django.test.utils import override_settings
+    from rest_framework.test import APIClient
+    from core.models import Tenant, User
+    from core.synthetic import Generator, properties_for_invoices
+    from finance.jobs import render_invoice_pdf
+    from finance.models import Invoice
+    from finance.pdf_generator import generate_invoice_pdf
+
+    with scratch_database(), tempfile.TemporaryDirectory() as media, override_settings(MEDIA_ROOT=media):
+        counts = Generator(seed=args.seed).run(args.tenants, properties_for_invoices(args.invoices))
+        tenant = Tenant.objects.get(subdomain='demo1')
+        owner = User.objects.get(username='demo1_owner')
+        admin = User.objects.create_superuser('bench_admin', 'admin@example.com', 'password', tenant=tenant)
+        pdf_invoice = Invoice.objects.filter(tenant=tenant).select_related('contract__client').first()
+        render_invoice_pdf(pdf_invoice.pk)
+
+        clients = {owner: APIClient(), admin: APIClient(), None: APIClient()}
+        clients[owner].force_authenticate(owner)
+        clients[admin].force_authenticate(admin)
+        clients[admin].force_login(admin)
+        headers = {'HTTP_X_TENANT_ID': str(tenant.pk)}
+
+        results = {}
+        for name, user, method, url, payload, expected in endpoints(owner, admin, tenant):
+            if args.only and args.only not in name:
+                continue
+            run = request(clients[user], method, url, payload, expected, headers)
+            run()  # warm caches and templates
+            results[name] = {'method': method.upper(), 'url': url, **measure(run, args.repeat)}
+
+        if not args.only or args.only in 'generate_invoice_pdf':
+            results['generate_invoice_pdf'] = measure(lambda: generate_invoice_pdf(pdf_invoice), args.repeat)
+
+        report({'data': counts, 'tenant_invoices': Invoice.objects.filter(tenant=tenant).count(), 'repeat': args.repeat, 'endpoints': results})
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,140 @@
+"""
+Cash-flow forecast (finance.forecast) for one tenant with many ACTIVE
+contracts: the columnar load and NumPy matrix against a loop over Contract
+instances doing the same month by month, at 12 and 36 months.
+
+    python -m benchmarks.forecast --contracts 100000 --repeat 5
+"""
+import argparse
+import random
+import time
+from datetime import date
+from decimal import Decimal
+
+from .utils import setup_django, scratch_database, measure, report
+
+TODAY = date(2026, 10, 18)
+
+
+def seed(contracts, unpaid, seed=1):
+    from clients.models import Client
+    from contracts.models import Contract
+    from core.models import Tenant
+    from finance.models import Invoice
+    from properties.models import Property
+
+    rng = random.Random(seed)
+    tenant = Tenant.objects.create(name='Bench', subdomain='bench')
+    client = Client.objects.create(tenant=tenant, name='Client', phone='0500000000')
+    prop = Property.objects.create(
+        tenant=tenant, title='Tower', property_type='APARTMENT',
+        city='Riyadh', address='Street', area=100, price=1000,
+    )
+    rows = []
+    for _ in range(contracts):
+        start = date(rng.randint(2024, 2026), rng.randint(1, 12), rng.randint(1, 28))
+        months = rng.choice((6, 12, 12, 24, 36))
+        end_month = start.month - 1 + months
+        end = date(start.year + end_month // 12, end_month % 12 + 1, 1)
+        rent = Decimal(rng.randrange(1500, 20000, 250))
+        rows.append(Contract(
+            tenant=tenant, property=prop, client=client, start_date=start, end_date=end,
+            monthly_amount=rent, total_amount=rent * months,
+        ))
+    Contract.objects.bulk_create(rows, batch_size=2000)
+
+    # This month's run has billed a third of them; some older invoices are unpaid
+    period = TODAY.replace(day=1)
+    contract_ids = list(Contract.objects.filter(tenant=tenant).values_list('id', 'monthly_amount'))
+    invoices = [
+        Invoice(
+            tenant=tenant, contract_id=pk, invoice_number=f'B-{pk}', amount=rent, tax_amount=0, total_amount=rent,
+            due_date=period, billing_period=period,
+        )
+        for pk, rent in contract_ids[::3]
+    ]
+    invoices += [
+        Invoice(
+            tenant=tenant, contract_id=pk, invoice_number=f'U-{pk}', amount=rent, tax_amount=0, total_amount=rent,
+            due_date=date(2026, rng.randint(1, 9), 1), status='OVERDUE',
+        )
+        for pk, rent in rng.sample(contract_ids, min(unpaid, len(contract_ids)))
+    ]
+    Invoice.objects.bulk_create(invoices, batch_size=2000)
+    return tenant
+
+
+def per_contract_loop(tenant_id, months, renewal_probability, collection_delay):
+    """
+    The same forecast written as a loop over model instances
+    """
+    from contracts.models import Contract
+    from finance.forecast import month_index, with_tax
+    from finance.models import Invoice
+
+    current = month_index(TODAY)
+    rate = Invoice._meta.get_field('tax_rate').default
+    invoiced = set(
+        Invoice.objects.filter(tenant_id=tenant_id, billing_period__gte=TODAY.replace(day=1))
+        .values_list('contract_id', 'billing_period')
+    )
+    scheduled = [0.0] * months
+    for contract in Contract.objects.filter(tenant_id=tenant_id, status='ACTIVE'):
+        due = int(with_tax(int(contract.monthly_amount * 100), rate))
+        first, last = month_index(contract.start_date), month_index(contract.end_date)
+        term = last - first + 1
+        for offset in range(months):
+            month = current + offset
+            period = date(month // 12, month % 12 + 1, 1)
+            if first <= month <= last and (contract.pk, period) not in invoiced:
+                scheduled[offset] += due
+            elif month > last and renewal_probability:
+                scheduled[offset] += due * renewal_probability ** -(-(month - last) // term)
+
+    collections = [0.0] * months
+    for invoice in Invoice.objects.filter(tenant_id=tenant_id, status__in=('PENDING', 'OVERDUE')):
+        arrives = max(month_index(invoice.due_date) + collection_delay - current, 0)
+        if arrives < months:
+            collections[arrives] += float(invoice.total_amount * 100)
+    for offset in range(collection_delay, months):
+        collections[offset] += scheduled[offset - collection_delay]
+    return round(sum(collections))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--contracts', type=int, default=100000)
+    parser.add_argument('--unpaid', type=int, default=20000, help='Overdue invoices')
+    parser.add_argument('--repeat', type=int, default=5)
+    args = parser.parse_args()
+
+    setup_django()
+    from finance import forecast
+
+    with scratch_database():
+        tenant = seed(args.contracts, args.unpaid)
+        scenario = {'renewal_probability': 0.7, 'collection_delay': 1}
+
+        results = {'contracts': args.contracts, 'unpaid_invoices': args.unpaid, 'scenario': scenario}
+        for months in (12, 36):
+            def vectorized():
+                return forecast.forecast(tenant.pk, months=months, today=TODAY, **scenario)
+
+            start = time.perf_counter()
+            loop_total = per_contract_loop(tenant.pk, months, **scenario)
+            loop_seconds = time.perf_counter() - start
+            total = vectorized()['totals']['collections']
+            assert abs(float(total) * 100 - loop_total) <= months, (total, loop_total)
+
+            timings = measure(vectorized, args.repeat)
+            results[f'{months}_months'] = {
+                'load_ms': measure(lambda: forecast.load_contracts(tenant.pk), args.repeat)['p50_ms'],
+                'forecast': timings,
+                'per_contract_loop_ms': round(loop_seconds * 1000, 1),
+                'speedup': round(loop_seconds * 1000 / timings['p50_ms'], 1),
+            }
+        report(results)
+
+
+if __name__ == '__main__':
+    main()
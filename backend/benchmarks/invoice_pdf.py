@@ -0,0 +1,85 @@
+"""
+Invoice PDF throughput: one generate_invoice_pdf() call per invoice, as the
+single-invoice path does, vs the batch renderer with a shared template and
+a process pool.
+
+    python -m benchmarks.invoice_pdf --invoices 500 --processes 4
+"""
+import argparse
+import io
+import time
+from datetime import date
+from decimal import Decimal
+
+from .utils import setup_django, scratch_database, report
+
+
+def seed(count):
+    from core.models import Tenant
+    from finance.models import Invoice
+
+    tenant = Tenant.objects.create(name='Bench', subdomain='bench')
+    Invoice.objects.bulk_create(
+        (
+            Invoice(
+                tenant=tenant,
+                invoice_number=f'BENCH-{i}',
+                amount=Decimal('1000.00'),
+                tax_amount=Decimal('150.00'),
+                total_amount=Decimal('1150.00'),
+                due_date=date.today(),
+                notes='Monthly rent',
+            )
+            for i in range(count)
+        ),
+        batch_size=2000,
+    )
+    return list(Invoice.objects.filter(tenant=tenant).order_by('pk').values_list('pk', flat=True))
+
+
+def throughput(count, fn):
+    start = time.perf_counter()
+    fn()
+    elapsed = time.perf_counter() - start
+    return {'seconds': round(elapsed, 3), 'invoices_per_sec': round(count / elapsed, 1)}
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--invoices', type=int, default=500)
+    parser.add_argument('--processes', type=int, default=4)
+    parser.add_argument('--chunk-size', type=int, default=25)
+    args = parser.parse_args()
+
+    setup_django()
+    from finance.models import Invoice
+    from finance.pdf_generator import InvoicePdfTemplate
+    from finance.pdf_batch import write_zip, write_merged_pdf
+
+    with scratch_database(processes=True):
+        ids = seed(args.invoices)
+
+        def single():
+            # What rendering looked like before templates were reused:
+            # styles and static flowables rebuilt for every invoice
+            for invoice in Invoice.objects.select_related('contract__client').filter(pk__in=ids):
+                template = InvoicePdfTemplate()
+                doc = template.new_document(io.BytesIO())
+                doc.build(template.story(invoice))
+
+        report({
+            'invoices': args.invoices,
+            'single': throughput(args.invoices, single),
+            'batch_inline': throughput(args.invoices, lambda: write_zip(ids, io.BytesIO(), chunk_size=args.chunk_size)),
+            'batch_pool': {
+                'processes': args.processes,
+                **throughput(args.invoices, lambda: write_zip(
+                    ids, io.BytesIO(), processes=args.processes, chunk_size=args.chunk_size,
+                )),
+            },
+            'merged': throughput(args.invoices, lambda: write_merged_pdf(ids, io.BytesIO())),
+        })
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,70 @@
+"""
+Per-request cost of RequestMetricsMiddleware: the same request handled
+with and without it. Each request runs a few queries, so the SQL timer is
+exercised too. Exits non-zero when the overhead exceeds OVERHEAD_BOUND_US.
+
+    python -m benchmarks.metrics_overhead --requests 20000 --queries 3
+"""
+import argparse
+import sys
+import time
+
+from .utils import setup_django, scratch_database, report
+
+# Documented bound on the middleware's added time per request
+OVERHEAD_BOUND_US = 50
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--requests', type=int, default=20000)
+    parser.add_argument('--queries', type=int, default=3)
+    parser.add_argument('--rounds', type=int, default=5)
+    args = parser.parse_args()
+
+    setup_django()
+    from django.db import connection
+    from django.http import HttpResponse
+    from django.test import RequestFactory
+    from core.metrics import request_metrics
+    from core.middleware import RequestMetricsMiddleware
+
+    with scratch_database():
+        def view(request):
+            with connection.cursor() as cursor:
+                for _ in range(args.queries):
+                    cursor.execute('SELECT 1')
+            return HttpResponse('ok')
+
+        request = RequestFactory().get('/api/clients/')
+        request.tenant = None
+
+        def per_request_us(handler):
+            start = time.perf_counter()
+            for _ in range(args.requests):
+                handler(request)
+            return (time.perf_counter() - start) / args.requests * 1e6
+
+        wrapped = RequestMetricsMiddleware(view)
+        # Interleave rounds and keep the best of each, to factor out noise
+        bare, instrumented = [], []
+        for _ in range(args.rounds):
+            bare.append(per_request_us(view))
+            instrumented.append(per_request_us(wrapped))
+        overhead = min(instrumented) - min(bare)
+        request_metrics.reset()
+
+        report({
+            'requests': args.requests,
+            'queries_per_request': args.queries,
+            'bare_us': round(min(bare), 2),
+            'instrumented_us': round(min(instrumented), 2),
+            'overhead_us': round(overhead, 2),
+            'bound_us': OVERHEAD_BOUND_US,
+        })
+    if overhead > OVERHEAD_BOUND_US:
+        sys.exit(f'Metrics middleware overhead {overhead:.1f}us exceeds {OVERHEAD_BOUND_US}us')
+
+
+if __name__ == '__main__':
+    main()
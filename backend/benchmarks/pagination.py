@@ -0,0 +1,83 @@
+"""
+Deep-page latency of cursor vs page-number pagination on the invoice list.
+
+    python -m benchmarks.pagination --rows 50000 --page-size 50
+"""
+import argparse
+from datetime import date, timedelta
+from decimal import Decimal
+
+from .utils import setup_django, scratch_database, measure, report
+
+
+def seed(rows):
+    from django.utils import timezone
+    from core.models import Tenant, User
+    from finance.models import Invoice
+
+    tenant = Tenant.objects.create(name='Bench', subdomain='bench')
+    user = User.objects.create_user('bench', password='bench', tenant=tenant, role=User.Role.OWNER)
+    start = timezone.now() - timedelta(seconds=rows)
+    Invoice.objects.bulk_create(
+        (
+            Invoice(
+                tenant=tenant,
+                invoice_number=f'BENCH-{i}',
+                amount=Decimal('1000.00'),
+                tax_amount=Decimal('150.00'),
+                total_amount=Decimal('1150.00'),
+                due_date=date.today(),
+                created_at=start + timedelta(seconds=i),
+            )
+            for i in range(rows)
+        ),
+        batch_size=2000,
+    )
+    return tenant, user
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--rows', type=int, default=50000)
+    parser.add_argument('--page-size', type=int, default=50)
+    parser.add_argument('--repeat', type=int, default=10)
+    args = parser.parse_args()
+
+    setup_django()
+    from rest_framework.test import APIClient
+
+    with scratch_database():
+        tenant, user = seed(args.rows)
+        client = APIClient()
+        client.force_authenticate(user)
+        headers = {'HTTP_X_TENANT_ID': str(tenant.pk)}
+        url = f'/api/finance/?page_size={args.page_size}'
+        last_page = args.rows // args.page_size
+
+        # Walk the cursor chain once to find the deepest cursor
+        deep_cursor = url
+        while True:
+            next_url = client.get(deep_cursor, **headers).json()['next']
+            if next_url is None:
+                break
+            deep_cursor = next_url
+
+        def get(target):
+            return lambda: client.get(target, **headers)
+
+        report({
+            'rows': args.rows,
+            'page_size': args.page_size,
+            'page_number': {
+                'first_page': measure(get(f'{url}&page=1'), args.repeat),
+                'last_page': measure(get(f'{url}&page={last_page}'), args.repeat),
+            },
+            'cursor': {
+                'first_page': measure(get(url), args.repeat),
+                'last_page': measure(get(deep_cursor), args.repeat),
+            },
+        })
+
+
+if __name__ == '__main__':
+    main()
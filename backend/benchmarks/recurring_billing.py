@@ -0,0 +1,99 @@
+"""
+Recurring invoice generation: the set-based billing run over every ACTIVE
+contract vs saving one Invoice per contract, and the cost of repeating a
+run that has nothing left to bill.
+
+    python -m benchmarks.recurring_billing --contracts 100000 --tenants 50
+"""
+import argparse
+import time
+from datetime import date
+from decimal import Decimal
+
+from .utils import setup_django, scratch_database, report
+
+PERIOD = date(2026, 3, 1)
+
+
+def seed(contracts, tenants):
+    from clients.models import Client
+    from contracts.models import Contract
+    from core.models import Tenant
+    from properties.models import Property
+
+    per_tenant = contracts // tenants
+    for t in range(tenants):
+        tenant = Tenant.objects.create(name=f'Bench {t}', subdomain=f'bench-{t}')
+        client = Client.objects.create(tenant=tenant, name='Client', phone='0500000000')
+        prop = Property.objects.create(
+            tenant=tenant, title='Tower', property_type='APARTMENT',
+            city='Riyadh', address='Street', area=100, price=1000,
+        )
+        Contract.objects.bulk_create(
+            (
+                Contract(
+                    tenant=tenant, property=prop, client=client,
+                    start_date=date(2026, 1, 1 + i % 28), end_date=date(2026, 12, 31),
+                    monthly_amount=Decimal(1000 + (i % 20) * 250), total_amount=Decimal(12000),
+                    # One in ten has ended and must not be billed
+                    status='EXPIRED' if i % 10 == 0 else 'ACTIVE',
+                )
+                for i in range(per_tenant)
+            ),
+            batch_size=2000,
+        )
+
+
+def throughput(count, fn):
+    start = time.perf_counter()
+    result = fn()
+    elapsed = time.perf_counter() - start
+    return result, {'seconds': round(elapsed, 3), 'invoices_per_sec': round(count / elapsed, 1) if count else None}
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--contracts', type=int, default=100000)
+    parser.add_argument('--tenants', type=int, default=50)
+    parser.add_argument('--batch-size', type=int, default=2000)
+    parser.add_argument('--naive-sample', type=int, default=2000, help='Contracts billed one save() at a time')
+    args = parser.parse_args()
+
+    setup_django()
+    from contracts.models import Contract
+    from finance.billing import due_contracts, generate_invoices
+    from finance.models import Invoice
+
+    with scratch_database():
+        seed(args.contracts, args.tenants)
+        due = due_contracts(PERIOD).count()
+
+        def naive():
+            # What a loop over contracts calling Invoice.objects.create() costs
+            for contract in Contract.objects.filter(status='ACTIVE')[:args.naive_sample]:
+                Invoice.objects.create(
+                    tenant_id=contract.tenant_id, contract=contract,
+                    invoice_number=f'NAIVE-{contract.pk}', billing_period=date(2026, 2, 1),
+                    amount=contract.monthly_amount, due_date=date(2026, 2, 1),
+                )
+            return args.naive_sample
+
+        _, naive_result = throughput(args.naive_sample, naive)
+        billed, first_run = throughput(due, lambda: generate_invoices(PERIOD, batch_size=args.batch_size))
+        again, second_run = throughput(0, lambda: generate_invoices(PERIOD, batch_size=args.batch_size))
+
+        report({
+            'contracts': args.contracts,
+            'tenants': args.tenants,
+            'batch_size': args.batch_size,
+            'due': due,
+            'billed': billed,
+            'billed_on_repeat': again,
+            'per_contract_save': {'sample': args.naive_sample, **naive_result},
+            'set_based': first_run,
+            'repeat_run': second_run,
+        })
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,95 @@
+"""
+Payload size and serialization time of 10k-row lists: every field through
+model instances and JSONRenderer (the old list path), against the slim
+list read with values() and rendered by FastJSONRenderer, and a ?fields=
+subset.
+
+    python -m benchmarks.serialization --rows 10000 --repeat 5
+"""
+import argparse
+import time
+
+from .utils import setup_django, scratch_database, measure, report
+
+
+def cases(tenant):
+    from clients.models import Client
+    from contracts.models import Contract
+    from finance.models import Invoice
+    from properties.models import Property
+    from clients.serializers import ClientSerializer
+    from contracts.serializers import ContractSerializer
+    from finance.serializers import InvoiceSerializer
+    from properties.serializers import PropertySerializer
+
+    return {
+        'properties': (Property.objects.filter(tenant=tenant).prefetch_related('images'), PropertySerializer, 'id,title,price,city'),
+        'clients': (Client.objects.filter(tenant=tenant), ClientSerializer, 'id,name,phone'),
+        'contracts': (Contract.objects.filter(tenant=tenant).select_related('property', 'client'), ContractSerializer, 'id,client_name,status'),
+        'invoices': (
+            Invoice.objects.filter(tenant=tenant).select_related('contract__client', 'contract__property'),
+            InvoiceSerializer, 'id,invoice_number,total_amount,status',
+        ),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--rows', type=int, default=10000, help="Rows per list")
+    parser.add_argument('--repeat', type=int, default=5)
+    args = parser.parse_args()
+
+    setup_django()
+    from django.conf import settings
+    from rest_framework.renderers import JSONRenderer
+    from rest_framework.request import Request
+    from rest_framework.test import APIRequestFactory
+    from core.models import Tenant
+    from core.renderers import FastJSONRenderer
+    from core.sparse import column_paths, values_rows
+    from core.synthetic import Generator, properties_for_invoices
+
+    with scratch_database():
+        # Enough properties for --rows of each list; tenant 1 gets them all
+        Generator(seed=1).run(1, max(args.rows, properties_for_invoices(args.rows)))
+        tenant = Tenant.objects.get()
+        request = Request(APIRequestFactory().get('/', SERVER_NAME=settings.ALLOWED_HOSTS[0] if settings.ALLOWED_HOSTS else 'testserver'))
+        request.tenant = tenant
+        context = {'request': request}
+
+        results = {'rows': args.rows}
+        for name, (queryset, serializer_class, subset) in cases(tenant).items():
+            queryset = queryset.order_by('-created_at', '-id')[:args.rows]
+
+            def full():
+                data = serializer_class(queryset, many=True, context=context).data
+                return JSONRenderer().render(data)
+
+            def slim(fields=None):
+                serializer = serializer_class(context=context, fields=fields, listing=True)
+                paths = column_paths(queryset.model, serializer.fields)
+                rows = queryset.values(*{path for path, _ in paths.values()})
+                return FastJSONRenderer().render(values_rows(rows, paths, serializer.fields))
+
+            variants = {
+                'full_instances_json': full,
+                'slim_values_orjson': slim,
+                'fields_subset_orjson': lambda: slim(subset.split(',')),
+            }
+            results[name] = {}
+            for variant, fn in variants.items():
+                start = time.perf_counter()
+                payload = fn()
+                results[name][variant] = {
+                    'bytes': len(payload),
+                    'first_run_ms': round((time.perf_counter() - start) * 1000, 1),
+                    **measure(fn, args.repeat),
+                }
+            full_ms = results[name]['full_instances_json']['p50_ms']
+            results[name]['speedup'] = round(full_ms / results[name]['slim_values_orjson']['p50_ms'], 1)
+
+        report(results)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,80 @@
+import json
+import os
+import statistics
+import tempfile
+import time
+from contextlib import contextmanager
+from urllib.parse import urlsplit
+
+
+def setup_django():
+    os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'config.settings')
+    import django
+    django.setup()
+
+
+@contextmanager
+def scratch_database(processes=False):
+    """
+    Run against a throwaway test database so benchmarks never touch real data.
+
+    With ``processes`` set the database is made reachable from spawned
+    child processes too: SQLite gets a file instead of :memory:, and
+    DATABASE_URL is pointed at the test database for children to inherit.
+    """
+    from django.db import connection
+    from django.test.utils import setup_test_environment, teardown_test_environment
+
+    old_url = os.environ.get('DATABASE_URL')
+    is_sqlite = connection.vendor == 'sqlite'
+    if processes and is_sqlite:
+        handle, path = tempfile.mkstemp(suffix='.sqlite3')
+        os.close(handle)
+        connection.settings_dict['TEST']['NAME'] = path
+
+    setup_test_environment()
+    old_name = connection.settings_dict['NAME']
+    test_name = connection.creation.create_test_db(verbosity=0, autoclobber=True)
+    if processes:
+        if is_sqlite:
+            os.environ['DATABASE_URL'] = f'sqlite:///{test_name}'
+        else:
+            os.environ['DATABASE_URL'] = urlsplit(old_url)._replace(path=f'/{test_name}').geturl()
+    try:
+        yield
+    finally:
+        connection.creation.destroy_test_db(old_name, verbosity=0)
+        teardown_test_environment()
+        if old_url is None:
+            os.environ.pop('DATABASE_URL', None)
+        else:
+            os.environ['DATABASE_URL'] = old_url
+
+
+def summarize(timings):
+    timings = sorted(timings)
+    return {
+        'runs': len(timings),
+        'mean_ms': round(statistics.mean(timings) * 1000, 3),
+        'p50_ms': round(_percentile(timings, 50) * 1000, 3),
+        'p99_ms': round(_percentile(timings, 99) * 1000, 3),
+        'per_sec': round(len(timings) / sum(timings), 1),
+    }
+
+
+def _percentile(ordered, pct):
+    index = min(len(ordered) - 1, max(0, round(pct / 100 * len(ordered) + 0.5) - 1))
+    return ordered[index]
+
+
+def measure(fn, repeat=5):
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        timings.append(time.perf_counter() - start)
+    return summarize(timings)
+
+
+def report(results):
+    print(json.dumps(results, indent=2, default=str))
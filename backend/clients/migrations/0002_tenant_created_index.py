@@ -0,0 +1,22 @@
+# Generated by Django 5.2.18 on 2026-10-18 09:14
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('clients', '0001_initial'),
+        ('core', '0002_tenantstats'),
+    ]
+
+    operations = [
+        migrations.AlterModelOptions(
+            name='client',
+            options={'ordering': ['-created_at', '-id']},
+        ),
+        migrations.AddIndex(
+            model_name='client',
+            index=models.Index(fields=['tenant', 'created_at', 'id'], name='client_tenant_created_idx'),
+        ),
+    ]
@@ -13,7 +13,11 @@ class Client(models.Model):
     updated_at = models.DateTimeField(auto_now=True)
 
     class Meta:
-        ordering = ['-created_at']
+        ordering = ['-created_at', '-id']
+        indexes = [
+            # Matches the keyset used by core.pagination.TenantCursorPagination
+            models.Index(fields=['tenant', 'created_at', 'id'], name='client_tenant_created_idx'),
+        ]
 
     def __str__(self):
         return self.name
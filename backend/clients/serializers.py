@@ -1,12 +1,16 @@
 from rest_framework import serializers
+from core.bulk import BulkListSerializer
+from core.sparse import SparseFieldsMixin
 from .models import Client
 
 
-class ClientSerializer(serializers.ModelSerializer):
+class ClientSerializer(SparseFieldsMixin, serializers.ModelSerializer):
     class Meta:
         model = Client
         fields = '__all__'
         read_only_fields = ['tenant', 'created_at', 'updated_at']
+        list_serializer_class = BulkListSerializer
+        list_exclude = ['notes']
 
     def create(self, validated_data):
         request = self.context.get('request')
@@ -1,15 +1,45 @@
 from rest_framework import viewsets, filters
+from rest_framework.decorators import action
 from django_filters.rest_framework import DjangoFilterBackend
+from core.bulk import BulkWriteMixin
+from core.export import ExportMixin
+from core.sparse import SparseFieldsViewMixin
+from core.versions import ConditionalGetMixin
 from .models import Client
 from .serializers import ClientSerializer
 
 
-class ClientViewSet(viewsets.ModelViewSet):
+class ClientViewSet(ConditionalGetMixin, SparseFieldsViewMixin, BulkWriteMixin, ExportMixin, viewsets.ModelViewSet):
     serializer_class = ClientSerializer
+    etag_models = (Client,)
     filter_backends = [DjangoFilterBackend, filters.SearchFilter, filters.OrderingFilter]
     search_fields = ['name', 'phone', 'email', 'national_id']
     filterset_fields = ['created_at']
     ordering_fields = ['created_at', 'name']
+    export_name = 'clients'
+    export_columns = (
+        ('id', 'ID'),
+        ('name', 'Name'),
+        ('phone', 'Phone'),
+        ('email', 'Email'),
+        ('national_id', 'National ID'),
+        ('notes', 'Notes'),
+        ('created_at', 'Created at'),
+    )
 
     def get_queryset(self):
         return Client.objects.filter(tenant=self.request.tenant)
+
+    @action(detail=False, methods=['post', 'patch'], url_path='bulk')
+    def bulk(self, request):
+        """
+        Create (POST) or update (PATCH) up to BULK_MAX_ITEMS clients at once
+        """
+        return self.bulk_write(request)
+
+    @action(detail=False, methods=['get'])
+    def export(self, request):
+        """
+        Stream the clients matching the list filters as ?output=csv or ?output=xlsx
+        """
+        return super().export(request)
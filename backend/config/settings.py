@@ -71,6 +71,7 @@ MIDDLEWARE = [
     'django.contrib.auth.middleware.AuthenticationMiddleware',
     'django.contrib.messages.middleware.MessageMiddleware',
     'django.middleware.clickjacking.XFrameOptionsMiddleware',
+    'core.middleware.RequestMetricsMiddleware',
     'core.middleware.TenantMiddleware',
 ]
 
@@ -101,6 +102,45 @@ DATABASES = {
     'default': env.db(),
 }
 
+# Test runs only: SQLITE_TEST_FILE=1 puts the SQLite test database in
+# test_db.sqlite3 instead of memory and starts transactions IMMEDIATE, so
+# the threaded invoice numbering tests can run instead of being skipped
+if env.bool('SQLITE_TEST_FILE', default=False) and DATABASES['default']['ENGINE'] == 'django.db.backends.sqlite3':
+    DATABASES['default'].setdefault('OPTIONS', {}).setdefault('transaction_mode', 'IMMEDIATE')
+    DATABASES['default'].setdefault('TEST', {}).setdefault('NAME', os.path.join(BASE_DIR, 'test_db.sqlite3'))
+
+# Tenant resolution cache used by core.middleware.TenantMiddleware.
+# SHARED_CACHE_ALIAS names an entry in CACHES (e.g. Redis) shared by all
+# workers; leave it unset to use the in-process tier only.
+TENANT_CACHE = {
+    'MAX_ENTRIES': env.int('TENANT_CACHE_MAX_ENTRIES', default=1024),
+    'TTL': env.int('TENANT_CACHE_TTL', default=60),
+    'NEGATIVE_MAX_ENTRIES': env.int('TENANT_CACHE_NEGATIVE_MAX_ENTRIES', default=1024),
+    'NEGATIVE_TTL': env.int('TENANT_CACHE_NEGATIVE_TTL', default=10),
+    'SHARED_CACHE_ALIAS': env('TENANT_CACHE_ALIAS', default=None),
+    'SHARED_TTL': env.int('TENANT_CACHE_SHARED_TTL', default=300),
+}
+
+# Notification outbox (core.outbox), drained by dispatch_notifications.
+# core.outbox.LocmemBackend / ConsoleBackend replace a channel locally.
+NOTIFICATION_BACKENDS = {
+    'EMAIL': env('NOTIFICATION_EMAIL_BACKEND', default='core.outbox.EmailBackend'),
+    'WHATSAPP': env('NOTIFICATION_WHATSAPP_BACKEND', default='core.outbox.TwilioWhatsAppBackend'),
+}
+# Concurrent senders per channel; each email sender holds one SMTP connection
+NOTIFICATION_CONCURRENCY = {
+    'EMAIL': env.int('NOTIFICATION_EMAIL_CONCURRENCY', default=1),
+    'WHATSAPP': env.int('NOTIFICATION_WHATSAPP_CONCURRENCY', default=4),
+}
+
+
+# Request metrics (core.metrics), scraped from /api/metrics by staff users
+# or by Prometheus with "Authorization: Bearer <METRICS_TOKEN>"
+METRICS_TOKEN = env('METRICS_TOKEN', default='')
+# Requests per route the p50/p95/p99 are computed over
+METRICS_WINDOW = env.int('METRICS_WINDOW', default=1024)
+METRICS_SERVER_TIMING = env.bool('METRICS_SERVER_TIMING', default=True)
+
 
 # Password validation
 # https://docs.djangoproject.com/en/5.2/ref/settings/#auth-password-validators
@@ -147,16 +187,55 @@ AUTH_USER_MODEL = 'core.User'
 
 REST_FRAMEWORK = {
     'DEFAULT_AUTHENTICATION_CLASSES': (
-        'rest_framework_simplejwt.authentication.JWTAuthentication',
+        'core.tokens.TenantJWTAuthentication',
     ),
     'DEFAULT_PERMISSION_CLASSES': (
         'rest_framework.permissions.IsAuthenticated',
     ),
+    'DEFAULT_RENDERER_CLASSES': (
+        'core.renderers.FastJSONRenderer',
+        'rest_framework.renderers.BrowsableAPIRenderer',
+    ),
+    'DEFAULT_PAGINATION_CLASS': 'core.pagination.TenantPagination',
+    'PAGE_SIZE': 50,
 }
 
+# Largest list accepted by the bulk create / update endpoints (core.bulk)
+BULK_MAX_ITEMS = env.int('BULK_MAX_ITEMS', default=1000)
+
+# Most invoices /api/finance/batch_pdf/ renders inside the request; larger
+# batches are queued for the job worker and fetched when ready
+INVOICE_BATCH_SYNC_MAX = env.int('INVOICE_BATCH_SYNC_MAX', default=200)
+
 SIMPLE_JWT = {
     'ACCESS_TOKEN_LIFETIME': timedelta(days=1),
     'REFRESH_TOKEN_LIFETIME': timedelta(days=7),
+    'TOKEN_OBTAIN_SERIALIZER': 'core.tokens.TenantTokenObtainPairSerializer',
+    'TOKEN_REFRESH_SERIALIZER': 'core.tokens.TenantTokenRefreshSerializer',
+}
+
+# Per-user token versions checked by core.tokens.TenantJWTAuthentication.
+# ALIAS names an entry in CACHES; with a per-process cache, revoked tokens
+# stay usable on other workers for up to TTL seconds.
+TOKEN_VERSION_CACHE = {
+    'ALIAS': env('TOKEN_VERSION_CACHE_ALIAS', default='default'),
+    'TTL': env.int('TOKEN_VERSION_CACHE_TTL', default=60),
+}
+
+# Per-tenant change versions behind the list/detail ETags (core.versions).
+# Without an ALIAS they are read from the database, one query per GET;
+# only point it at a cache every worker shares (e.g. Redis), or other
+# workers may answer 304 with data up to TTL seconds old.
+CHANGE_VERSION_CACHE = {
+    'ALIAS': env('CHANGE_VERSION_CACHE_ALIAS', default=None),
+    'TTL': env.int('CHANGE_VERSION_CACHE_TTL', default=300),
+}
+
+# /api/properties/facets/ results (properties.facets). Keys include the
+# tenant's change version, so a per-process cache never serves stale counts.
+PROPERTY_FACETS_CACHE = {
+    'ALIAS': env('PROPERTY_FACETS_CACHE_ALIAS', default='default'),
+    'TTL': env.int('PROPERTY_FACETS_CACHE_TTL', default=300),
 }
 
 CORS_ALLOW_ALL_ORIGINS = True # For dev
@@ -167,3 +246,30 @@ STATIC_ROOT = os.path.join(BASE_DIR, 'staticfiles')
 
 MEDIA_URL = 'media/'
 MEDIA_ROOT = os.path.join(BASE_DIR, 'media')
+
+# Uploads and rendered invoice PDFs are written by the background workers
+# and read by the web service. When those run on separate machines (as in
+# render.yaml) they need a storage they share: set AWS_STORAGE_BUCKET_NAME
+# to keep media in S3, or in any S3-compatible store with
+# AWS_S3_ENDPOINT_URL. Credentials come from AWS_ACCESS_KEY_ID /
+# AWS_SECRET_ACCESS_KEY. Without a bucket, files go to MEDIA_ROOT.
+AWS_STORAGE_BUCKET_NAME = env('AWS_STORAGE_BUCKET_NAME', default='')
+if AWS_STORAGE_BUCKET_NAME:
+    STORAGES = {
+        'default': {'BACKEND': 'storages.backends.s3.S3Storage'},
+        'staticfiles': {'BACKEND': 'django.contrib.staticfiles.storage.StaticFilesStorage'},
+    }
+    AWS_S3_ENDPOINT_URL = env('AWS_S3_ENDPOINT_URL', default=None)
+    AWS_S3_REGION_NAME = env('AWS_S3_REGION_NAME', default=None)
+    # Private objects, reached through signed URLs
+    AWS_DEFAULT_ACL = None
+    AWS_QUERYSTRING_AUTH = True
+    AWS_S3_FILE_OVERWRITE = False
+
+# Let the web server send private files (invoice PDFs) after Django has
+# checked access: 'nginx' answers with X-Accel-Redirect to an internal
+# location mapped to MEDIA_ROOT at PRIVATE_FILE_ACCEL_PREFIX, 'sendfile'
+# with X-Sendfile (Apache mod_xsendfile, lighttpd). Empty streams from Django.
+# Both need the files on the web server's disk, so leave it empty with S3.
+PRIVATE_FILE_SERVER = env('PRIVATE_FILE_SERVER', default='')
+PRIVATE_FILE_ACCEL_PREFIX = env('PRIVATE_FILE_ACCEL_PREFIX', default='/protected-media/')
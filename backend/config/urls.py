@@ -1,6 +1,7 @@
 from django.contrib import admin
 from django.urls import path, include
 from core.root_view import api_root
+from core.views import MetricsView
 from django.conf import settings
 from django.conf.urls.static import static
 from rest_framework import permissions
@@ -29,6 +30,8 @@ urlpatterns = [
     path('api/finance/', include('finance.urls')),
     path('api/clients/', include('clients.urls')),
     path('api/dashboard/', include('core.dashboard_urls')),
+    path('api/imports/', include('core.import_urls')),
+    path('api/metrics', MetricsView.as_view(), name='metrics'),
     
     # Swagger
     path('swagger/', schema_view.with_ui('swagger', cache_timeout=0), name='schema-swagger-ui'),
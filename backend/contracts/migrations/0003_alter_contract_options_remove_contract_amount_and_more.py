@@ -0,0 +1,65 @@
+# Generated by Django 5.2.18 on 2026-10-18 09:11
+
+import django.db.models.deletion
+from decimal import Decimal
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('clients', '0001_initial'),
+        ('contracts', '0002_initial'),
+    ]
+
+    operations = [
+        migrations.AlterModelOptions(
+            name='contract',
+            options={'ordering': ['-created_at']},
+        ),
+        migrations.RemoveField(
+            model_name='contract',
+            name='amount',
+        ),
+        migrations.RemoveField(
+            model_name='contract',
+            name='is_active',
+        ),
+        migrations.AddField(
+            model_name='contract',
+            name='monthly_amount',
+            field=models.DecimalField(decimal_places=2, default=Decimal('0'), max_digits=12),
+            preserve_default=False,
+        ),
+        migrations.AddField(
+            model_name='contract',
+            name='notes',
+            field=models.TextField(blank=True),
+        ),
+        migrations.AddField(
+            model_name='contract',
+            name='status',
+            field=models.CharField(choices=[('ACTIVE', 'Active'), ('EXPIRED', 'Expired'), ('TERMINATED', 'Terminated')], default='ACTIVE', max_length=20),
+        ),
+        migrations.AddField(
+            model_name='contract',
+            name='total_amount',
+            field=models.DecimalField(decimal_places=2, default=Decimal('0'), max_digits=12),
+            preserve_default=False,
+        ),
+        migrations.AddField(
+            model_name='contract',
+            name='updated_at',
+            field=models.DateTimeField(auto_now=True),
+        ),
+        migrations.AlterField(
+            model_name='contract',
+            name='client',
+            field=models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='contracts', to='clients.client'),
+        ),
+        migrations.AlterField(
+            model_name='contract',
+            name='pdf_file',
+            field=models.FileField(blank=True, null=True, upload_to='contracts/'),
+        ),
+    ]
@@ -0,0 +1,24 @@
+# Generated by Django 5.2.18 on 2026-10-18 09:14
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('clients', '0002_tenant_created_index'),
+        ('contracts', '0003_alter_contract_options_remove_contract_amount_and_more'),
+        ('core', '0002_tenantstats'),
+        ('properties', '0003_tenant_created_index'),
+    ]
+
+    operations = [
+        migrations.AlterModelOptions(
+            name='contract',
+            options={'ordering': ['-created_at', '-id']},
+        ),
+        migrations.AddIndex(
+            model_name='contract',
+            index=models.Index(fields=['tenant', 'created_at', 'id'], name='contract_tenant_created_idx'),
+        ),
+    ]
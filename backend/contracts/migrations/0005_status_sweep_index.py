@@ -0,0 +1,20 @@
+# Generated by Django 5.2.18 on 2026-10-18 09:49
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('clients', '0002_tenant_created_index'),
+        ('contracts', '0004_tenant_created_index'),
+        ('core', '0005_importrun'),
+        ('properties', '0004_property_search'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='contract',
+            index=models.Index(fields=['status', 'end_date'], name='contract_status_end_idx'),
+        ),
+    ]
@@ -25,7 +25,13 @@ class Contract(models.Model):
     updated_at = models.DateTimeField(auto_now=True)
 
     class Meta:
-        ordering = ['-created_at']
+        ordering = ['-created_at', '-id']
+        indexes = [
+            # Matches the keyset used by core.pagination.TenantCursorPagination
+            models.Index(fields=['tenant', 'created_at', 'id'], name='contract_tenant_created_idx'),
+            # Lets core.sweep find ACTIVE contracts past their end date
+            models.Index(fields=['status', 'end_date'], name='contract_status_end_idx'),
+        ]
 
     def __str__(self):
         return f"Contract: {self.property.title} - {self.client.name}"
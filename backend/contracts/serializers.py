@@ -1,11 +1,33 @@
 from rest_framework import serializers
+from clients.models import Client
+from core.sparse import SparseFieldsMixin
+from properties.models import Property
 from .models import Contract
 
-class ContractSerializer(serializers.ModelSerializer):
+class ContractSerializer(SparseFieldsMixin, serializers.ModelSerializer):
+    # Read-only labels for lists; the view selects both relations
+    client_name = serializers.CharField(source='client.name', read_only=True)
+    property_title = serializers.CharField(source='property.title', read_only=True)
+    expandable_fields = {
+        'client': 'clients.serializers.ClientSerializer',
+        'property': 'properties.serializers.PropertySerializer',
+    }
+
     class Meta:
         model = Contract
         fields = '__all__'
         read_only_fields = ['tenant']
+        list_exclude = ['notes']
+
+    def get_fields(self):
+        fields = super().get_fields()
+        # Only the tenant's own clients and properties can be linked
+        request = self.context.get('request')
+        tenant = getattr(request, 'tenant', None)
+        if tenant is not None:
+            fields['client'].queryset = Client.objects.filter(tenant=tenant)
+            fields['property'].queryset = Property.objects.filter(tenant=tenant)
+        return fields
 
     def create(self, validated_data):
         request = self.context.get('request')
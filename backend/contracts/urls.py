@@ -1,7 +1,10 @@
-from django.urls import path
-from .views import ContractListCreateView, ContractDetailView
+from django.urls import path, include
+from rest_framework.routers import DefaultRouter
+from .views import ContractViewSet
+
+router = DefaultRouter()
+router.register(r'', ContractViewSet, basename='contract')
 
 urlpatterns = [
-    path('', ContractListCreateView.as_view(), name='contract-list-create'),
-    path('<int:pk>/', ContractDetailView.as_view(), name='contract-detail'),
+    path('', include(router.urls)),
 ]
@@ -1,22 +1,49 @@
 from rest_framework import viewsets
+from rest_framework.decorators import action
+from django.db import transaction
+from django_filters.rest_framework import DjangoFilterBackend
+from clients.models import Client
+from properties.models import Property, PropertyImage
 from .models import Contract
 from .serializers import ContractSerializer
-from core.notifications import send_contract_email, send_contract_whatsapp
+from core.export import ExportMixin
+from core.sparse import SparseFieldsViewMixin
+from core.versions import ConditionalGetMixin
+from core.notifications import queue_contract_notifications
 
 
-class ContractViewSet(viewsets.ModelViewSet):
+class ContractViewSet(ConditionalGetMixin, SparseFieldsViewMixin, ExportMixin, viewsets.ModelViewSet):
     serializer_class = ContractSerializer
+    # ?expand=property nests PropertySerializer, gallery included
+    etag_models = (Contract, Client, Property, PropertyImage)
+    filter_backends = [DjangoFilterBackend]
+    filterset_fields = ['status', 'property', 'client']
+    export_name = 'contracts'
+    export_columns = (
+        ('id', 'ID'),
+        ('property__title', 'Property'),
+        ('client__name', 'Client'),
+        ('start_date', 'Start date'),
+        ('end_date', 'End date'),
+        ('monthly_amount', 'Monthly amount'),
+        ('total_amount', 'Total amount'),
+        ('status', 'Status'),
+        ('created_at', 'Created at'),
+    )
     
     def get_queryset(self):
-        return Contract.objects.filter(tenant=self.request.tenant)
+        return Contract.objects.filter(tenant=self.request.tenant).select_related('property', 'client')
     
     def perform_create(self, serializer):
-        # Save contract
-        contract = serializer.save()
-        
-        # Send notifications
-        try:
-            send_contract_email(contract)
-            send_contract_whatsapp(contract)
-        except Exception as e:
-            print(f"Error sending notifications: {e}")
+        # Save contract and queue its notifications in one transaction;
+        # dispatch_notifications sends them
+        with transaction.atomic():
+            contract = serializer.save()
+            queue_contract_notifications(contract)
+    
+    @action(detail=False, methods=['get'])
+    def export(self, request):
+        """
+        Stream all contracts as ?output=csv or ?output=xlsx
+        """
+        return super().export(request)
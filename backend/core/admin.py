@@ -1,6 +1,6 @@
 from django.contrib import admin
 from django.contrib.auth.admin import UserAdmin
-from .models import User, Tenant
+from .models import User, Tenant, TenantStats, Job, Notification, ImportRun
 
 @admin.register(User)
 class CustomUserAdmin(UserAdmin):
@@ -13,3 +13,25 @@ class CustomUserAdmin(UserAdmin):
 @admin.register(Tenant)
 class TenantAdmin(admin.ModelAdmin):
     list_display = ('name', 'subdomain', 'created_at')
+
+@admin.register(TenantStats)
+class TenantStatsAdmin(admin.ModelAdmin):
+    list_display = ('tenant', 'properties_count', 'clients_count', 'active_contracts_count', 'total_revenue', 'updated_at')
+    readonly_fields = ('updated_at',)
+
+@admin.register(Job)
+class JobAdmin(admin.ModelAdmin):
+    list_display = ('kind', 'key', 'status', 'attempts', 'run_after', 'created_at')
+    list_filter = ('kind', 'status')
+    search_fields = ('key',)
+
+@admin.register(Notification)
+class NotificationAdmin(admin.ModelAdmin):
+    list_display = ('channel', 'recipient', 'tenant', 'status', 'attempts', 'run_after', 'sent_at')
+    list_filter = ('channel', 'status')
+    search_fields = ('recipient', 'external_id')
+
+@admin.register(ImportRun)
+class ImportRunAdmin(admin.ModelAdmin):
+    list_display = ('kind', 'tenant', 'status', 'dry_run', 'rows_processed', 'valid_count', 'rejected_count', 'created_at')
+    list_filter = ('kind', 'status')
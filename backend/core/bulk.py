@@ -0,0 +1,217 @@
+from collections import Counter
+
+from django.conf import settings
+from django.db import transaction
+from django.dispatch import Signal
+from django.utils import timezone
+from rest_framework import serializers, status
+from rest_framework.response import Response
+from rest_framework.validators import UniqueValidator
+
+# Sent after a bulk write with ``instances`` and ``created``; updates also
+# pass ``previous``, each instance's stored column values ({attname: value})
+# in the same order. bulk_create and bulk_update skip post_save, so
+# anything that normally reacts to saves (stats rollup, search index)
+# listens to this too.
+bulk_saved = Signal()
+
+
+class PrefetchedPrimaryKeyRelatedField(serializers.PrimaryKeyRelatedField):
+    """
+    Primary key field that resolves from ``prefetched`` when a bulk
+    serializer has loaded the whole batch's targets in one query
+    """
+    prefetched = None
+
+    def to_internal_value(self, data):
+        if self.prefetched is not None and str(data) in self.prefetched:
+            return self.prefetched[str(data)]
+        return super().to_internal_value(data)
+
+
+class BulkListSerializer(serializers.ListSerializer):
+    """
+    many=True serializer that writes with bulk_create / bulk_update.
+
+    Per-item checks that would cost a query each (foreign keys, unique
+    fields) are done once for the whole batch. Children may define
+    ``prepare_bulk(instances)`` to fill computed fields before writing.
+    """
+
+    def __init__(self, *args, **kwargs):
+        kwargs.setdefault('max_length', settings.BULK_MAX_ITEMS)
+        super().__init__(*args, **kwargs)
+        self._unique_errors = {}
+        self._instances = {}
+        self._matched = []
+
+    def _prefetch_related(self, data):
+        for name, field in self.child.fields.items():
+            if not isinstance(field, PrefetchedPrimaryKeyRelatedField) or field.read_only:
+                continue
+            pks = {
+                item[name] for item in data
+                if isinstance(item, dict) and isinstance(item.get(name), (int, str)) and item[name] != ''
+            }
+            field.prefetched = {str(pk): obj for pk, obj in field.get_queryset().in_bulk(pks).items()} if pks else {}
+
+    def _check_unique(self, data):
+        """
+        Replace per-item UniqueValidator queries with one query per field
+        """
+        errors = {}
+        for name, field in self.child.fields.items():
+            validators = [v for v in field.validators if isinstance(v, UniqueValidator)]
+            if not validators:
+                continue
+            field.validators = [v for v in field.validators if not isinstance(v, UniqueValidator)]
+            validator = validators[0]
+
+            values = [
+                item.get(name) if isinstance(item, dict) and isinstance(item.get(name), str) else None
+                for item in data
+            ]
+            present = [value for value in values if value]
+            counts = Counter(present)
+            existing = dict(
+                validator.queryset.filter(**{f'{field.source}__in': present}).values_list(field.source, 'pk')
+            ) if present else {}
+
+            for item, value in zip(data, values):
+                if not value:
+                    continue
+                own_pk = str(item.get('id')) if self.instance is not None else None
+                taken = value in existing and str(existing[value]) != own_pk
+                if taken or counts[value] > 1:
+                    errors.setdefault(id(item), {})[name] = [validator.message]
+        return errors
+
+    def _begin(self, data):
+        self._matched = []
+        if self.instance is not None:
+            self._instances = {str(instance.pk): instance for instance in self.instance}
+        if isinstance(data, list):
+            self._prefetch_related(data)
+            self._unique_errors = self._check_unique(data)
+
+    def to_internal_value(self, data):
+        self._begin(data)
+        return super().to_internal_value(data)
+
+    def validate_each(self, data):
+        """
+        Validate every item, keeping the valid ones instead of failing the
+        whole batch. Returns ([(index, attrs), ...], {index: errors}).
+        """
+        self._begin(data)
+        valid, errors = [], {}
+        for index, item in enumerate(data):
+            try:
+                valid.append((index, self.run_child_validation(item)))
+            except serializers.ValidationError as exc:
+                errors[index] = exc.detail
+        return valid, errors
+
+    def run_child_validation(self, data):
+        if self.instance is not None:
+            instance = self._instances.get(str(data.get('id'))) if isinstance(data, dict) else None
+            if instance is None:
+                raise serializers.ValidationError({'id': ['Not found.']})
+            self.child.instance = instance
+            self.child.initial_data = data
+
+        unique_errors = self._unique_errors.get(id(data))
+        try:
+            validated = super().run_child_validation(data)
+        except serializers.ValidationError as exc:
+            if unique_errors and isinstance(exc.detail, dict):
+                raise serializers.ValidationError({**unique_errors, **exc.detail})
+            raise
+        if unique_errors:
+            raise serializers.ValidationError(unique_errors)
+        if self.instance is not None:
+            self._matched.append(self.child.instance)
+        return validated
+
+    def _prepare(self, instances):
+        prepare = getattr(self.child, 'prepare_bulk', None)
+        if prepare is not None:
+            prepare(instances)
+
+    def create(self, validated_data):
+        model = self.child.Meta.model
+        instances = [model(**attrs) for attrs in validated_data]
+        self._prepare(instances)
+        model.objects.bulk_create(instances, batch_size=500)
+        bulk_saved.send(sender=model, instances=instances, created=True)
+        return instances
+
+    def update(self, instances, validated_data):
+        model = self.child.Meta.model
+        fields = set()
+        now = timezone.now()
+        columns = [field.attname for field in model._meta.concrete_fields]
+        previous = [{column: getattr(instance, column) for column in columns} for instance in self._matched]
+        for instance, attrs in zip(self._matched, validated_data):
+            for attr, value in attrs.items():
+                setattr(instance, attr, value)
+            fields.update(attrs)
+            # bulk_update() skips auto_now
+            if hasattr(instance, 'updated_at'):
+                instance.updated_at = now
+                fields.add('updated_at')
+        self._prepare(self._matched)
+        fields.update(getattr(self.child, 'bulk_computed_fields', ()))
+        fields.discard('id')
+        if fields:
+            model.objects.bulk_update(self._matched, sorted(fields), batch_size=500)
+        bulk_saved.send(sender=model, instances=self._matched, created=False, previous=previous)
+        return self._matched
+
+
+def item_errors(errors):
+    """
+    [{'index': i, 'errors': {...}}] for the invalid items of a bulk request
+    """
+    if isinstance(errors, dict):
+        items = errors.items()
+    else:
+        items = enumerate(errors)
+    return [{'index': index, 'errors': detail} for index, detail in items if detail]
+
+
+class BulkWriteMixin:
+    """
+    Adds bulk_write(request) to a view: POST a list of objects to create
+    them, PATCH a list of partial objects (each with its "id") to update
+    them. The whole batch is written in one transaction, or nothing is
+    written and the response lists the errors of each invalid item.
+    """
+
+    def bulk_write(self, request):
+        if not isinstance(request.data, list):
+            return Response({'error': 'Expected a list of objects'}, status=status.HTTP_400_BAD_REQUEST)
+
+        if request.method == 'PATCH':
+            ids = [item.get('id') for item in request.data if isinstance(item, dict)]
+            try:
+                instances = list(self.get_queryset().filter(pk__in=[int(pk) for pk in ids if pk is not None]))
+            except (TypeError, ValueError):
+                return Response({'error': 'id must be a number'}, status=status.HTTP_400_BAD_REQUEST)
+            serializer = self.get_serializer(instances, data=request.data, many=True, partial=True)
+        else:
+            serializer = self.get_serializer(data=request.data, many=True)
+
+        if not serializer.is_valid():
+            errors = serializer.errors
+            if isinstance(errors, dict) and not all(isinstance(key, int) for key in errors):
+                # Errors about the list itself (too long, empty, ...)
+                return Response(errors, status=status.HTTP_400_BAD_REQUEST)
+            return Response({'errors': item_errors(errors)}, status=status.HTTP_400_BAD_REQUEST)
+
+        with transaction.atomic():
+            if request.method == 'PATCH':
+                objects = serializer.save()
+                return Response({'updated': len(objects), 'ids': [obj.pk for obj in objects]})
+            objects = serializer.save(tenant=request.tenant)
+        return Response({'created': len(objects), 'ids': [obj.pk for obj in objects]}, status=status.HTTP_201_CREATED)
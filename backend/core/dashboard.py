@@ -1,12 +1,11 @@
 from rest_framework import viewsets, status
 from rest_framework.decorators import action
 from rest_framework.response import Response
-from django.db.models import Count, Sum, Q
 from django.utils import timezone
-from properties.models import Property
-from contracts.models import Contract
-from finance.models import Invoice
-from clients.models import Client
+from .models import TenantStats
+from .revenue import revenue_series
+from .rollup import rebuild_tenant_stats
+from .serializers import RevenueSeriesQuerySerializer
 
 
 class DashboardViewSet(viewsets.ViewSet):
@@ -18,64 +17,67 @@ class DashboardViewSet(viewsets.ViewSet):
     def stats(self, request):
         tenant = request.tenant
         
-        # Get counts
-        properties_count = Property.objects.filter(tenant=tenant).count()
-        clients_count = Client.objects.filter(tenant=tenant).count()
-        active_contracts = Contract.objects.filter(
-            tenant=tenant, 
-            status='ACTIVE'
-        ).count()
-        
-        # Get financial stats
-        total_revenue = Invoice.objects.filter(
-            tenant=tenant,
-            status='PAID'
-        ).aggregate(total=Sum('total_amount'))['total'] or 0
-        
-        pending_amount = Invoice.objects.filter(
-            tenant=tenant,
-            status='PENDING'
-        ).aggregate(total=Sum('total_amount'))['total'] or 0
-        
-        overdue_amount = Invoice.objects.filter(
-            tenant=tenant,
-            status='OVERDUE'
-        ).aggregate(total=Sum('total_amount'))['total'] or 0
+        # Single primary-key read of the rollup maintained by core.rollup
+        if tenant is None:
+            stats = TenantStats()
+        else:
+            stats = TenantStats.objects.filter(pk=tenant.pk).first()
+            if stats is None:
+                stats = rebuild_tenant_stats(tenant.pk)
         
         # Revenue by month (last 6 months)
-        from datetime import datetime, timedelta
-        six_months_ago = timezone.now() - timedelta(days=180)
+        from datetime import timedelta
+        first_month = (timezone.now() - timedelta(days=180)).strftime('%Y-%m')
         
-        monthly_revenue = Invoice.objects.filter(
-            tenant=tenant,
-            status='PAID',
-            paid_date__gte=six_months_ago
-        ).extra(
-            select={'month': 'strftime("%%Y-%%m", paid_date)'}
-        ).values('month').annotate(
-            revenue=Sum('total_amount')
-        ).order_by('month')
+        monthly_revenue = [
+            {'month': month, 'revenue': float(revenue)}
+            for month, revenue in sorted(stats.monthly_revenue.items())
+            if month >= first_month
+        ]
         
         # Property distribution by type
-        property_distribution = Property.objects.filter(
-            tenant=tenant
-        ).values('property_type').annotate(
-            count=Count('id')
-        )
+        property_distribution = [
+            {'property_type': property_type, 'count': count}
+            for property_type, count in sorted(stats.property_distribution.items())
+        ]
         
         return Response({
             'counts': {
-                'properties': properties_count,
-                'clients': clients_count,
-                'active_contracts': active_contracts,
+                'properties': stats.properties_count,
+                'clients': stats.clients_count,
+                'active_contracts': stats.active_contracts_count,
             },
             'financial': {
-                'total_revenue': float(total_revenue),
-                'pending_amount': float(pending_amount),
-                'overdue_amount': float(overdue_amount),
+                'total_revenue': float(stats.total_revenue),
+                'pending_amount': float(stats.pending_amount),
+                'overdue_amount': float(stats.overdue_amount),
             },
             'charts': {
-                'monthly_revenue': list(monthly_revenue),
-                'property_distribution': list(property_distribution),
+                'monthly_revenue': monthly_revenue,
+                'property_distribution': property_distribution,
             }
         })
+
+    @action(detail=False, methods=['get'])
+    def revenue(self, request):
+        """
+        Invoice totals per ?granularity= (day, week, month, quarter) from
+        ?start= to ?end=, on the ?basis= of paid or due dates, optionally
+        one series per ?split= (status, property_type)
+        """
+        query = RevenueSeriesQuerySerializer(data=request.query_params)
+        query.is_valid(raise_exception=True)
+        params = query.validated_data
+
+        tenant = request.tenant
+        result = revenue_series(tenant.pk if tenant is not None else None, **params)
+        return Response({
+            'granularity': params['granularity'],
+            'basis': params['basis'],
+            'split': params.get('split'),
+            'start': params['start'],
+            'end': params['end'],
+            'periods': result['periods'],
+            'series': result['series'],
+            'total': result['total'],
+        })
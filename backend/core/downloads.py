@@ -0,0 +1,141 @@
+import hashlib
+import re
+
+from django.conf import settings
+from django.http import FileResponse, HttpResponse, StreamingHttpResponse
+from django.utils.cache import get_conditional_response
+from django.utils.http import http_date, parse_http_date_safe, quote_etag
+
+# Only a single "bytes=start-end" range is served; multi-range requests get
+# the whole file, which RFC 9110 allows.
+_RANGE = re.compile(r'^bytes=(\d*)-(\d*)$')
+
+BLOCK_SIZE = 64 * 1024
+
+
+def file_validators(field_file):
+    """
+    Return (etag, last_modified timestamp, size) for a stored file.
+
+    Rendered files are never rewritten in place (a re-render gets a new
+    name from the storage), so name, size and mtime identify the bytes.
+    """
+    storage = field_file.storage
+    modified = storage.get_modified_time(field_file.name)
+    size = storage.size(field_file.name)
+    digest = hashlib.sha1(f'{field_file.name}:{size}:{modified.timestamp()}'.encode()).hexdigest()
+    return quote_etag(digest), int(modified.timestamp()), size
+
+
+def _parse_range(header, size):
+    """
+    (start, end) inclusive for a single satisfiable byte range, None to
+    serve the whole file, or False if the range can't be satisfied
+    """
+    match = _RANGE.match(header.strip())
+    if not match:
+        return None
+    first, last = match.groups()
+    if not first and not last:
+        return None
+    if not first:
+        # Suffix range: the last N bytes
+        length = int(last)
+        if not length:
+            return False
+        return max(0, size - length), size - 1
+    start = int(first)
+    end = min(int(last), size - 1) if last else size - 1
+    if start >= size or start > end:
+        return False
+    return start, end
+
+
+def _if_range_passes(request, etag, last_modified):
+    if_range = request.META.get('HTTP_IF_RANGE')
+    if not if_range:
+        return True
+    if if_range.startswith('"'):
+        return if_range == etag
+    return parse_http_date_safe(if_range) == last_modified
+
+
+def _read_range(file, start, length):
+    try:
+        file.seek(start)
+        while length > 0:
+            block = file.read(min(BLOCK_SIZE, length))
+            if not block:
+                break
+            length -= len(block)
+            yield block
+    finally:
+        file.close()
+
+
+def _offload_header(field_file):
+    """
+    (header, value) telling the web server to send the file itself, per
+    PRIVATE_FILE_SERVER, or None to stream it from Django
+    """
+    server = getattr(settings, 'PRIVATE_FILE_SERVER', '')
+    if server == 'nginx':
+        return 'X-Accel-Redirect', settings.PRIVATE_FILE_ACCEL_PREFIX.rstrip('/') + '/' + field_file.name
+    if server == 'sendfile':
+        return 'X-Sendfile', field_file.path
+    return None
+
+
+def serve_file(request, field_file, filename, content_type):
+    """
+    Respond with a stored file without loading it into memory.
+
+    Sends strong ETag / Last-Modified validators and answers conditional
+    requests with 304, serves single byte ranges with 206, and with
+    PRIVATE_FILE_SERVER set hands the transfer to nginx or Apache.
+    """
+    etag, last_modified, size = file_validators(field_file)
+    headers = {
+        'ETag': etag,
+        'Last-Modified': http_date(last_modified),
+        # Tenant data: browsers may keep it, shared caches may not, and
+        # every reuse is revalidated against the ETag
+        'Cache-Control': 'private, no-cache',
+        'Accept-Ranges': 'bytes',
+    }
+
+    response = get_conditional_response(request, etag=etag, last_modified=last_modified)
+    if response is not None:
+        for header, value in headers.items():
+            response[header] = value
+        return response
+
+    offload = _offload_header(field_file)
+    byte_range = None
+    if offload is None and 'HTTP_RANGE' in request.META and _if_range_passes(request, etag, last_modified):
+        byte_range = _parse_range(request.META['HTTP_RANGE'], size)
+
+    if offload is not None:
+        # The web server handles ranges and streams the bytes itself
+        response = HttpResponse(content_type=content_type)
+        response[offload[0]] = offload[1]
+    elif byte_range is False:
+        response = HttpResponse(status=416)
+        response['Content-Range'] = f'bytes */{size}'
+    elif byte_range is not None:
+        start, end = byte_range
+        length = end - start + 1
+        response = StreamingHttpResponse(
+            _read_range(field_file.storage.open(field_file.name, 'rb'), start, length),
+            status=206,
+            content_type=content_type,
+        )
+        response['Content-Range'] = f'bytes {start}-{end}/{size}'
+        response['Content-Length'] = str(length)
+    else:
+        response = FileResponse(field_file.storage.open(field_file.name, 'rb'), content_type=content_type)
+
+    response['Content-Disposition'] = f'attachment; filename="{filename}"'
+    for header, value in headers.items():
+        response[header] = value
+    return response
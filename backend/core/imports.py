@@ -0,0 +1,193 @@
+import csv
+import io
+import json
+from itertools import islice
+
+from django.db import transaction
+from django.db.models import F
+from django.http import StreamingHttpResponse
+from django.utils.module_loading import import_string
+from rest_framework import mixins, serializers, status, viewsets
+from rest_framework.decorators import action
+from rest_framework.response import Response
+
+from .export import stream_csv
+from .jobs import enqueue, register
+from .models import ImportRejectedRow, ImportRun
+
+# Serializer used to validate and insert each kind of import
+IMPORTERS = {
+    ImportRun.Kind.CLIENTS: 'clients.serializers.ClientSerializer',
+    ImportRun.Kind.PROPERTIES: 'properties.serializers.PropertySerializer',
+}
+
+MAX_CHUNK_SIZE = 5000
+
+
+def _open_csv(run):
+    raw = run.file.storage.open(run.file.name, 'rb')
+    # utf-8-sig: files saved by Excel start with a BOM
+    return raw, csv.DictReader(io.TextIOWrapper(raw, encoding='utf-8-sig', newline=''))
+
+
+def read_header(run):
+    raw, reader = _open_csv(run)
+    try:
+        return [name.strip() for name in reader.fieldnames or []]
+    finally:
+        raw.close()
+
+
+def read_rows(run):
+    """
+    Yield (row_number, {column: value}) for each data row, reading the
+    stored file as a stream. Empty cells are left out so optional fields
+    fall back to their defaults.
+    """
+    raw, reader = _open_csv(run)
+    try:
+        reader.fieldnames = [name.strip() for name in reader.fieldnames or []]
+        for row_number, row in enumerate(reader, start=1):
+            yield row_number, {
+                key: value.strip() for key, value in row.items()
+                if key and isinstance(value, str) and value.strip()
+            }
+    finally:
+        raw.close()
+
+
+def _chunks(rows, size):
+    chunk = []
+    for row in rows:
+        chunk.append(row)
+        if len(chunk) >= size:
+            yield chunk
+            chunk = []
+    if chunk:
+        yield chunk
+
+
+def process_chunk(run, serializer_class, chunk):
+    """
+    Validate one chunk with the model's serializer and, in one transaction,
+    insert its valid rows, record its rejected rows and advance the run
+    """
+    serializer = serializer_class(data=[row for _, row in chunk], many=True)
+    valid, errors = serializer.validate_each(serializer.initial_data)
+    rejected = [
+        ImportRejectedRow(run=run, row_number=chunk[index][0], data=chunk[index][1], errors=detail)
+        for index, detail in sorted(errors.items())
+    ]
+
+    with transaction.atomic():
+        if valid and not run.dry_run:
+            serializer.create([{**attrs, 'tenant_id': run.tenant_id} for _, attrs in valid])
+        ImportRejectedRow.objects.bulk_create(rejected)
+        ImportRun.objects.filter(pk=run.pk).update(
+            rows_processed=F('rows_processed') + len(chunk),
+            valid_count=F('valid_count') + len(valid),
+            rejected_count=F('rejected_count') + len(rejected),
+        )
+
+
+def run_import(run_id):
+    """
+    Process an import from its last committed chunk onwards, so a run
+    that failed part way can simply be run again.
+    """
+    run = ImportRun.objects.get(pk=run_id)
+    if run.status == ImportRun.Status.DONE:
+        return run
+    ImportRun.objects.filter(pk=run.pk).update(status=ImportRun.Status.RUNNING, last_error='')
+    serializer_class = import_string(IMPORTERS[run.kind])
+
+    try:
+        rows = islice(read_rows(run), run.rows_processed, None)
+        for chunk in _chunks(rows, run.chunk_size):
+            process_chunk(run, serializer_class, chunk)
+    except Exception as e:
+        ImportRun.objects.filter(pk=run.pk).update(status=ImportRun.Status.FAILED, last_error=str(e))
+        raise
+
+    ImportRun.objects.filter(pk=run.pk).update(status=ImportRun.Status.DONE)
+    run.refresh_from_db()
+    return run
+
+
+@register('run_import')
+def run_import_job(run_id):
+    run_import(run_id)
+
+
+def queue_import(run):
+    ImportRun.objects.filter(pk=run.pk).update(status=ImportRun.Status.PENDING)
+    return enqueue('run_import', key=f'import:{run.pk}', max_attempts=3, run_id=run.pk)
+
+
+def rejected_report(run):
+    """
+    CSV lines of the rejected rows: row number, errors, then the
+    original columns
+    """
+    columns = read_header(run)
+    rows = (
+        [row_number, json.dumps(errors, ensure_ascii=False), *(data.get(column, '') for column in columns)]
+        for row_number, data, errors in run.rejected_rows.values_list('row_number', 'data', 'errors').iterator(chunk_size=2000)
+    )
+    return stream_csv(['row', 'errors', *columns], rows)
+
+
+class ImportRunSerializer(serializers.ModelSerializer):
+    class Meta:
+        model = ImportRun
+        fields = [
+            'id', 'kind', 'file', 'dry_run', 'chunk_size', 'status', 'rows_processed',
+            'valid_count', 'rejected_count', 'last_error', 'created_at', 'updated_at',
+        ]
+        read_only_fields = [
+            'status', 'rows_processed', 'valid_count', 'rejected_count', 'last_error', 'created_at', 'updated_at',
+        ]
+
+    def validate_chunk_size(self, value):
+        if not 1 <= value <= MAX_CHUNK_SIZE:
+            raise serializers.ValidationError(f'Must be between 1 and {MAX_CHUNK_SIZE}.')
+        return value
+
+
+class ImportRunViewSet(mixins.CreateModelMixin, mixins.ListModelMixin, mixins.RetrieveModelMixin, viewsets.GenericViewSet):
+    """
+    Upload a CSV of clients or properties (multipart: kind, file, dry_run,
+    chunk_size). Rows are validated and inserted in the background; poll
+    the run for progress and download the rejected rows when it is done.
+    """
+    serializer_class = ImportRunSerializer
+
+    def get_queryset(self):
+        return ImportRun.objects.filter(tenant=self.request.tenant)
+
+    def perform_create(self, serializer):
+        with transaction.atomic():
+            run = serializer.save(tenant=self.request.tenant)
+            queue_import(run)
+
+    @action(detail=True, methods=['post'])
+    def resume(self, request, pk=None):
+        """
+        Continue a failed import from its last committed chunk
+        """
+        run = self.get_object()
+        if run.status != ImportRun.Status.FAILED:
+            return Response({'error': 'Only failed imports can be resumed'}, status=status.HTTP_400_BAD_REQUEST)
+        with transaction.atomic():
+            queue_import(run)
+        return Response({'status': ImportRun.Status.PENDING}, status=status.HTTP_202_ACCEPTED)
+
+    @action(detail=True, methods=['get'])
+    def rejected(self, request, pk=None):
+        """
+        Rejected rows with their errors, as CSV
+        """
+        run = self.get_object()
+        response = StreamingHttpResponse(rejected_report(run), content_type='text/csv; charset=utf-8')
+        response['Content-Disposition'] = f'attachment; filename="import-{run.pk}-rejected.csv"'
+        return response
@@ -0,0 +1,188 @@
+import logging
+import time
+import traceback
+import uuid
+from concurrent.futures.process import BrokenProcessPool
+from datetime import timedelta
+
+from django.db import connections
+from django.db.models import F, Q
+from django.utils import timezone
+from django.utils.module_loading import autodiscover_modules
+
+from .models import Job
+from .pool import call, process_pool
+
+logger = logging.getLogger(__name__)
+
+# Jobs left RUNNING longer than this belong to a dead worker and are retried
+VISIBILITY_TIMEOUT = timedelta(minutes=10)
+
+MAX_BACKOFF = timedelta(hours=1)
+
+_handlers = {}
+
+
+def register(kind):
+    """
+    Register the decorated function as the handler for ``kind`` jobs.
+    Handlers live in each app's ``jobs`` module and receive the payload
+    as keyword arguments.
+    """
+    def decorator(func):
+        _handlers[kind] = func
+        return func
+    return decorator
+
+
+def discover():
+    autodiscover_modules('jobs')
+
+
+def enqueue(kind, key='', delay=None, max_attempts=5, **payload):
+    """
+    Queue a job. If ``key`` is given and an identical job is still waiting
+    or running, no new job is created. Call inside the transaction that
+    writes the data the job depends on, so workers only see it after commit.
+    """
+    if key and Job.objects.filter(
+        kind=kind, key=key, status__in=[Job.Status.PENDING, Job.Status.RUNNING]
+    ).exists():
+        return None
+    return Job.objects.create(
+        kind=kind,
+        key=key,
+        payload=payload,
+        max_attempts=max_attempts,
+        run_after=timezone.now() + (delay or timedelta(0)),
+    )
+
+
+def claim(batch_size, kinds=None, worker_id=None):
+    """
+    Atomically mark up to ``batch_size`` due jobs as RUNNING for this worker.
+
+    The UPDATE re-checks the claimable condition, so two workers racing for
+    the same rows can't both win, even on databases without SKIP LOCKED.
+    """
+    worker_id = worker_id or uuid.uuid4().hex
+    now = timezone.now()
+    claimable = (
+        Q(status=Job.Status.PENDING, run_after__lte=now)
+        | Q(status=Job.Status.RUNNING, locked_at__lt=now - VISIBILITY_TIMEOUT)
+    )
+    candidates = Job.objects.filter(claimable)
+    if kinds:
+        candidates = candidates.filter(kind__in=kinds)
+    ids = list(candidates.order_by('run_after', 'id').values_list('id', flat=True)[:batch_size])
+    if not ids:
+        return []
+
+    Job.objects.filter(claimable, id__in=ids).update(
+        status=Job.Status.RUNNING,
+        locked_by=worker_id,
+        locked_at=now,
+        attempts=F('attempts') + 1,
+    )
+    return list(Job.objects.filter(id__in=ids, locked_by=worker_id, locked_at=now))
+
+
+def _backoff(attempts):
+    return min(timedelta(seconds=2 ** attempts), MAX_BACKOFF)
+
+
+def complete(job):
+    Job.objects.filter(pk=job.pk, locked_by=job.locked_by).delete()
+
+
+def fail(job, error):
+    if job.attempts >= job.max_attempts:
+        update = {'status': Job.Status.FAILED}
+    else:
+        update = {'status': Job.Status.PENDING, 'run_after': timezone.now() + _backoff(job.attempts)}
+    Job.objects.filter(pk=job.pk, locked_by=job.locked_by).update(
+        last_error=error, locked_by='', locked_at=None, **update
+    )
+
+
+def execute(kind, payload, close_connections=False):
+    """
+    Run one job's handler; returns None on success or the formatted error.
+    Top-level so it can be sent to pool processes.
+    """
+    handler = _handlers.get(kind)
+    if handler is None:
+        return f'No handler registered for job kind {kind!r}'
+    try:
+        handler(**payload)
+    except Exception:
+        return traceback.format_exc()
+    finally:
+        # Pool processes are long lived; don't keep connections open between jobs
+        if close_connections:
+            connections.close_all()
+    return None
+
+
+class Worker:
+    """
+    Claims jobs in batches and runs them, either inline or across a pool
+    of processes (``processes=0`` runs everything in this process).
+    """
+
+    def __init__(self, processes=0, batch_size=20, kinds=None, poll_interval=1.0):
+        self.processes = processes
+        self.batch_size = batch_size
+        self.kinds = kinds
+        self.poll_interval = poll_interval
+        self.worker_id = uuid.uuid4().hex
+        self.pool = None
+
+    def start(self):
+        discover()
+        if self.processes:
+            self.pool = process_pool(self.processes, initializer='core.jobs.discover')
+
+    def stop(self):
+        if self.pool is not None:
+            self.pool.shutdown(wait=True)
+            self.pool = None
+
+    def run_batch(self):
+        jobs = claim(self.batch_size, kinds=self.kinds, worker_id=self.worker_id)
+        if self.pool is None:
+            results = [execute(job.kind, job.payload) for job in jobs]
+        else:
+            futures = [self.pool.submit(call, 'core.jobs.execute', job.kind, job.payload, True) for job in jobs]
+            results = []
+            broken = False
+            for future in futures:
+                try:
+                    results.append(future.result())
+                except BrokenProcessPool:
+                    # A child died (e.g. OOM); its jobs are retried on a fresh pool
+                    broken = True
+                    results.append(traceback.format_exc())
+            if broken:
+                self.stop()
+                self.start()
+
+        for job, error in zip(jobs, results):
+            if error is None:
+                complete(job)
+            else:
+                logger.warning('Job %s failed (attempt %s): %s', job, job.attempts, error)
+                fail(job, error)
+        return len(jobs)
+
+    def run(self, once=False):
+        self.start()
+        try:
+            while True:
+                processed = self.run_batch()
+                if not processed:
+                    if once:
+                        return
+                    time.sleep(self.poll_interval)
+        finally:
+            self.stop()
@@ -0,0 +1,31 @@
+from django.core.management.base import BaseCommand, CommandError
+from core.models import Tenant
+from core.rollup import check_tenant_stats, rebuild_tenant_stats
+
+
+class Command(BaseCommand):
+    help = 'Compare the TenantStats rollup against live aggregates'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--tenant', type=int, action='append', help='Only check this tenant (repeatable)')
+        parser.add_argument('--fix', action='store_true', help='Rebuild tenants whose rollup has drifted')
+
+    def handle(self, *args, **options):
+        tenants = Tenant.objects.order_by('pk')
+        if options['tenant']:
+            tenants = tenants.filter(pk__in=options['tenant'])
+
+        drifted = 0
+        for tenant_id in tenants.values_list('pk', flat=True).iterator():
+            mismatches = check_tenant_stats(tenant_id)
+            if not mismatches:
+                continue
+            drifted += 1
+            for field, stored, live in mismatches:
+                self.stdout.write(f'tenant {tenant_id}: {field} stored={stored} live={live}')
+            if options['fix']:
+                rebuild_tenant_stats(tenant_id)
+
+        if drifted and not options['fix']:
+            raise CommandError(f'{drifted} tenant(s) have a stale rollup')
+        self.stdout.write(self.style.SUCCESS(f'Checked stats, {drifted} tenant(s) drifted'))
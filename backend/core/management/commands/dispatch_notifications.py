@@ -0,0 +1,23 @@
+from django.core.management.base import BaseCommand
+from core.outbox import Dispatcher
+
+
+class Command(BaseCommand):
+    help = 'Send queued email and WhatsApp notifications from the outbox'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=100)
+        parser.add_argument('--poll-interval', type=float, default=1.0)
+        parser.add_argument('--once', action='store_true', help='Exit once the outbox is empty')
+
+    def handle(self, *args, **options):
+        dispatcher = Dispatcher(
+            batch_size=options['batch_size'],
+            poll_interval=options['poll_interval'],
+        )
+        self.stdout.write(f'Dispatcher {dispatcher.worker_id} started')
+        try:
+            dispatcher.run(once=options['once'])
+        except KeyboardInterrupt:
+            pass
+        self.stdout.write(self.style.SUCCESS('Dispatcher stopped'))
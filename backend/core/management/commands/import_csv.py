@@ -0,0 +1,55 @@
+import os
+
+from django.core.files import File
+from django.core.management.base import BaseCommand, CommandError
+
+from core.imports import rejected_report, run_import
+from core.models import ImportRun, Tenant
+
+
+class Command(BaseCommand):
+    help = 'Import clients or properties from a CSV file, or resume a failed import'
+
+    def add_arguments(self, parser):
+        parser.add_argument('kind', nargs='?', choices=['clients', 'properties'])
+        parser.add_argument('path', nargs='?', help='CSV file with a header row of field names')
+        parser.add_argument('--tenant', type=int, help='Tenant the rows belong to')
+        parser.add_argument('--dry-run', action='store_true', help='Validate only, insert nothing')
+        parser.add_argument('--chunk-size', type=int, default=500)
+        parser.add_argument('--resume', type=int, metavar='RUN_ID', help='Continue this import from its last committed chunk')
+        parser.add_argument('--report', help='Write the rejected rows to this CSV file')
+
+    def handle(self, *args, **options):
+        if options['resume']:
+            run = ImportRun.objects.filter(pk=options['resume']).first()
+            if run is None:
+                raise CommandError(f"Import {options['resume']} does not exist")
+        else:
+            if not options['kind'] or not options['path'] or not options['tenant']:
+                raise CommandError('kind, path and --tenant are required unless --resume is given')
+            if not Tenant.objects.filter(pk=options['tenant']).exists():
+                raise CommandError(f"Tenant {options['tenant']} does not exist")
+            run = ImportRun(
+                tenant_id=options['tenant'],
+                kind=options['kind'].upper(),
+                dry_run=options['dry_run'],
+                chunk_size=options['chunk_size'],
+            )
+            with open(options['path'], 'rb') as source:
+                run.file.save(os.path.basename(options['path']), File(source), save=True)
+
+        self.stdout.write(f'Import {run.pk}: {run.kind.lower()} from row {run.rows_processed + 1}')
+        try:
+            run = run_import(run.pk)
+        except Exception as e:
+            raise CommandError(f'Import {run.pk} failed ({e}); resume it with --resume {run.pk}')
+
+        if options['report']:
+            with open(options['report'], 'w', encoding='utf-8', newline='') as report:
+                for line in rejected_report(run):
+                    report.write(line)
+
+        verb = 'valid' if run.dry_run else 'imported'
+        self.stdout.write(self.style.SUCCESS(
+            f'Import {run.pk} done: {run.valid_count} {verb}, {run.rejected_count} rejected'
+        ))
@@ -0,0 +1,22 @@
+from django.core.management.base import BaseCommand
+from core.models import Tenant
+from core.revenue import rebuild_daily_revenue
+
+
+class Command(BaseCommand):
+    help = 'Rebuild the DailyRevenue table behind long-range revenue charts from the invoices'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--tenant', type=int, action='append', help='Only rebuild this tenant (repeatable)')
+
+    def handle(self, *args, **options):
+        tenants = Tenant.objects.order_by('pk')
+        if options['tenant']:
+            tenants = tenants.filter(pk__in=options['tenant'])
+
+        count = 0
+        for tenant_id in tenants.values_list('pk', flat=True).iterator():
+            rebuild_daily_revenue(tenant_id)
+            count += 1
+
+        self.stdout.write(self.style.SUCCESS(f'Rebuilt daily revenue for {count} tenant(s)'))
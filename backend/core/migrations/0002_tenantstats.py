@@ -0,0 +1,32 @@
+# Generated by Django 5.2.18 on 2026-10-18 09:12
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='TenantStats',
+            fields=[
+                ('tenant', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='stats', serialize=False, to='core.tenant')),
+                ('properties_count', models.PositiveIntegerField(default=0)),
+                ('clients_count', models.PositiveIntegerField(default=0)),
+                ('active_contracts_count', models.PositiveIntegerField(default=0)),
+                ('total_revenue', models.DecimalField(decimal_places=2, default=0, max_digits=14)),
+                ('pending_amount', models.DecimalField(decimal_places=2, default=0, max_digits=14)),
+                ('overdue_amount', models.DecimalField(decimal_places=2, default=0, max_digits=14)),
+                ('monthly_revenue', models.JSONField(default=dict, help_text='Paid revenue per YYYY-MM')),
+                ('property_distribution', models.JSONField(default=dict, help_text='Property count per type')),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+            ],
+            options={
+                'verbose_name_plural': 'tenant stats',
+            },
+        ),
+    ]
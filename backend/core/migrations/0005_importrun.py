@@ -0,0 +1,49 @@
+# Generated by Django 5.2.18 on 2026-10-18 09:44
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0004_notification'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ImportRun',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('kind', models.CharField(choices=[('CLIENTS', 'Clients'), ('PROPERTIES', 'Properties')], max_length=20)),
+                ('file', models.FileField(upload_to='imports/')),
+                ('dry_run', models.BooleanField(default=False, help_text='Validate only, insert nothing')),
+                ('chunk_size', models.PositiveIntegerField(default=500)),
+                ('status', models.CharField(choices=[('PENDING', 'Pending'), ('RUNNING', 'Running'), ('DONE', 'Done'), ('FAILED', 'Failed')], default='PENDING', max_length=20)),
+                ('rows_processed', models.PositiveIntegerField(default=0, help_text='Rows in committed chunks; a resumed run skips them')),
+                ('valid_count', models.PositiveIntegerField(default=0)),
+                ('rejected_count', models.PositiveIntegerField(default=0)),
+                ('last_error', models.TextField(blank=True)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+                ('tenant', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='import_runs', to='core.tenant')),
+            ],
+            options={
+                'ordering': ['-created_at', '-id'],
+            },
+        ),
+        migrations.CreateModel(
+            name='ImportRejectedRow',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('row_number', models.PositiveIntegerField(help_text='1-based data row, not counting the header')),
+                ('data', models.JSONField(default=dict)),
+                ('errors', models.JSONField(default=dict)),
+                ('run', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='rejected_rows', to='core.importrun')),
+            ],
+            options={
+                'ordering': ['run', 'row_number'],
+                'indexes': [models.Index(fields=['run', 'row_number'], name='import_rejected_run_row_idx')],
+            },
+        ),
+    ]
@@ -0,0 +1,59 @@
+# Generated by Django 5.2.18 on 2026-10-18 10:20
+
+import django.db.models.deletion
+from django.db import migrations, models
+from django.db.models import Count, F, Sum, Value
+from django.db.models.functions import Coalesce
+
+
+def backfill(apps, schema_editor):
+    # Same rows core.revenue.rebuild_daily_revenue writes, for existing invoices
+    Invoice = apps.get_model('finance', 'Invoice')
+    DailyRevenue = apps.get_model('core', 'DailyRevenue')
+    for basis, date_field in (('paid', 'paid_date'), ('due', 'due_date')):
+        invoices = Invoice.objects.exclude(**{f'{date_field}__isnull': True})
+        if basis == 'paid':
+            invoices = invoices.filter(status='PAID')
+        rows = invoices.annotate(
+            day=F(date_field),
+            type=Coalesce('contract__property__property_type', Value('')),
+        ).values('tenant_id', 'day', 'status', 'type').annotate(amount=Sum('total_amount'), count=Count('pk')).order_by()
+        DailyRevenue.objects.bulk_create(
+            (
+                DailyRevenue(
+                    tenant_id=row['tenant_id'], basis=basis, day=row['day'], status=row['status'],
+                    property_type=row['type'], amount=row['amount'], invoices=row['count'],
+                )
+                for row in rows.iterator()
+            ),
+            batch_size=1000,
+        )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0007_changeversion'),
+        ('finance', '0008_revenue_indexes'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='DailyRevenue',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('basis', models.CharField(choices=[('paid', 'Paid on'), ('due', 'Due on')], max_length=10)),
+                ('day', models.DateField()),
+                ('status', models.CharField(max_length=20)),
+                ('property_type', models.CharField(blank=True, max_length=20)),
+                ('amount', models.DecimalField(decimal_places=2, max_digits=14)),
+                ('invoices', models.PositiveIntegerField()),
+                ('tenant', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='daily_revenue', to='core.tenant')),
+            ],
+            options={
+                'verbose_name_plural': 'daily revenue',
+                'constraints': [models.UniqueConstraint(fields=('tenant', 'basis', 'day', 'status', 'property_type'), name='unique_daily_revenue')],
+            },
+        ),
+        migrations.RunPython(backfill, migrations.RunPython.noop),
+    ]
@@ -1,5 +1,6 @@
 from django.db import models
 from django.contrib.auth.models import AbstractUser
+from django.utils import timezone
 from django.utils.translation import gettext_lazy as _
 
 class Tenant(models.Model):
@@ -19,8 +20,224 @@ class User(AbstractUser):
         EMPLOYEE = 'EMPLOYEE', _('Employee')
         CLIENT = 'CLIENT', _('Client')
 
+    # Fields copied into JWT claims (core.tokens); changing one revokes the
+    # user's tokens by bumping token_version
+    CLAIM_FIELDS = ('password', 'role', 'tenant_id', 'is_active', 'is_staff', 'is_superuser')
+
     role = models.CharField(max_length=20, choices=Role.choices, default=Role.CLIENT)
     tenant = models.ForeignKey(Tenant, on_delete=models.CASCADE, related_name='users', null=True, blank=True)
+    token_version = models.PositiveIntegerField(default=0, editable=False)
+
+    def save(self, *args, **kwargs):
+        update_fields = kwargs.get('update_fields')
+        checked = self.CLAIM_FIELDS if update_fields is None else [
+            field for field in self.CLAIM_FIELDS if field in update_fields or field.removesuffix('_id') in update_fields
+        ]
+        if checked and not self._state.adding:
+            previous = User.objects.filter(pk=self.pk).values(*checked).first()
+            if previous is not None and any(previous[field] != getattr(self, field) for field in checked):
+                self.token_version += 1
+                if update_fields is not None:
+                    kwargs['update_fields'] = {*update_fields, 'token_version'}
+        super().save(*args, **kwargs)
+
+    def revoke_tokens(self):
+        """
+        Invalidate every token issued to the user so far
+        """
+        self.token_version += 1
+        self.save(update_fields=['token_version'])
 
     def __str__(self):
         return f"{self.username} ({self.get_role_display()})"
+
+
+class TenantStats(models.Model):
+    """
+    Per-tenant dashboard rollup, maintained incrementally by core.rollup
+    """
+    tenant = models.OneToOneField(Tenant, on_delete=models.CASCADE, primary_key=True, related_name='stats')
+    properties_count = models.PositiveIntegerField(default=0)
+    clients_count = models.PositiveIntegerField(default=0)
+    active_contracts_count = models.PositiveIntegerField(default=0)
+    total_revenue = models.DecimalField(max_digits=14, decimal_places=2, default=0)
+    pending_amount = models.DecimalField(max_digits=14, decimal_places=2, default=0)
+    overdue_amount = models.DecimalField(max_digits=14, decimal_places=2, default=0)
+    monthly_revenue = models.JSONField(default=dict, help_text="Paid revenue per YYYY-MM")
+    property_distribution = models.JSONField(default=dict, help_text="Property count per type")
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        verbose_name_plural = 'tenant stats'
+
+    def __str__(self):
+        return f"Stats for tenant {self.tenant_id}"
+
+
+class Job(models.Model):
+    """
+    Background job, claimed and run by the run_jobs management command
+    """
+    class Status(models.TextChoices):
+        PENDING = 'PENDING', _('Pending')
+        RUNNING = 'RUNNING', _('Running')
+        FAILED = 'FAILED', _('Failed')
+
+    kind = models.CharField(max_length=100)
+    key = models.CharField(max_length=200, blank=True, db_index=True, help_text="Deduplication key")
+    payload = models.JSONField(default=dict)
+    status = models.CharField(max_length=20, choices=Status.choices, default=Status.PENDING)
+    attempts = models.PositiveIntegerField(default=0)
+    max_attempts = models.PositiveIntegerField(default=5)
+    run_after = models.DateTimeField(default=timezone.now)
+    locked_by = models.CharField(max_length=64, blank=True)
+    locked_at = models.DateTimeField(null=True, blank=True)
+    last_error = models.TextField(blank=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        ordering = ['run_after', 'id']
+        indexes = [
+            models.Index(fields=['status', 'run_after'], name='job_status_run_after_idx'),
+        ]
+
+    def __str__(self):
+        return f"{self.kind} #{self.pk} ({self.status})"
+
+
+class Notification(models.Model):
+    """
+    Outgoing email / WhatsApp message. Rows are written in the same
+    transaction as the record they announce and sent later by the
+    dispatch_notifications command.
+    """
+    class Channel(models.TextChoices):
+        EMAIL = 'EMAIL', _('Email')
+        WHATSAPP = 'WHATSAPP', _('WhatsApp')
+
+    class Status(models.TextChoices):
+        PENDING = 'PENDING', _('Pending')
+        SENDING = 'SENDING', _('Sending')
+        SENT = 'SENT', _('Sent')
+        FAILED = 'FAILED', _('Failed')
+
+    tenant = models.ForeignKey(Tenant, on_delete=models.CASCADE, related_name='notifications', null=True, blank=True)
+    channel = models.CharField(max_length=20, choices=Channel.choices)
+    recipient = models.CharField(max_length=255)
+    subject = models.CharField(max_length=255, blank=True)
+    body = models.TextField()
+    status = models.CharField(max_length=20, choices=Status.choices, default=Status.PENDING)
+    attempts = models.PositiveIntegerField(default=0)
+    max_attempts = models.PositiveIntegerField(default=5)
+    run_after = models.DateTimeField(default=timezone.now)
+    locked_by = models.CharField(max_length=64, blank=True)
+    locked_at = models.DateTimeField(null=True, blank=True)
+    last_error = models.TextField(blank=True)
+    external_id = models.CharField(max_length=100, blank=True, help_text="Provider message id")
+    sent_at = models.DateTimeField(null=True, blank=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        ordering = ['run_after', 'id']
+        indexes = [
+            models.Index(fields=['status', 'run_after'], name='notif_status_run_after_idx'),
+        ]
+
+    def __str__(self):
+        return f"{self.channel} to {self.recipient} ({self.status})"
+
+
+class ImportRun(models.Model):
+    """
+    CSV import of clients or properties, processed chunk by chunk by the
+    run_import job or the import_csv command
+    """
+    class Kind(models.TextChoices):
+        CLIENTS = 'CLIENTS', _('Clients')
+        PROPERTIES = 'PROPERTIES', _('Properties')
+
+    class Status(models.TextChoices):
+        PENDING = 'PENDING', _('Pending')
+        RUNNING = 'RUNNING', _('Running')
+        DONE = 'DONE', _('Done')
+        FAILED = 'FAILED', _('Failed')
+
+    tenant = models.ForeignKey(Tenant, on_delete=models.CASCADE, related_name='import_runs')
+    kind = models.CharField(max_length=20, choices=Kind.choices)
+    file = models.FileField(upload_to='imports/')
+    dry_run = models.BooleanField(default=False, help_text="Validate only, insert nothing")
+    chunk_size = models.PositiveIntegerField(default=500)
+    status = models.CharField(max_length=20, choices=Status.choices, default=Status.PENDING)
+    rows_processed = models.PositiveIntegerField(default=0, help_text="Rows in committed chunks; a resumed run skips them")
+    valid_count = models.PositiveIntegerField(default=0)
+    rejected_count = models.PositiveIntegerField(default=0)
+    last_error = models.TextField(blank=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        ordering = ['-created_at', '-id']
+
+    def __str__(self):
+        return f"{self.kind} import #{self.pk} ({self.status})"
+
+
+class ImportRejectedRow(models.Model):
+    run = models.ForeignKey(ImportRun, on_delete=models.CASCADE, related_name='rejected_rows')
+    row_number = models.PositiveIntegerField(help_text="1-based data row, not counting the header")
+    data = models.JSONField(default=dict)
+    errors = models.JSONField(default=dict)
+
+    class Meta:
+        ordering = ['run', 'row_number']
+        indexes = [
+            models.Index(fields=['run', 'row_number'], name='import_rejected_run_row_idx'),
+        ]
+
+
+class ChangeVersion(models.Model):
+    """
+    Counter bumped on every write to a tenant's rows of ``model``
+    (app_label.model_name); see core.versions
+    """
+    # No database constraint: deleting a tenant cascades to rows whose
+    # post_delete signals bump versions again, after these are gone
+    tenant = models.ForeignKey(Tenant, on_delete=models.CASCADE, related_name='change_versions', db_constraint=False)
+    model = models.CharField(max_length=100)
+    version = models.PositiveBigIntegerField(default=0)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=['tenant', 'model'], name='unique_change_version'),
+        ]
+
+    def __str__(self):
+        return f"{self.model} v{self.version} (tenant {self.tenant_id})"
+
+
+class DailyRevenue(models.Model):
+    """
+    Invoice totals per tenant, day, status and property type, kept in
+    step with the invoices by core.revenue for long-range charts
+    """
+    class Basis(models.TextChoices):
+        PAID = 'paid', 'Paid on'
+        DUE = 'due', 'Due on'
+
+    tenant = models.ForeignKey(Tenant, on_delete=models.CASCADE, related_name='daily_revenue')
+    basis = models.CharField(max_length=10, choices=Basis.choices)
+    day = models.DateField()
+    status = models.CharField(max_length=20)
+    # Blank for invoices without a contract or property
+    property_type = models.CharField(max_length=20, blank=True)
+    amount = models.DecimalField(max_digits=14, decimal_places=2)
+    invoices = models.PositiveIntegerField()
+
+    class Meta:
+        verbose_name_plural = 'daily revenue'
+        constraints = [
+            models.UniqueConstraint(fields=['tenant', 'basis', 'day', 'status', 'property_type'], name='unique_daily_revenue'),
+        ]
+
+    def __str__(self):
+        return f"{self.day} {self.basis} {self.status} {self.property_type or '-'}: {self.amount}"
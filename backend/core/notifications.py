@@ -1,20 +1,11 @@
-from django.core.mail import send_mail
-from django.conf import settings
-from twilio.rest import Client
-import os
+from .models import Notification
+from .outbox import get_backend
 
 
-def send_invoice_email(invoice):
+def invoice_email(invoice, client):
     """
-    Send email notification when invoice is created
+    Subject and body of the email announcing a new invoice
     """
-    if not invoice.contract or not invoice.contract.client:
-        return
-    
-    client = invoice.contract.client
-    if not client.email:
-        return
-    
     subject = f'فاتورة جديدة #{invoice.invoice_number} - عقاريو'
     
     message = f"""
@@ -34,32 +25,13 @@ def send_invoice_email(invoice):
     شكراً لتعاملكم معنا،
     فريق عقاريو
     """
-    
-    try:
-        send_mail(
-            subject,
-            message,
-            settings.DEFAULT_FROM_EMAIL,
-            [client.email],
-            fail_silently=False,
-        )
-        return True
-    except Exception as e:
-        print(f"Error sending email: {e}")
-        return False
-
-
-def send_contract_email(contract):
+    return subject, message
+
+
+def contract_email(contract, client):
     """
-    Send email notification when contract is created
+    Subject and body of the email announcing a new contract
     """
-    if not contract.client:
-        return
-    
-    client = contract.client
-    if not client.email:
-        return
-    
     subject = f'عقد جديد - عقاريو'
     
     message = f"""
@@ -79,40 +51,15 @@ def send_contract_email(contract):
     شكراً لتعاملكم معنا،
     فريق عقاريو
     """
-    
-    try:
-        send_mail(
-            subject,
-            message,
-            settings.DEFAULT_FROM_EMAIL,
-            [client.email],
-            fail_silently=False,
-        )
-        return True
-    except Exception as e:
-        print(f"Error sending email: {e}")
-        return False
-
-
-def send_whatsapp_notification(phone_number, message_type, details):
+    return subject, message
+
+
+def whatsapp_message(message_type, details):
     """
-    Send WhatsApp notification using Twilio
-    Note: Requires Twilio account and WhatsApp Business API setup
+    Body of a WhatsApp notification
     """
-    # Twilio credentials (should be in settings/environment variables)
-    account_sid = getattr(settings, 'TWILIO_ACCOUNT_SID', None)
-    auth_token = getattr(settings, 'TWILIO_AUTH_TOKEN', None)
-    whatsapp_from = getattr(settings, 'TWILIO_WHATSAPP_FROM', None)
-    
-    if not all([account_sid, auth_token, whatsapp_from]):
-        print("WhatsApp notification skipped: Twilio credentials not configured")
-        return False
-    
-    try:
-        client = Client(account_sid, auth_token)
-        
-        if message_type == 'invoice':
-            message_body = f"""
+    if message_type == 'invoice':
+        message_body = f"""
 📄 *تم إصدار فاتورة جديدة عبر عقاريو*
 
 المبلغ: {details.get('amount', 0)} ريال
@@ -122,8 +69,8 @@ def send_whatsapp_notification(phone_number, message_type, details):
 
 شكراً لتعاملكم معنا 🙏
             """
-        elif message_type == 'contract':
-            message_body = f"""
+    elif message_type == 'contract':
+        message_body = f"""
 📋 *تم إنشاء عقد جديد عبر عقاريو*
 
 العقار: {details.get('property', '-')}
@@ -133,60 +80,72 @@ def send_whatsapp_notification(phone_number, message_type, details):
 
 شكراً لتعاملكم معنا 🙏
             """
-        else:
-            message_body = "إشعار جديد من عقاريو"
-        
-        # Format phone number for WhatsApp (must include country code)
-        if not phone_number.startswith('whatsapp:'):
-            phone_number = f'whatsapp:+966{phone_number.lstrip("0")}'
-        
-        message = client.messages.create(
-            from_=whatsapp_from,
-            body=message_body,
-            to=phone_number
-        )
-        
-        print(f"WhatsApp message sent: {message.sid}")
-        return True
-        
-    except Exception as e:
-        print(f"Error sending WhatsApp: {e}")
-        return False
-
-
-def send_invoice_whatsapp(invoice):
+    else:
+        message_body = "إشعار جديد من عقاريو"
+    return message_body
+
+
+def whatsapp_number(phone_number):
     """
-    Send WhatsApp notification for new invoice
+    Format phone number for WhatsApp (must include country code)
+    """
+    if not phone_number.startswith('whatsapp:'):
+        phone_number = f'whatsapp:+966{phone_number.lstrip("0")}'
+    return phone_number
+
+
+def _queue(tenant_id, client, email, whatsapp):
+    notifications = []
+    if client.email:
+        subject, message = email
+        notifications.append(Notification(
+            tenant_id=tenant_id, channel=Notification.Channel.EMAIL,
+            recipient=client.email, subject=subject, body=message,
+        ))
+    # Same as before the outbox: no WhatsApp without a configured provider
+    if client.phone and get_backend(Notification.Channel.WHATSAPP).is_configured():
+        notifications.append(Notification(
+            tenant_id=tenant_id, channel=Notification.Channel.WHATSAPP,
+            recipient=whatsapp_number(client.phone), body=whatsapp,
+        ))
+    return Notification.objects.bulk_create(notifications)
+
+
+def queue_invoice_notifications(invoice):
+    """
+    Queue the email and WhatsApp notifications for a new invoice.
+    Call inside the transaction that creates it.
     """
     if not invoice.contract or not invoice.contract.client:
-        return False
+        return []
     
     client = invoice.contract.client
-    if not client.phone:
-        return False
-    
     details = {
         'invoice_number': invoice.invoice_number,
         'amount': float(invoice.total_amount),
     }
-    
-    return send_whatsapp_notification(client.phone, 'invoice', details)
+    return _queue(
+        invoice.tenant_id, client,
+        email=invoice_email(invoice, client),
+        whatsapp=whatsapp_message('invoice', details),
+    )
 
 
-def send_contract_whatsapp(contract):
+def queue_contract_notifications(contract):
     """
-    Send WhatsApp notification for new contract
+    Queue the email and WhatsApp notifications for a new contract.
+    Call inside the transaction that creates it.
     """
     if not contract.client:
-        return False
+        return []
     
     client = contract.client
-    if not client.phone:
-        return False
-    
     details = {
         'property': contract.property.title if contract.property else '-',
         'amount': float(contract.total_amount),
     }
-    
-    return send_whatsapp_notification(client.phone, 'contract', details)
+    return _queue(
+        contract.tenant_id, client,
+        email=contract_email(contract, client),
+        whatsapp=whatsapp_message('contract', details),
+    )
@@ -0,0 +1,271 @@
+import logging
+import math
+import time
+import uuid
+from collections import defaultdict
+from concurrent.futures import ThreadPoolExecutor
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.mail import EmailMessage, get_connection
+from django.db.models import F, Q
+from django.utils import timezone
+from django.utils.module_loading import import_string
+
+from .models import Notification
+
+logger = logging.getLogger(__name__)
+
+# Notifications left SENDING longer than this belong to a dead dispatcher
+VISIBILITY_TIMEOUT = timedelta(minutes=10)
+
+MAX_BACKOFF = timedelta(hours=1)
+
+
+class EmailBackend:
+    """
+    Sends a batch over a single connection of Django's EMAIL_BACKEND,
+    instead of one SMTP handshake per message
+    """
+
+    def is_configured(self):
+        return True
+
+    def send_batch(self, notifications):
+        results = []
+        connection = get_connection()
+        connection.open()
+        try:
+            for notification in notifications:
+                message = EmailMessage(
+                    notification.subject,
+                    notification.body,
+                    settings.DEFAULT_FROM_EMAIL,
+                    [notification.recipient],
+                    connection=connection,
+                )
+                try:
+                    message.send()
+                    results.append(('', None))
+                except Exception as e:
+                    results.append(('', str(e)))
+                    # The SMTP session may be unusable after an error; if
+                    # reconnecting fails too, the next send reports it
+                    connection.close()
+                    try:
+                        connection.open()
+                    except Exception:
+                        pass
+        finally:
+            connection.close()
+        return results
+
+
+class TwilioWhatsAppBackend:
+    """
+    Sends WhatsApp messages through one Twilio client per process, whose
+    HTTP session keeps connections to the API open between messages
+    """
+    _client = None
+
+    def is_configured(self):
+        return all([
+            getattr(settings, 'TWILIO_ACCOUNT_SID', None),
+            getattr(settings, 'TWILIO_AUTH_TOKEN', None),
+            getattr(settings, 'TWILIO_WHATSAPP_FROM', None),
+        ])
+
+    def client(self):
+        if TwilioWhatsAppBackend._client is None:
+            from twilio.http.http_client import TwilioHttpClient
+            from twilio.rest import Client
+
+            TwilioWhatsAppBackend._client = Client(
+                settings.TWILIO_ACCOUNT_SID,
+                settings.TWILIO_AUTH_TOKEN,
+                http_client=TwilioHttpClient(pool_connections=True, timeout=10),
+            )
+        return TwilioWhatsAppBackend._client
+
+    def send_batch(self, notifications):
+        if not self.is_configured():
+            return [('', 'Twilio credentials not configured')] * len(notifications)
+        client = self.client()
+        results = []
+        for notification in notifications:
+            try:
+                message = client.messages.create(
+                    from_=settings.TWILIO_WHATSAPP_FROM,
+                    body=notification.body,
+                    to=notification.recipient,
+                )
+                results.append((message.sid, None))
+            except Exception as e:
+                results.append(('', str(e)))
+        return results
+
+
+class LocmemBackend:
+    """
+    Keeps messages in LocmemBackend.sent instead of sending them, for tests
+    (like django.core.mail.outbox for email)
+    """
+    sent = []
+
+    def is_configured(self):
+        return True
+
+    def send_batch(self, notifications):
+        LocmemBackend.sent.extend(notifications)
+        return [(f'local-{notification.pk}', None) for notification in notifications]
+
+
+class ConsoleBackend(LocmemBackend):
+    """
+    Prints messages instead of sending them, for local development
+    """
+
+    def send_batch(self, notifications):
+        for notification in notifications:
+            print(f"[{notification.channel}] to {notification.recipient}: {notification.subject}\n{notification.body}")
+        return super().send_batch(notifications)
+
+
+_backends = {}
+
+
+def get_backend(channel):
+    """
+    Backend instance for ``channel``, as configured in NOTIFICATION_BACKENDS
+    """
+    path = settings.NOTIFICATION_BACKENDS[channel]
+    if path not in _backends:
+        _backends[path] = import_string(path)()
+    return _backends[path]
+
+
+def claim(batch_size, worker_id=None):
+    """
+    Atomically mark up to ``batch_size`` due notifications as SENDING for
+    this dispatcher; same conditional UPDATE as core.jobs.claim.
+    """
+    worker_id = worker_id or uuid.uuid4().hex
+    now = timezone.now()
+    claimable = (
+        Q(status=Notification.Status.PENDING, run_after__lte=now)
+        | Q(status=Notification.Status.SENDING, locked_at__lt=now - VISIBILITY_TIMEOUT)
+    )
+    ids = list(
+        Notification.objects.filter(claimable).order_by('run_after', 'id').values_list('id', flat=True)[:batch_size]
+    )
+    if not ids:
+        return []
+
+    Notification.objects.filter(claimable, id__in=ids).update(
+        status=Notification.Status.SENDING,
+        locked_by=worker_id,
+        locked_at=now,
+        attempts=F('attempts') + 1,
+    )
+    return list(Notification.objects.filter(id__in=ids, locked_by=worker_id, locked_at=now))
+
+
+def _backoff(attempts):
+    return min(timedelta(seconds=2 ** attempts), MAX_BACKOFF)
+
+
+def mark_sent(notification, external_id):
+    Notification.objects.filter(pk=notification.pk, locked_by=notification.locked_by).update(
+        status=Notification.Status.SENT,
+        external_id=external_id or '',
+        sent_at=timezone.now(),
+        locked_by='',
+        locked_at=None,
+        last_error='',
+    )
+
+
+def mark_failed(notification, error):
+    if notification.attempts >= notification.max_attempts:
+        update = {'status': Notification.Status.FAILED}
+    else:
+        update = {
+            'status': Notification.Status.PENDING,
+            'run_after': timezone.now() + _backoff(notification.attempts),
+        }
+    Notification.objects.filter(pk=notification.pk, locked_by=notification.locked_by).update(
+        last_error=error, locked_by='', locked_at=None, **update
+    )
+
+
+def _send_slice(backend, notifications):
+    try:
+        return backend.send_batch(notifications)
+    except Exception as e:
+        # e.g. the SMTP server refused the connection
+        return [('', str(e))] * len(notifications)
+
+
+class Dispatcher:
+    """
+    Drains the notification outbox in batches. Each channel gets its own
+    thread pool sized by NOTIFICATION_CONCURRENCY, and every thread sends
+    its share of the batch through one backend call (one SMTP connection,
+    one pooled HTTP session). Only the main thread touches the database.
+    """
+
+    def __init__(self, batch_size=100, poll_interval=1.0):
+        self.batch_size = batch_size
+        self.poll_interval = poll_interval
+        self.worker_id = uuid.uuid4().hex
+        self.pools = {}
+
+    def concurrency(self, channel):
+        return max(1, settings.NOTIFICATION_CONCURRENCY.get(channel, 1))
+
+    def pool(self, channel):
+        if channel not in self.pools:
+            self.pools[channel] = ThreadPoolExecutor(
+                max_workers=self.concurrency(channel),
+                thread_name_prefix=f'notify-{channel.lower()}',
+            )
+        return self.pools[channel]
+
+    def stop(self):
+        for pool in self.pools.values():
+            pool.shutdown(wait=True)
+        self.pools = {}
+
+    def run_batch(self):
+        notifications = claim(self.batch_size, worker_id=self.worker_id)
+        by_channel = defaultdict(list)
+        for notification in notifications:
+            by_channel[notification.channel].append(notification)
+
+        submitted = []
+        for channel, items in by_channel.items():
+            backend = get_backend(channel)
+            size = math.ceil(len(items) / self.concurrency(channel))
+            for start in range(0, len(items), size):
+                chunk = items[start:start + size]
+                submitted.append((chunk, self.pool(channel).submit(_send_slice, backend, chunk)))
+
+        for chunk, future in submitted:
+            for notification, (external_id, error) in zip(chunk, future.result()):
+                if error is None:
+                    mark_sent(notification, external_id)
+                else:
+                    logger.warning('Notification %s failed (attempt %s): %s', notification.pk, notification.attempts, error)
+                    mark_failed(notification, error)
+        return len(notifications)
+
+    def run(self, once=False):
+        try:
+            while True:
+                processed = self.run_batch()
+                if not processed:
+                    if once:
+                        return
+                    time.sleep(self.poll_interval)
+        finally:
+            self.stop()
@@ -0,0 +1,68 @@
+from rest_framework.pagination import BasePagination, CursorPagination, PageNumberPagination
+
+
+# Name of the relevance annotation added by full-text search
+RANK_ANNOTATION = 'search_rank'
+
+
+def is_ranked(queryset):
+    """
+    Relevance scores are floats computed per query and can't serve as a
+    cursor position, so querysets ordered by them use page numbers.
+    """
+    order_by = queryset.query.order_by if hasattr(queryset, 'query') else ()
+    return bool(order_by) and str(order_by[0]).lstrip('-') == RANK_ANNOTATION
+
+
+class TenantCursorPagination(CursorPagination):
+    """
+    Keyset pagination over (created_at, id), backed by the
+    (tenant, created_at, id) index on every tenant-scoped model, so
+    page N costs the same as page 1.
+    """
+    ordering = ('-created_at', '-id')
+    page_size = 50
+    page_size_query_param = 'page_size'
+    max_page_size = 200
+
+
+class AdminPageNumberPagination(PageNumberPagination):
+    page_size = 50
+    page_size_query_param = 'page_size'
+    max_page_size = 200
+
+
+class TenantPagination(BasePagination):
+    """
+    Cursor pagination by default; passing ?page=N switches to page-number
+    pagination for the admin UI, which needs totals and random access.
+    Relevance-ranked search results always use page numbers.
+    """
+    page_query_param = 'page'
+
+    def __init__(self):
+        self.delegate = TenantCursorPagination()
+
+    def paginate_queryset(self, queryset, request, view=None):
+        if self.page_query_param in request.query_params or is_ranked(queryset):
+            self.delegate = AdminPageNumberPagination()
+        return self.delegate.paginate_queryset(queryset, request, view=view)
+
+    def get_paginated_response(self, data):
+        return self.delegate.get_paginated_response(data)
+
+    def get_paginated_response_schema(self, schema):
+        return self.delegate.get_paginated_response_schema(schema)
+
+    def get_schema_operation_parameters(self, view):
+        return (
+            TenantCursorPagination().get_schema_operation_parameters(view)
+            + AdminPageNumberPagination().get_schema_operation_parameters(view)[:1]
+        )
+
+    def to_html(self):
+        return self.delegate.to_html()
+
+    @property
+    def display_page_controls(self):
+        return getattr(self.delegate, 'display_page_controls', False)
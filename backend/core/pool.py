@@ -0,0 +1,36 @@
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor
+
+from django.utils.module_loading import import_string
+
+# Nothing in this module may import models at import time: spawned children
+# unpickle references to it before Django has been set up.
+
+
+def _init_process(initializer):
+    import django
+    django.setup()
+    if initializer:
+        import_string(initializer)()
+
+
+def call(path, *args):
+    """
+    Run the function at dotted ``path`` inside a pool process. Submitting
+    it by path means the target's module is only imported after setup.
+    """
+    return import_string(path)(*args)
+
+
+def process_pool(processes, initializer=None):
+    """
+    Process pool whose children set up Django, then run the function at
+    dotted path ``initializer``. Uses 'spawn' so children never inherit
+    the parent's database sockets.
+    """
+    return ProcessPoolExecutor(
+        max_workers=processes,
+        mp_context=multiprocessing.get_context('spawn'),
+        initializer=_init_process,
+        initargs=(initializer,),
+    )
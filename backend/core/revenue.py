@@ -0,0 +1,268 @@
+"""
+Revenue time series for the dashboard.
+
+A series sums invoice totals per day, week, month or quarter between two
+dates. The ``paid`` basis counts PAID invoices on their paid date. The
+``due`` basis counts every invoice on its due date, so splitting it by
+status shows what was collected, pending and overdue. Periods without
+invoices are filled with zeros.
+
+Ranges of up to DIRECT_MAX_DAYS are read from the invoices. Longer ranges
+come from DailyRevenue, which holds one row per tenant, day, status and
+property type. The signal receivers below keep it in step with the
+invoices by re-aggregating the days a write touches.
+"""
+from collections import defaultdict
+from datetime import date, timedelta
+from decimal import Decimal
+
+from django.db import transaction
+from django.db.models import Count, F, Q, Sum, Value
+from django.db.models.functions import Coalesce, TruncDay, TruncMonth, TruncQuarter, TruncWeek
+
+from contracts.models import Contract
+from finance.models import Invoice
+from properties.models import Property
+from .models import DailyRevenue
+
+GRANULARITIES = {
+    'day': TruncDay,
+    'week': TruncWeek,
+    'month': TruncMonth,
+    'quarter': TruncQuarter,
+}
+
+# Longer ranges are read from DailyRevenue
+DIRECT_MAX_DAYS = 120
+
+# split -> column on DailyRevenue, and the same value reached from Invoice
+SPLITS = {
+    'status': ('status', 'status'),
+    'property_type': ('property_type', 'contract__property__property_type'),
+}
+
+DATE_FIELDS = {
+    DailyRevenue.Basis.PAID: 'paid_date',
+    DailyRevenue.Basis.DUE: 'due_date',
+}
+
+# What a change to these columns moves between days or series
+TRACKED_FIELDS = {
+    Invoice: ('tenant_id', 'status', 'total_amount', 'paid_date', 'due_date', 'contract_id'),
+    Contract: ('property_id',),
+    Property: ('property_type',),
+}
+
+
+def _invoices(basis, tenant_id):
+    invoices = Invoice.objects.filter(tenant_id=tenant_id)
+    if basis == DailyRevenue.Basis.PAID:
+        invoices = invoices.filter(status='PAID', paid_date__isnull=False)
+    return invoices
+
+
+def period_start(day, granularity):
+    if granularity == 'week':
+        return day - timedelta(days=day.weekday())
+    if granularity == 'month':
+        return day.replace(day=1)
+    if granularity == 'quarter':
+        return day.replace(month=(day.month - 1) // 3 * 3 + 1, day=1)
+    return day
+
+
+def periods(start, end, granularity):
+    """
+    Start of every period from the one holding ``start`` to the one
+    holding ``end``
+    """
+    current = period_start(start, granularity)
+    while current <= end:
+        yield current
+        if granularity == 'day':
+            current += timedelta(days=1)
+        elif granularity == 'week':
+            current += timedelta(weeks=1)
+        else:
+            step = 3 if granularity == 'quarter' else 1
+            month = current.month - 1 + step
+            current = date(current.year + month // 12, month % 12 + 1, 1)
+
+
+def _rows(tenant_id, start, end, granularity, basis, split):
+    """
+    (period, split value, amount, invoice count) per non-empty period
+    """
+    trunc = GRANULARITIES[granularity]
+    if (end - start).days + 1 > DIRECT_MAX_DAYS:
+        queryset = DailyRevenue.objects.filter(tenant_id=tenant_id, basis=basis, day__range=(start, end))
+        date_field, amount, count = 'day', Sum('amount'), Sum('invoices')
+        split_field = SPLITS[split][0] if split else None
+    else:
+        date_field = DATE_FIELDS[basis]
+        queryset = _invoices(basis, tenant_id).filter(**{f'{date_field}__range': (start, end)})
+        amount, count = Sum('total_amount'), Count('pk')
+        split_field = SPLITS[split][1] if split else None
+
+    values = {'period': trunc(date_field)}
+    if split_field:
+        values['key'] = Coalesce(F(split_field), Value(''))
+    rows = queryset.annotate(**values).values(*values).annotate(amount=amount, count=count).order_by()
+    for row in rows:
+        period = row['period']
+        # Trunc of a DateField gives a date on every backend, but be safe
+        # with drivers that hand back datetimes
+        yield (period.date() if hasattr(period, 'date') else period), row.get('key'), row['amount'], row['count']
+
+
+def revenue_series(tenant_id, start, end, granularity='month', basis=DailyRevenue.Basis.PAID, split=None):
+    """
+    {'periods': [...], 'series': [{'key', 'amounts', 'invoices'}], 'total'}
+    for ``tenant_id`` between ``start`` and ``end``, both included. Without
+    ``split`` there is one series with key None.
+    """
+    starts = list(periods(start, end, granularity))
+    index = {period: position for position, period in enumerate(starts)}
+    amounts = defaultdict(lambda: [Decimal('0.00')] * len(starts))
+    counts = defaultdict(lambda: [0] * len(starts))
+    for period, key, amount, count in _rows(tenant_id, start, end, granularity, basis, split):
+        amounts[key][index[period]] += amount or 0
+        counts[key][index[period]] += count or 0
+
+    keys = sorted(amounts) if split else [None]
+    series = [{'key': key, 'amounts': amounts[key], 'invoices': counts[key]} for key in keys]
+    return {
+        'periods': starts,
+        'series': series,
+        'total': sum((sum(row['amounts']) for row in series), Decimal('0.00')),
+    }
+
+
+# DailyRevenue upkeep
+
+def _aggregate(tenant_id, basis, days=None):
+    date_field = DATE_FIELDS[basis]
+    invoices = _invoices(basis, tenant_id).exclude(**{f'{date_field}__isnull': True})
+    if days is not None:
+        invoices = invoices.filter(**{f'{date_field}__in': days})
+    rows = invoices.annotate(
+        day=F(date_field),
+        type=Coalesce('contract__property__property_type', Value('')),
+    ).values('day', 'status', 'type').annotate(amount=Sum('total_amount'), count=Count('pk')).order_by()
+    return [
+        DailyRevenue(
+            tenant_id=tenant_id, basis=basis, day=row['day'], status=row['status'],
+            property_type=row['type'], amount=row['amount'], invoices=row['count'],
+        )
+        for row in rows
+    ]
+
+
+def refresh_days(tenant_id, days):
+    """
+    Re-aggregate DailyRevenue for ``days`` ({basis: {day, ...}}) from the invoices
+    """
+    stale, rows = Q(), []
+    for basis, basis_days in days.items():
+        basis_days = sorted(day for day in basis_days if day is not None)
+        if basis_days:
+            stale |= Q(basis=basis, day__in=basis_days)
+            rows.extend(_aggregate(tenant_id, basis, basis_days))
+    if not stale:
+        return
+    with transaction.atomic():
+        DailyRevenue.objects.filter(stale, tenant_id=tenant_id).delete()
+        DailyRevenue.objects.bulk_create(rows, batch_size=1000)
+
+
+def rebuild_daily_revenue(tenant_id):
+    with transaction.atomic():
+        DailyRevenue.objects.filter(tenant_id=tenant_id).delete()
+        for basis in DailyRevenue.Basis:
+            DailyRevenue.objects.bulk_create(_aggregate(tenant_id, basis), batch_size=1000)
+
+
+def _days(invoices):
+    """
+    {basis: days} touched by ``invoices`` (dicts or Invoice rows)
+    """
+    days = defaultdict(set)
+    for invoice in invoices:
+        for basis, date_field in DATE_FIELDS.items():
+            value = invoice[date_field] if isinstance(invoice, dict) else getattr(invoice, date_field)
+            days[basis].add(value)
+    return days
+
+
+def _refresh_invoices_of(invoices):
+    rows = list(invoices.values('tenant_id', 'paid_date', 'due_date'))
+    per_tenant = defaultdict(list)
+    for row in rows:
+        per_tenant[row['tenant_id']].append(row)
+    for tenant_id, tenant_rows in per_tenant.items():
+        refresh_days(tenant_id, _days(tenant_rows))
+
+
+# Signal receivers, connected in core.signals
+
+def capture_previous(sender, instance, raw=False, **kwargs):
+    instance._revenue_previous = None
+    if raw or instance._state.adding or instance.pk is None:
+        return
+    instance._revenue_previous = sender.objects.filter(pk=instance.pk).values(*TRACKED_FIELDS[sender]).first()
+
+
+def on_save(sender, instance, raw=False, **kwargs):
+    if raw:
+        return
+    previous = getattr(instance, '_revenue_previous', None)
+    current = {field: getattr(instance, field) for field in TRACKED_FIELDS[sender]}
+    if previous == current:
+        return
+    if sender is Invoice:
+        days = _days([current, *([previous] if previous else [])])
+        refresh_days(instance.tenant_id, days)
+    elif previous is not None:
+        # Its invoices now count under another property type
+        lookup = 'contract' if sender is Contract else 'contract__property'
+        _refresh_invoices_of(Invoice.objects.filter(**{lookup: instance}))
+
+
+def on_delete(sender, instance, **kwargs):
+    refresh_days(instance.tenant_id, _days([instance]))
+
+
+def on_bulk_save(sender, instances, created, previous=None, **kwargs):
+    if sender is Property:
+        if created:
+            return
+        # Invoices of properties whose type changed count under the new one
+        if previous is None:
+            changed = instances
+        else:
+            changed = [
+                instance for instance, old in zip(instances, previous)
+                if old['property_type'] != instance.property_type
+            ]
+        if changed:
+            _refresh_invoices_of(Invoice.objects.filter(contract__property__in=changed))
+        return
+
+    per_tenant = defaultdict(list)
+    for index, instance in enumerate(instances):
+        per_tenant[instance.tenant_id].append(instance)
+        if previous is not None:
+            # The days the invoice moved away from need refreshing too
+            per_tenant[previous[index]['tenant_id']].append(previous[index])
+    for tenant_id, rows in per_tenant.items():
+        if created or previous is not None:
+            refresh_days(tenant_id, _days(rows))
+        else:
+            # No previous dates to refresh; one rebuild per tenant
+            rebuild_daily_revenue(tenant_id)
+
+
+def on_statuses_swept(sender, tenant_id, overdue_days=(), **kwargs):
+    # PENDING became OVERDUE: only the due basis of those days changes
+    if overdue_days:
+        refresh_days(tenant_id, {DailyRevenue.Basis.DUE: overdue_days})
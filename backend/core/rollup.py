@@ -0,0 +1,242 @@
+from collections import defaultdict
+from decimal import Decimal
+
+from django.db import transaction
+from django.db.models import Count, IntegerField, OuterRef, Q, Subquery, Sum
+from django.db.models.functions import TruncMonth
+
+from properties.models import Property
+from clients.models import Client
+from contracts.models import Contract
+from finance.models import Invoice
+from .models import Tenant, TenantStats
+
+
+# Columns each model contributes to the rollup. These are the only values
+# the signal handlers read, so changing other fields never touches the rollup.
+TRACKED_FIELDS = {
+    Property: ('tenant_id', 'property_type'),
+    Client: ('tenant_id',),
+    Contract: ('tenant_id', 'status'),
+    Invoice: ('tenant_id', 'status', 'total_amount', 'paid_date'),
+}
+
+CENT = Decimal('0.01')
+
+
+def _money(value):
+    return Decimal(value or 0).quantize(CENT)
+
+
+def _contribution(model, row):
+    """
+    Return the {field: delta} a single row adds to its tenant's rollup.
+    Bucketed fields use (field, bucket) tuples as keys.
+    """
+    delta = {}
+    if model is Property:
+        delta['properties_count'] = 1
+        delta[('property_distribution', row['property_type'])] = 1
+    elif model is Client:
+        delta['clients_count'] = 1
+    elif model is Contract:
+        if row['status'] == 'ACTIVE':
+            delta['active_contracts_count'] = 1
+    elif model is Invoice:
+        amount = _money(row['total_amount'])
+        if row['status'] == 'PAID':
+            delta['total_revenue'] = amount
+            if row['paid_date']:
+                delta[('monthly_revenue', str(row['paid_date'])[:7])] = amount
+        elif row['status'] == 'PENDING':
+            delta['pending_amount'] = amount
+        elif row['status'] == 'OVERDUE':
+            delta['overdue_amount'] = amount
+    return delta
+
+
+def _row(model, instance):
+    return {field: getattr(instance, field) for field in TRACKED_FIELDS[model]}
+
+
+def _apply(stats, delta):
+    for key, value in delta.items():
+        if isinstance(key, tuple):
+            field, bucket = key
+            buckets = getattr(stats, field)
+            if field == 'monthly_revenue':
+                new = _money(buckets.get(bucket)) + value
+                encoded = str(new)
+            else:
+                new = buckets.get(bucket, 0) + value
+                encoded = new
+            if new:
+                buckets[bucket] = encoded
+            else:
+                buckets.pop(bucket, None)
+        else:
+            setattr(stats, key, getattr(stats, key) + value)
+
+
+def apply_changes(model, changes, create=True):
+    """
+    Fold (row, sign) pairs for ``model`` into the affected tenants' rollups.
+
+    A tenant without a rollup row is rebuilt from scratch when ``create`` is
+    set, since the live aggregates already include the change; deletes never
+    create rows so cascading tenant deletes don't resurrect them.
+    """
+    per_tenant = defaultdict(lambda: defaultdict(int))
+    for row, sign in changes:
+        if row['tenant_id'] is None:
+            continue
+        for key, value in _contribution(model, row).items():
+            per_tenant[row['tenant_id']][key] += sign * value
+
+    for tenant_id, delta in per_tenant.items():
+        delta = {key: value for key, value in delta.items() if value}
+        if not delta:
+            continue
+        with transaction.atomic():
+            stats = TenantStats.objects.select_for_update().filter(pk=tenant_id).first()
+            if stats is None:
+                if create:
+                    rebuild_tenant_stats(tenant_id)
+                continue
+            _apply(stats, delta)
+            stats.save()
+
+
+def capture_previous(sender, instance, raw=False, **kwargs):
+    """
+    pre_save: remember the stored values so post_save can subtract them
+    """
+    instance._rollup_previous = None
+    if raw or instance._state.adding or instance.pk is None:
+        return
+    instance._rollup_previous = (
+        sender.objects.filter(pk=instance.pk).values(*TRACKED_FIELDS[sender]).first()
+    )
+
+
+def on_save(sender, instance, raw=False, **kwargs):
+    if raw:
+        return
+    changes = [(_row(sender, instance), 1)]
+    previous = getattr(instance, '_rollup_previous', None)
+    if previous is not None:
+        changes.append((previous, -1))
+    apply_changes(sender, changes)
+
+
+def on_delete(sender, instance, **kwargs):
+    apply_changes(sender, [(_row(sender, instance), -1)], create=False)
+
+
+def on_bulk_save(sender, instances, created, **kwargs):
+    if created:
+        # New rows only add to the totals, like single saves
+        apply_changes(sender, [(_row(sender, instance), 1) for instance in instances])
+        return
+    # Bulk updates carry no previous values to diff against; one rebuild
+    # per tenant costs the same three queries whatever the batch size
+    for tenant_id in {instance.tenant_id for instance in instances}:
+        rebuild_tenant_stats(tenant_id)
+
+
+def on_statuses_swept(sender, tenant_id, **kwargs):
+    # Amounts moved from pending to overdue and contracts stopped counting
+    # as active; rebuilding reads them back in three queries
+    rebuild_tenant_stats(tenant_id)
+
+
+def compute_live_stats(tenant_id):
+    """
+    Compute the rollup values straight from the source tables.
+
+    Each table is scanned once: invoices are grouped by paid month with
+    per-status conditional sums, properties are grouped by type (their
+    total is the sum of the groups), and the client / active contract
+    counts come back together as scalar subqueries on the tenant row.
+    """
+    counts = Tenant.objects.filter(pk=tenant_id).values(
+        clients_count=_count_subquery(Client.objects.all()),
+        active_contracts_count=_count_subquery(Contract.objects.filter(status='ACTIVE')),
+    ).first() or {'clients_count': 0, 'active_contracts_count': 0}
+
+    property_distribution = {
+        row['property_type']: row['count']
+        for row in Property.objects.filter(tenant_id=tenant_id).values(
+            'property_type'
+        ).annotate(
+            count=Count('id')
+        ).order_by()
+    }
+
+    invoices_by_month = Invoice.objects.filter(tenant_id=tenant_id).annotate(
+        month=TruncMonth('paid_date')
+    ).values('month').annotate(
+        paid=Sum('total_amount', filter=Q(status='PAID')),
+        pending=Sum('total_amount', filter=Q(status='PENDING')),
+        overdue=Sum('total_amount', filter=Q(status='OVERDUE')),
+    ).order_by('month')
+
+    total_revenue = pending_amount = overdue_amount = Decimal('0')
+    monthly_revenue = {}
+    for row in invoices_by_month:
+        total_revenue += row['paid'] or 0
+        pending_amount += row['pending'] or 0
+        overdue_amount += row['overdue'] or 0
+        if row['month'] is not None and row['paid'] is not None:
+            monthly_revenue[row['month'].strftime('%Y-%m')] = str(_money(row['paid']))
+
+    return {
+        'properties_count': sum(property_distribution.values()),
+        'clients_count': counts['clients_count'] or 0,
+        'active_contracts_count': counts['active_contracts_count'] or 0,
+        'total_revenue': _money(total_revenue),
+        'pending_amount': _money(pending_amount),
+        'overdue_amount': _money(overdue_amount),
+        'monthly_revenue': monthly_revenue,
+        'property_distribution': property_distribution,
+    }
+
+
+def _count_subquery(queryset):
+    return Subquery(
+        queryset.filter(tenant=OuterRef('pk')).order_by().values('tenant').annotate(
+            count=Count('pk')
+        ).values('count'),
+        output_field=IntegerField(),
+    )
+
+
+def rebuild_tenant_stats(tenant_id):
+    stats, _ = TenantStats.objects.update_or_create(
+        tenant_id=tenant_id,
+        defaults=compute_live_stats(tenant_id),
+    )
+    return stats
+
+
+def check_tenant_stats(tenant_id):
+    """
+    Compare the stored rollup with the live aggregates.
+    Returns a list of (field, stored, live) tuples, empty when consistent.
+    """
+    live = compute_live_stats(tenant_id)
+    stats = TenantStats.objects.filter(pk=tenant_id).first()
+    if stats is None:
+        return [('*', None, live)]
+
+    mismatches = []
+    for field, live_value in live.items():
+        stored = getattr(stats, field)
+        if field == 'monthly_revenue':
+            stored = {k: _money(v) for k, v in stored.items() if _money(v)}
+            live_value = {k: _money(v) for k, v in live_value.items()}
+        elif field == 'property_distribution':
+            stored = {k: v for k, v in stored.items() if v}
+        if stored != live_value:
+            mismatches.append((field, stored, live_value))
+    return mismatches
@@ -1,6 +1,11 @@
+from datetime import date
+from itertools import islice
+
 from rest_framework import serializers
 from django.contrib.auth import get_user_model
-from .models import Tenant
+from django.utils import timezone
+from .models import DailyRevenue, Tenant
+from .revenue import GRANULARITIES, SPLITS, periods
 
 User = get_user_model()
 
@@ -41,3 +46,29 @@ class RegisterSerializer(serializers.ModelSerializer):
         
         user.save()
         return user
+
+
+class RevenueSeriesQuerySerializer(serializers.Serializer):
+    """
+    Query string of /api/dashboard/revenue/
+    """
+    # Caps a day-by-day chart at about ten years
+    MAX_PERIODS = 3660
+
+    granularity = serializers.ChoiceField(choices=list(GRANULARITIES), default='month')
+    basis = serializers.ChoiceField(choices=DailyRevenue.Basis.choices, default=DailyRevenue.Basis.PAID)
+    split = serializers.ChoiceField(choices=list(SPLITS), required=False)
+    start = serializers.DateField(required=False)
+    end = serializers.DateField(required=False)
+
+    def validate(self, attrs):
+        # Twelve months up to today unless told otherwise
+        attrs.setdefault('end', timezone.localdate())
+        if 'start' not in attrs:
+            month = attrs['end'].year * 12 + attrs['end'].month - 12
+            attrs['start'] = date(month // 12, month % 12 + 1, 1)
+        if attrs['start'] > attrs['end']:
+            raise serializers.ValidationError({'start': 'Must not be after end.'})
+        if len(list(islice(periods(attrs['start'], attrs['end'], attrs['granularity']), self.MAX_PERIODS + 1))) > self.MAX_PERIODS:
+            raise serializers.ValidationError({'granularity': 'Too many periods for this range; pick a coarser granularity.'})
+        return attrs
@@ -0,0 +1,52 @@
+from django.db.models.signals import pre_save, post_save, post_delete
+from django.dispatch import receiver
+from finance.models import Invoice
+from properties.models import Property
+from .bulk import bulk_saved
+from .models import Tenant, User
+from .sweep import statuses_swept
+from .tenant_cache import tenant_cache
+from .tokens import forget_token_version
+from . import revenue, rollup, versions
+
+
+@receiver(post_save, sender=Tenant)
+@receiver(post_delete, sender=Tenant)
+def invalidate_tenant_cache(sender, instance, **kwargs):
+    tenant_cache.invalidate(instance.pk)
+
+
+# Keep TenantStats in step with the rows it summarises
+for model in rollup.TRACKED_FIELDS:
+    pre_save.connect(rollup.capture_previous, sender=model, dispatch_uid=f'rollup_pre_save_{model.__name__}')
+    post_save.connect(rollup.on_save, sender=model, dispatch_uid=f'rollup_post_save_{model.__name__}')
+    post_delete.connect(rollup.on_delete, sender=model, dispatch_uid=f'rollup_post_delete_{model.__name__}')
+    bulk_saved.connect(rollup.on_bulk_save, sender=model, dispatch_uid=f'rollup_bulk_saved_{model.__name__}')
+
+statuses_swept.connect(rollup.on_statuses_swept, dispatch_uid='rollup_statuses_swept')
+
+
+# Change versions behind the list/detail ETags
+for model in versions.TRACKED:
+    post_save.connect(versions.on_save, sender=model, dispatch_uid=f'versions_post_save_{model.__name__}')
+    post_delete.connect(versions.on_delete, sender=model, dispatch_uid=f'versions_post_delete_{model.__name__}')
+    bulk_saved.connect(versions.on_bulk_save, sender=model, dispatch_uid=f'versions_bulk_saved_{model.__name__}')
+
+statuses_swept.connect(versions.on_statuses_swept, dispatch_uid='versions_statuses_swept')
+
+
+@receiver(post_save, sender=User)
+@receiver(post_delete, sender=User)
+def forget_user_token_version(sender, instance, **kwargs):
+    forget_token_version(instance.pk)
+
+
+# DailyRevenue behind the long-range revenue charts
+for model in revenue.TRACKED_FIELDS:
+    pre_save.connect(revenue.capture_previous, sender=model, dispatch_uid=f'revenue_pre_save_{model.__name__}')
+    post_save.connect(revenue.on_save, sender=model, dispatch_uid=f'revenue_post_save_{model.__name__}')
+
+post_delete.connect(revenue.on_delete, sender=Invoice, dispatch_uid='revenue_post_delete_Invoice')
+bulk_saved.connect(revenue.on_bulk_save, sender=Invoice, dispatch_uid='revenue_bulk_saved_Invoice')
+bulk_saved.connect(revenue.on_bulk_save, sender=Property, dispatch_uid='revenue_bulk_saved_Property')
+statuses_swept.connect(revenue.on_statuses_swept, dispatch_uid='revenue_statuses_swept')
@@ -0,0 +1,197 @@
+"""
+Sparse fieldsets for read endpoints.
+
+    ?fields=id,title,price   only these fields
+    ?expand=client           the related object instead of its id
+
+Lists leave out the serializer's ``Meta.list_exclude`` fields unless they
+are asked for. When every listed field is a column (or a column reached
+through foreign keys), SparseFieldsViewMixin reads the page with
+``values()`` and skips building model instances; otherwise the unused
+columns are deferred.
+"""
+from django.core.exceptions import FieldDoesNotExist
+from django.db.models.fields.files import FileField
+from django.utils import timezone
+from django.utils.functional import cached_property
+from django.utils.module_loading import import_string
+from rest_framework import ISO_8601, serializers
+from rest_framework.permissions import SAFE_METHODS
+from rest_framework.response import Response
+from rest_framework.settings import api_settings
+from rest_framework.utils.serializer_helpers import BindingDict
+
+
+def _names(value):
+    return [name.strip() for name in (value or '').split(',') if name.strip()]
+
+
+class SparseFieldsMixin:
+    """
+    ModelSerializer mixin behind ?fields= and ?expand=.
+
+    ``expandable_fields`` maps a field name to the dotted path of the
+    serializer that replaces it when expanded, or to None for a declared
+    nested field that lists only show on request.
+    """
+    expandable_fields = {}
+
+    def __init__(self, *args, fields=None, expand=None, listing=False, **kwargs):
+        super().__init__(*args, **kwargs)
+        self._requested = fields
+        self._expand = expand or ()
+        self._listing = listing
+
+    @cached_property
+    def fields(self):
+        # Narrowed after get_fields(), so serializers can still adjust any
+        # of their fields there
+        fields = BindingDict(self)
+        for name, field in self.sparse_fields(self.get_fields()).items():
+            fields[name] = field
+        return fields
+
+    def sparse_fields(self, fields):
+        unknown = [name for name in self._expand if name not in self.expandable_fields]
+        if unknown:
+            raise serializers.ValidationError({'expand': f"Can't expand: {', '.join(unknown)}"})
+        for name in self._expand:
+            serializer_path = self.expandable_fields[name]
+            if serializer_path is not None:
+                fields[name] = import_string(serializer_path)(read_only=True, listing=True)
+
+        if self._requested:
+            unknown = [name for name in self._requested if name not in fields]
+            if unknown:
+                raise serializers.ValidationError({'fields': f"Unknown field(s): {', '.join(unknown)}"})
+            keep = {*self._requested, *self._expand}
+        elif self._listing:
+            keep = set(fields) - set(getattr(self.Meta, 'list_exclude', ())) | set(self._expand)
+        else:
+            return fields
+        return {name: field for name, field in fields.items() if name in keep}
+
+
+def column_paths(model, fields):
+    """
+    {field name: (values() path, model field)} when every serializer field
+    reads a column, else None
+    """
+    paths = {}
+    for name, field in fields.items():
+        if isinstance(field, (serializers.BaseSerializer, serializers.SerializerMethodField)) or field.source == '*':
+            return None
+        current, model_field = model, None
+        for position, attr in enumerate(field.source_attrs):
+            try:
+                model_field = current._meta.get_field(attr)
+            except FieldDoesNotExist:
+                return None
+            if not model_field.concrete or model_field.many_to_many:
+                return None
+            if position < len(field.source_attrs) - 1:
+                if not (model_field.many_to_one or model_field.one_to_one):
+                    return None
+                current = model_field.related_model
+        paths[name] = ('__'.join(field.source_attrs), model_field)
+    return paths
+
+
+def _datetime_converter(field):
+    """
+    DateTimeField.to_representation with the time zone looked up once
+    per list instead of once per value
+    """
+    output_format = getattr(field, 'format', api_settings.DATETIME_FORMAT)
+    field_timezone = field.timezone if hasattr(field, 'timezone') else field.default_timezone()
+    if output_format is None or output_format.lower() != ISO_8601 or field_timezone is None:
+        return field.to_representation
+
+    def convert(value):
+        if isinstance(value, str) or not timezone.is_aware(value):
+            return field.to_representation(value)
+        value = value.astimezone(field_timezone).isoformat()
+        return value[:-6] + 'Z' if value.endswith('+00:00') else value
+    return convert
+
+
+def _converter(field, model_field):
+    if isinstance(field, serializers.DateTimeField):
+        return _datetime_converter(field)
+    if isinstance(field, serializers.RelatedField):
+        # values() already gives the primary key
+        return lambda value: value
+    if isinstance(model_field, FileField):
+        return lambda value: field.to_representation(model_field.attr_class(None, model_field, value))
+    return field.to_representation
+
+
+def values_rows(rows, paths, fields):
+    """
+    Serialize values() rows for ``fields``, as the serializer would
+    """
+    converters = [
+        (name, path, _converter(fields[name], model_field))
+        for name, (path, model_field) in paths.items()
+    ]
+    return [
+        {name: None if row[path] is None else convert(row[path]) for name, path, convert in converters}
+        for row in rows
+    ]
+
+
+class SparseFieldsViewMixin:
+    """
+    Passes ?fields= and ?expand= to a SparseFieldsMixin serializer on reads,
+    and lists with values() or deferred columns (see module docstring)
+    """
+
+    def get_serializer(self, *args, **kwargs):
+        request = getattr(self, 'request', None)
+        if request is not None and request.method in SAFE_METHODS and not getattr(self, 'swagger_fake_view', False):
+            kwargs.setdefault('fields', _names(request.query_params.get('fields')))
+            kwargs.setdefault('expand', _names(request.query_params.get('expand')))
+        return super().get_serializer(*args, **kwargs)
+
+    def list(self, request, *args, **kwargs):
+        queryset = self.filter_queryset(self.get_queryset())
+        fields = self.get_serializer(listing=True).fields
+        paths = column_paths(queryset.model, fields)
+
+        if paths is None:
+            page = self.paginate_queryset(self.slim_queryset(queryset, fields))
+            serializer = self.get_serializer(page, many=True, listing=True)
+            return self.get_paginated_response(serializer.data) if page is not None else Response(serializer.data)
+
+        columns = {path for path, _ in paths.values()} | self.position_fields(queryset.model)
+        rows = queryset.prefetch_related(None).values(*columns)
+        page = self.paginate_queryset(rows)
+        data = values_rows(page if page is not None else rows, paths, fields)
+        return self.get_paginated_response(data) if page is not None else Response(data)
+
+    def position_fields(self, model):
+        """
+        Columns pagination may read a position from, whether shown or not
+        """
+        columns = {field.name for field in model._meta.concrete_fields}
+        ordering = getattr(self, 'ordering_fields', None)
+        candidates = ('id', 'created_at', *(ordering if isinstance(ordering, (list, tuple)) else ()))
+        return {name for name in candidates if name in columns}
+
+    def slim_queryset(self, queryset, fields):
+        """
+        Drop prefetches and defer columns that ``fields`` don't show
+        """
+        lookups = [
+            lookup for lookup in queryset._prefetch_related_lookups
+            if str(getattr(lookup, 'prefetch_through', lookup)).split('__')[0] in fields
+        ]
+        queryset = queryset.prefetch_related(None).prefetch_related(*lookups)
+        if any(isinstance(field, serializers.SerializerMethodField) or field.source == '*' for field in fields.values()):
+            return queryset
+        used = {field.source_attrs[0] for field in fields.values() if field.source_attrs} | self.position_fields(queryset.model)
+        unused = [
+            field.name for field in queryset.model._meta.concrete_fields
+            if not field.is_relation and not field.primary_key and field.name not in used
+        ]
+        return queryset.defer(*unused)
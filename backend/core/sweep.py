@@ -0,0 +1,82 @@
+from collections import defaultdict
+from decimal import Decimal
+
+from django.db import transaction
+from django.db.models import Count, Sum
+from django.dispatch import Signal
+from django.utils import timezone
+
+from contracts.models import Contract
+from finance.models import CENT, Invoice
+
+# Sent once per affected tenant after a sweep, with ``tenant_id``,
+# ``overdue_invoices``, ``overdue_amount``, ``overdue_days`` (the due dates
+# of the invoices swept, sorted) and ``expired_contracts``
+statuses_swept = Signal()
+
+SWEEP_CHUNK_SIZE = 5000
+
+
+def _sweep(queryset, to_status, chunk_size, amount_field=None, day_field=None):
+    """
+    Move every row of ``queryset`` to ``to_status`` with UPDATE statements
+    of at most ``chunk_size`` rows, lowest pk first, so no statement holds
+    locks on the whole backlog. Only per-tenant counts and sums, and the
+    distinct values of ``day_field``, come back from the database.
+    Returns {tenant_id: (count, amount, days)}.
+    """
+    totals = defaultdict(lambda: (0, Decimal('0'), set()))
+    now = timezone.now()
+    group_by = ('tenant_id', day_field) if day_field else ('tenant_id',)
+    while True:
+        with transaction.atomic():
+            # The chunk is everything up to its last pk; with fewer rows
+            # left than a chunk, the remainder
+            bound = list(queryset.order_by('pk').values_list('pk', flat=True)[chunk_size - 1:chunk_size])
+            chunk = queryset.filter(pk__lte=bound[0]) if bound else queryset
+
+            aggregates = {'count': Count('pk')}
+            if amount_field:
+                aggregates['amount'] = Sum(amount_field)
+            for row in chunk.order_by().values(*group_by).annotate(**aggregates):
+                count, amount, days = totals[row['tenant_id']]
+                if day_field:
+                    days.add(row[day_field])
+                totals[row['tenant_id']] = (count + row['count'], amount + (row.get('amount') or 0), days)
+
+            chunk.update(status=to_status, updated_at=now)
+        if not bound:
+            return dict(totals)
+
+
+def overdue_invoices(today):
+    return Invoice.objects.filter(status='PENDING', due_date__lt=today)
+
+
+def expired_contracts(today):
+    return Contract.objects.filter(status='ACTIVE', end_date__lt=today)
+
+
+def sweep_statuses(today=None, chunk_size=SWEEP_CHUNK_SIZE):
+    """
+    Mark PENDING invoices past their due date OVERDUE and ACTIVE contracts
+    past their end date EXPIRED, then send statuses_swept once for each
+    tenant that had any. Returns the events' keyword arguments.
+    """
+    today = today or timezone.localdate()
+    invoices = _sweep(overdue_invoices(today), 'OVERDUE', chunk_size, amount_field='total_amount', day_field='due_date')
+    contracts = _sweep(expired_contracts(today), 'EXPIRED', chunk_size)
+
+    events = []
+    for tenant_id in sorted(invoices.keys() | contracts.keys()):
+        invoice_count, amount, days = invoices.get(tenant_id, (0, Decimal('0'), set()))
+        event = {
+            'tenant_id': tenant_id,
+            'overdue_invoices': invoice_count,
+            'overdue_amount': Decimal(amount).quantize(CENT),
+            'overdue_days': sorted(days),
+            'expired_contracts': contracts.get(tenant_id, (0, None, None))[0],
+        }
+        statuses_swept.send(sender=None, **event)
+        events.append(event)
+    return events
@@ -0,0 +1,227 @@
+"""
+Synthetic tenant data for demos, load tests and benchmarks.
+
+Tenant sizes follow a Zipf-like curve (a few large agencies, many small
+ones). Every property has a leasing history over the last
+``history_months``: consecutive contracts of 6, 12 or 24 months, renewed
+by the same client or re-let after a vacancy, each billed monthly. Past
+invoices are mostly paid, some overdue or cancelled; the current lease
+is ACTIVE. One property yields about 33 invoices over three years, so
+``properties_for_invoices()`` sizes a run by its invoice count.
+"""
+import calendar
+import math
+import random
+from datetime import date, timedelta
+from decimal import Decimal
+
+from django.contrib.auth.hashers import make_password
+from django.db import transaction
+from django.utils import timezone
+
+from clients.models import Client
+from contracts.models import Contract
+from finance.models import Invoice, InvoiceSequence
+from properties.models import Property
+from properties.search import index_properties
+from .models import Tenant, User
+from .revenue import rebuild_daily_revenue
+from .rollup import rebuild_tenant_stats
+
+BATCH_SIZE = 2000
+
+# Properties handled per round: created, leased and billed together
+PROPERTY_ROUND = 500
+
+INVOICES_PER_PROPERTY = 33
+
+CITIES = {
+    # city: (share of properties, yearly rent per m²)
+    'الرياض': (35, 550),
+    'جدة': (25, 500),
+    'الدمام': (12, 420),
+    'مكة المكرمة': (8, 480),
+    'المدينة المنورة': (8, 430),
+    'الخبر': (7, 450),
+    'أبها': (5, 320),
+}
+
+PROPERTY_TYPES = {
+    # type: (share, median area m², rent multiplier)
+    'APARTMENT': (55, 140, Decimal('1.0')),
+    'VILLA': (20, 350, Decimal('0.9')),
+    'OFFICE': (10, 180, Decimal('1.3')),
+    'SHOP': (10, 80, Decimal('1.8')),
+    'LAND': (5, 900, Decimal('0.1')),
+}
+
+FIRST_NAMES = ['محمد', 'أحمد', 'عبدالله', 'فهد', 'خالد', 'سعود', 'نورة', 'سارة', 'ريم', 'هند', 'عمر', 'ليلى']
+LAST_NAMES = ['العتيبي', 'القحطاني', 'الغامدي', 'الشهري', 'الدوسري', 'الحربي', 'الزهراني', 'المطيري']
+STREETS = ['طريق الملك فهد', 'شارع التحلية', 'طريق الملك عبدالعزيز', 'شارع الأمير سلطان', 'طريق الدائري']
+
+LEASE_MONTHS = ([12, 6, 24], [70, 15, 15])
+RENEWAL_RATE = 0.6
+MAX_VACANCY_DAYS = 120
+TERMINATION_RATE = 0.02
+# Past invoices: paid / overdue / cancelled
+PAST_STATUSES = (['PAID', 'OVERDUE', 'CANCELLED'], [88, 9, 3])
+
+CENT = Decimal('0.01')
+
+
+def properties_for_invoices(invoices):
+    return max(1, math.ceil(invoices / INVOICES_PER_PROPERTY))
+
+
+def tenant_sizes(total, tenants):
+    """
+    Split ``total`` properties over ``tenants`` with Zipf weights
+    """
+    weights = [1 / (rank + 1) for rank in range(tenants)]
+    scale = total / sum(weights)
+    sizes = [max(1, int(weight * scale)) for weight in weights]
+    sizes[0] += max(0, total - sum(sizes))
+    return sizes
+
+
+def _add_months(day, months):
+    month = day.month - 1 + months
+    year, month = day.year + month // 12, month % 12 + 1
+    return date(year, month, min(day.day, calendar.monthrange(year, month)[1]))
+
+
+class Generator:
+    def __init__(self, seed=0, history_months=36, today=None):
+        self.rng = random.Random(seed)
+        self.history_months = history_months
+        self.today = today or timezone.localdate()
+        self.counts = {'tenants': 0, 'properties': 0, 'clients': 0, 'contracts': 0, 'invoices': 0}
+
+    def _choice(self, table):
+        return self.rng.choices(list(table), weights=[row[0] for row in table.values()])[0]
+
+    def property(self, tenant, number):
+        city = self._choice(CITIES)
+        property_type = self._choice(PROPERTY_TYPES)
+        _, median_area, multiplier = PROPERTY_TYPES[property_type]
+        area = Decimal(median_area * self.rng.lognormvariate(0, 0.35)).quantize(CENT)
+        rent = (area * CITIES[city][1] * multiplier).quantize(Decimal('1000'))
+        return Property(
+            tenant=tenant,
+            title=f'{property_type.title()} {number}',
+            property_type=property_type,
+            city=city,
+            address=f'{self.rng.choice(STREETS)} {self.rng.randint(1, 9999)}',
+            area=area,
+            price=max(rent, Decimal('6000')),
+        )
+
+    def client(self, tenant):
+        name = f'{self.rng.choice(FIRST_NAMES)} {self.rng.choice(LAST_NAMES)}'
+        phone = f'05{self.rng.randint(0, 99999999):08d}'
+        return Client(
+            tenant=tenant,
+            name=name,
+            phone=phone,
+            email=f'client{phone[2:]}@example.com' if self.rng.random() < 0.6 else '',
+            national_id=f'1{self.rng.randint(0, 999999999):09d}',
+        )
+
+    def leases(self, tenant, prop):
+        """
+        Yield (client, contract, [invoices]) over the property's history;
+        a renewal reuses the previous lease's client object
+        """
+        history_start = _add_months(self.today, -self.history_months)
+        start = history_start + timedelta(days=self.rng.randint(0, 90))
+        monthly = (prop.price / 12).quantize(CENT)
+        client = None
+        while start <= self.today:
+            months = self.rng.choices(*LEASE_MONTHS)[0]
+            end = _add_months(start, months) - timedelta(days=1)
+            if client is None:
+                client = self.client(tenant)
+            status = 'ACTIVE' if end >= self.today else 'EXPIRED'
+            if status == 'ACTIVE' and self.rng.random() < TERMINATION_RATE:
+                status = 'TERMINATED'
+            contract = Contract(
+                tenant=tenant, property=prop, client=client, start_date=start, end_date=end,
+                monthly_amount=monthly, total_amount=monthly * months, status=status,
+            )
+            yield client, contract, list(self.invoices(tenant, contract, months))
+
+            renewed = self.rng.random() < RENEWAL_RATE
+            start = end + timedelta(days=1 if renewed else self.rng.randint(1, MAX_VACANCY_DAYS))
+            if not renewed:
+                client = None
+
+    def invoices(self, tenant, contract, months):
+        for month in range(months):
+            due = _add_months(contract.start_date, month)
+            if due > self.today:
+                return
+            # The last week's invoices are still open
+            if due < self.today - timedelta(days=7):
+                status = self.rng.choices(*PAST_STATUSES)[0]
+            else:
+                status = 'PENDING'
+            invoice = Invoice(
+                tenant=tenant, contract=contract, amount=contract.monthly_amount,
+                due_date=due, billing_period=due.replace(day=1), status=status,
+                paid_date=min(self.today, due + timedelta(days=self.rng.randint(0, 20))) if status == 'PAID' else None,
+            )
+            invoice.compute_totals()
+            yield invoice
+
+    def tenant(self, index, properties, password):
+        tenant = Tenant.objects.create(name=f'Demo Agency {index}', subdomain=f'demo{index}')
+        User.objects.create(
+            username=f'demo{index}_owner', email=f'owner@demo{index}.example.com',
+            password=password, role=User.Role.OWNER, tenant=tenant,
+        )
+        sequence = InvoiceSequence(tenant=tenant)
+        invoice_number = 0
+
+        for first in range(0, properties, PROPERTY_ROUND):
+            with transaction.atomic():
+                props = [self.property(tenant, number) for number in range(first + 1, min(properties, first + PROPERTY_ROUND) + 1)]
+                Property.objects.bulk_create(props, batch_size=BATCH_SIZE)
+                index_properties(props)
+
+                clients, contracts, invoices = {}, [], []
+                for prop in props:
+                    for client, contract, billed in self.leases(tenant, prop):
+                        clients[id(client)] = client
+                        contracts.append(contract)
+                        for invoice in billed:
+                            invoice_number += 1
+                            invoice.invoice_number = sequence.format(invoice_number, invoice.due_date.year)
+                        invoices.extend(billed)
+
+                # Contracts and invoices hold the unsaved objects; bulk_create
+                # copies each parent's new pk into the child's foreign key
+                Client.objects.bulk_create(clients.values(), batch_size=BATCH_SIZE)
+                Contract.objects.bulk_create(contracts, batch_size=BATCH_SIZE)
+                Invoice.objects.bulk_create(invoices, batch_size=BATCH_SIZE)
+
+            self.counts['properties'] += len(props)
+            self.counts['clients'] += len(clients)
+            self.counts['contracts'] += len(contracts)
+            self.counts['invoices'] += len(invoices)
+
+        sequence.next_value = invoice_number + 1
+        sequence.save()
+        rebuild_tenant_stats(tenant.pk)
+        rebuild_daily_revenue(tenant.pk)
+        self.counts['tenants'] += 1
+        return tenant
+
+    def run(self, tenants, properties, first_index=1):
+        """
+        Create ``tenants`` tenants sharing ``properties`` properties,
+        each with an owner login demo<N>_owner / password
+        """
+        password = make_password('password')
+        for offset, size in enumerate(tenant_sizes(properties, tenants)):
+            self.tenant(first_index + offset, size, password)
+        return self.counts
@@ -0,0 +1,200 @@
+import threading
+import time
+from collections import OrderedDict
+
+from django.conf import settings
+from django.core.cache import caches
+
+from .models import Tenant
+
+
+# Stored in the shared tier for IDs that don't resolve to a tenant, so other
+# workers can skip the database for them too.
+_MISSING = '__missing__'
+
+
+class TenantCache:
+    """
+    Two-tier cache for resolving the X-Tenant-ID header to a Tenant.
+
+    Tier 1 is an in-process LRU with a TTL, tier 2 is an optional shared
+    Django cache (e.g. Redis) so that workers warm each other. IDs that do
+    not resolve are kept in a separate, smaller negative LRU so junk headers
+    can neither hit the database repeatedly nor evict real tenants.
+    """
+
+    def __init__(self, max_entries=1024, ttl=60, negative_max_entries=1024,
+                 negative_ttl=10, shared_alias=None, shared_ttl=300):
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self.negative_max_entries = negative_max_entries
+        self.negative_ttl = negative_ttl
+        self.shared_alias = shared_alias
+        self.shared_ttl = shared_ttl
+
+        self._entries = OrderedDict()
+        self._negative = OrderedDict()
+        self._lock = threading.Lock()
+        self._reset_counters()
+
+    @classmethod
+    def from_settings(cls):
+        options = getattr(settings, 'TENANT_CACHE', {})
+        return cls(
+            max_entries=options.get('MAX_ENTRIES', 1024),
+            ttl=options.get('TTL', 60),
+            negative_max_entries=options.get('NEGATIVE_MAX_ENTRIES', 1024),
+            negative_ttl=options.get('NEGATIVE_TTL', 10),
+            shared_alias=options.get('SHARED_CACHE_ALIAS'),
+            shared_ttl=options.get('SHARED_TTL', 300),
+        )
+
+    def _reset_counters(self):
+        self.hits = 0
+        self.shared_hits = 0
+        self.negative_hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    @property
+    def shared(self):
+        if not self.shared_alias:
+            return None
+        return caches[self.shared_alias]
+
+    @staticmethod
+    def _shared_key(key):
+        return f'tenant:{key}'
+
+    @staticmethod
+    def _key(tenant_id):
+        """
+        The id as a positive int, so " 7" and "007" share an entry with 7;
+        None for ids that can never match a tenant
+        """
+        try:
+            key = int(str(tenant_id).strip())
+        except ValueError:
+            return None
+        return key if key > 0 else None
+
+    def get(self, tenant_id):
+        """
+        Return the Tenant for ``tenant_id`` or None if it doesn't exist
+        """
+        key = self._key(tenant_id)
+        now = time.monotonic()
+
+        with self._lock:
+            if key is None:
+                # Non-numeric IDs can never match, so don't spend a query
+                # or a cache entry on them
+                self.negative_hits += 1
+                return None
+
+            entry = self._entries.get(key)
+            if entry is not None:
+                tenant, expires = entry
+                if expires > now:
+                    self._entries.move_to_end(key)
+                    self.hits += 1
+                    return tenant
+                del self._entries[key]
+
+            expires = self._negative.get(key)
+            if expires is not None:
+                if expires > now:
+                    self._negative.move_to_end(key)
+                    self.negative_hits += 1
+                    return None
+                del self._negative[key]
+
+        shared = self.shared
+        if shared is not None:
+            value = shared.get(self._shared_key(key))
+            if value is not None:
+                with self._lock:
+                    self.shared_hits += 1
+                if value == _MISSING:
+                    self._remember_missing(key)
+                    return None
+                self._remember(key, value)
+                return value
+
+        tenant = self._load(key)
+        with self._lock:
+            self.misses += 1
+
+        if tenant is None:
+            self._remember_missing(key)
+        else:
+            self._remember(key, tenant)
+        if shared is not None:
+            shared.set(
+                self._shared_key(key),
+                tenant if tenant is not None else _MISSING,
+                self.shared_ttl if tenant is not None else self.negative_ttl,
+            )
+        return tenant
+
+    @staticmethod
+    def _load(key):
+        return Tenant.objects.filter(pk=key).first()
+
+    def _remember(self, key, tenant):
+        with self._lock:
+            self._negative.pop(key, None)
+            self._entries[key] = (tenant, time.monotonic() + self.ttl)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+
+    def _remember_missing(self, key):
+        with self._lock:
+            self._entries.pop(key, None)
+            self._negative[key] = time.monotonic() + self.negative_ttl
+            self._negative.move_to_end(key)
+            while len(self._negative) > self.negative_max_entries:
+                self._negative.popitem(last=False)
+                self.evictions += 1
+
+    def invalidate(self, tenant_id):
+        """
+        Drop a tenant from both tiers (positive and negative entries)
+        """
+        key = self._key(tenant_id)
+        if key is None:
+            return
+        with self._lock:
+            self._entries.pop(key, None)
+            self._negative.pop(key, None)
+        shared = self.shared
+        if shared is not None:
+            shared.delete(self._shared_key(key))
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self._negative.clear()
+            self._reset_counters()
+
+    def stats(self):
+        """
+        Hit/miss counters for monitoring
+        """
+        with self._lock:
+            lookups = self.hits + self.shared_hits + self.negative_hits + self.misses
+            return {
+                'hits': self.hits,
+                'shared_hits': self.shared_hits,
+                'negative_hits': self.negative_hits,
+                'misses': self.misses,
+                'evictions': self.evictions,
+                'size': len(self._entries),
+                'negative_size': len(self._negative),
+                'hit_ratio': (lookups - self.misses) / lookups if lookups else 0.0,
+            }
+
+
+tenant_cache = TenantCache.from_settings()
@@ -0,0 +1,35 @@
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+
+
+class QueryBudgetMixin:
+    """
+    TestCase mixin for pinning how many queries an endpoint may run.
+
+    assertQueryBudget() fetches the endpoint at several page sizes and
+    fails if any of them goes over the budget or if bigger pages cost more
+    queries than smaller ones, which is what an N+1 looks like. Seed more
+    rows than the largest page size so every page is full.
+    """
+    page_sizes = (1, 20)
+
+    def count_queries(self, client, url, **extra):
+        with CaptureQueriesContext(connection) as queries:
+            response = client.get(url, **extra)
+        self.assertEqual(response.status_code, 200, f'{url}: {response.content[:200]!r}')
+        return len(queries), response
+
+    def assertQueryBudget(self, client, url, budget, paginated=True, **extra):
+        if not paginated:
+            count, _ = self.count_queries(client, url, **extra)
+            self.assertLessEqual(count, budget, f'{url} ran {count} queries, budget is {budget}')
+            return
+
+        separator = '&' if '?' in url else '?'
+        counts = {}
+        for page_size in self.page_sizes:
+            count, response = self.count_queries(client, f'{url}{separator}page_size={page_size}', **extra)
+            self.assertEqual(len(response.json()['results']), page_size, f'{url}: seed more rows')
+            counts[page_size] = count
+        self.assertLessEqual(max(counts.values()), budget, f'{url} ran {counts} queries by page size, budget is {budget}')
+        self.assertEqual(len(set(counts.values())), 1, f'{url} queries grow with the page size: {counts}')
@@ -1,3 +1,946 @@
-from django.test import TestCase
+import csv
+import io
+import os
+import shutil
+import tempfile
+import tracemalloc
+import zipfile
+from datetime import date, timedelta
+from unittest import mock, skipUnless
+from xml.etree import ElementTree
+from decimal import Decimal
 
-# Create your tests here.
+from django.core import mail
+from django.core.cache import caches
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.core.management import call_command
+from django.core.mail.backends.locmem import EmailBackend as LocmemEmailBackend
+from django.db.models import Count, F, Sum
+from django.test import SimpleTestCase, TestCase, override_settings, tag
+from django.utils import timezone
+from django.utils.translation import gettext_lazy
+from rest_framework.renderers import JSONRenderer
+from rest_framework.test import APIClient
+from rest_framework_simplejwt.tokens import AccessToken, RefreshToken
+
+from clients.models import Client
+from contracts.models import Contract
+from finance.models import Invoice
+from properties.models import Property, PropertyImage
+from . import imports, revenue
+from .export import stream_csv, stream_xlsx
+from .jobs import VISIBILITY_TIMEOUT, Worker, claim, enqueue, register
+from .metrics import request_metrics
+from .models import DailyRevenue, ImportRun, Job, Notification, Tenant, User
+from .outbox import Dispatcher, LocmemBackend
+from .pool import call
+from .renderers import FastJSONRenderer
+from .rollup import check_tenant_stats, compute_live_stats
+from .sweep import statuses_swept, sweep_statuses
+from .synthetic import Generator
+from .tenant_cache import TenantCache, tenant_cache
+from .testing import QueryBudgetMixin
+
+
+def seed_tenant(name):
+    tenant = Tenant.objects.create(name=name, subdomain=name)
+    client = Client.objects.create(tenant=tenant, name='Client', phone='0500000000')
+    for i, property_type in enumerate(['APARTMENT', 'APARTMENT', 'VILLA', 'SHOP']):
+        prop = Property.objects.create(
+            tenant=tenant, title=f'{name} {i}', property_type=property_type,
+            city='Riyadh', address='Street', area=100, price=1000,
+        )
+        contract = Contract.objects.create(
+            tenant=tenant, property=prop, client=client,
+            start_date=date(2026, 1, 1), end_date=date(2026, 12, 31),
+            monthly_amount=1000, total_amount=12000,
+            status='ACTIVE' if i % 2 == 0 else 'EXPIRED',
+        )
+        for month, status in enumerate(['PAID', 'PAID', 'PENDING', 'OVERDUE', 'CANCELLED'], start=1):
+            Invoice.objects.create(
+                tenant=tenant, contract=contract, invoice_number=f'{name}-{i}-{month}',
+                amount=Decimal('1000.50'), due_date=date(2026, month, 1), status=status,
+                paid_date=date(2026, month, 15) if status == 'PAID' else None,
+            )
+    return tenant
+
+
+@register('tests.always_fails')
+def always_fails():
+    raise RuntimeError('renderer exploded')
+
+
+class JobQueueTests(TestCase):
+    def test_failures_back_off_then_fail(self):
+        job = enqueue('tests.always_fails', max_attempts=3)
+        for attempt in (1, 2):
+            before = timezone.now()
+            with self.assertLogs('core.jobs', 'WARNING'):
+                Worker().run(once=True)
+            job.refresh_from_db()
+            self.assertEqual((job.status, job.attempts, job.locked_by), (Job.Status.PENDING, attempt, ''))
+            self.assertIn('renderer exploded', job.last_error)
+            # 2s, then 4s before the next try; not claimable until then
+            self.assertGreaterEqual(job.run_after, before + timedelta(seconds=2 ** attempt))
+            self.assertLessEqual(job.run_after, timezone.now() + timedelta(seconds=2 ** attempt))
+            self.assertEqual(claim(10), [])
+            Job.objects.filter(pk=job.pk).update(run_after=timezone.now())
+
+        with self.assertLogs('core.jobs', 'WARNING'):
+            Worker().run(once=True)
+        job.refresh_from_db()
+        self.assertEqual((job.status, job.attempts), (Job.Status.FAILED, 3))
+        self.assertEqual(claim(10), [])
+
+    def test_stale_running_jobs_are_claimed_again(self):
+        now = timezone.now()
+        stale = Job.objects.create(
+            kind='tests.always_fails', status=Job.Status.RUNNING, attempts=1,
+            locked_by='dead-worker', locked_at=now - VISIBILITY_TIMEOUT - timedelta(minutes=1),
+        )
+        Job.objects.create(kind='tests.always_fails', status=Job.Status.RUNNING, attempts=1, locked_by='busy-worker', locked_at=now)
+        claimed = claim(10, worker_id='rescuer')
+        self.assertEqual([job.pk for job in claimed], [stale.pk])
+        self.assertEqual((claimed[0].attempts, claimed[0].locked_by), (2, 'rescuer'))
+
+    def test_keyed_jobs_are_queued_once(self):
+        self.assertIsNotNone(enqueue('tests.always_fails', key='one'))
+        self.assertIsNone(enqueue('tests.always_fails', key='one'))
+
+
+class JobPoolTests(SimpleTestCase):
+    def test_pool_processes_set_up_django_first(self):
+        # run_jobs --processes: handler modules import models, so children
+        # may only import them once Django is set up
+        worker = Worker(processes=1)
+        worker.start()
+        try:
+            future = worker.pool.submit(call, 'core.jobs.execute', 'no-such-kind', {}, True)
+            self.assertEqual(future.result(timeout=120), "No handler registered for job kind 'no-such-kind'")
+        finally:
+            worker.stop()
+
+
+class TenantCacheTests(TestCase):
+    def setUp(self):
+        self.tenant = Tenant.objects.create(name='Cached', subdomain='cached')
+        self.cache = TenantCache()
+
+    def test_hits_and_misses(self):
+        with self.assertNumQueries(1):
+            self.assertEqual(self.cache.get(self.tenant.pk), self.tenant)
+            self.assertEqual(self.cache.get(str(self.tenant.pk)), self.tenant)
+            # Header variants share the entry
+            self.assertEqual(self.cache.get(f' 00{self.tenant.pk} '), self.tenant)
+        stats = self.cache.stats()
+        self.assertEqual((stats['hits'], stats['misses'], stats['size']), (2, 1, 1))
+
+    def test_negative_entries(self):
+        with self.assertNumQueries(1):
+            self.assertIsNone(self.cache.get(999999))
+            self.assertIsNone(self.cache.get('999999'))
+        # Junk never reaches the database or the cache
+        with self.assertNumQueries(0):
+            for junk in ('abc', '0', '-3', ''):
+                self.assertIsNone(self.cache.get(junk))
+        stats = self.cache.stats()
+        self.assertEqual((stats['negative_hits'], stats['negative_size']), (5, 1))
+
+    def test_invalidate_drops_every_variant(self):
+        self.cache.get(f'0{self.tenant.pk}')
+        self.cache.invalidate(self.tenant.pk)
+        with self.assertNumQueries(1):
+            self.cache.get(f' {self.tenant.pk}')
+
+        missing = self.tenant.pk + 1
+        self.cache.get(f'00{missing}')
+        created = Tenant.objects.create(pk=missing, name='Late', subdomain='late')
+        self.cache.invalidate(created.pk)
+        self.assertEqual(self.cache.get(missing), created)
+
+    @override_settings(CACHES={'shared': {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache', 'LOCATION': 'tenants'}})
+    def test_shared_tier(self):
+        caches['shared'].clear()
+        warm, cold = TenantCache(shared_alias='shared'), TenantCache(shared_alias='shared')
+        warm.get(self.tenant.pk)
+        with self.assertNumQueries(0):
+            self.assertEqual(cold.get(f'0{self.tenant.pk}'), self.tenant)
+        self.assertEqual(cold.stats()['shared_hits'], 1)
+
+        warm.invalidate(f' {self.tenant.pk}')
+        self.assertIsNone(caches['shared'].get(f'tenant:{self.tenant.pk}'))
+
+    def test_tenant_writes_invalidate_the_global_cache(self):
+        tenant_cache.get(f'00{self.tenant.pk}')
+        Tenant.objects.filter(pk=self.tenant.pk).update(name='Renamed')
+        self.tenant.refresh_from_db()
+        self.tenant.save()
+        self.assertEqual(tenant_cache.get(self.tenant.pk).name, 'Renamed')
+        pk = self.tenant.pk
+        self.tenant.delete()
+        self.assertIsNone(tenant_cache.get(f' {pk}'))
+
+
+class LiveStatsTests(TestCase):
+    def setUp(self):
+        self.tenant = seed_tenant('alpha')
+        seed_tenant('beta')
+
+    def reference_stats(self):
+        # The original one-query-per-number computation
+        invoices = Invoice.objects.filter(tenant=self.tenant)
+
+        def total(status):
+            return invoices.filter(status=status).aggregate(total=Sum('total_amount'))['total'] or 0
+
+        monthly = {}
+        for invoice in invoices.filter(status='PAID'):
+            month = invoice.paid_date.strftime('%Y-%m')
+            monthly[month] = monthly.get(month, 0) + invoice.total_amount
+        return {
+            'properties_count': Property.objects.filter(tenant=self.tenant).count(),
+            'clients_count': Client.objects.filter(tenant=self.tenant).count(),
+            'active_contracts_count': Contract.objects.filter(tenant=self.tenant, status='ACTIVE').count(),
+            'total_revenue': total('PAID'),
+            'pending_amount': total('PENDING'),
+            'overdue_amount': total('OVERDUE'),
+            'monthly_revenue': {month: str(value) for month, value in monthly.items()},
+            'property_distribution': dict(
+                Property.objects.filter(tenant=self.tenant).values_list('property_type').annotate(Count('id')).order_by()
+            ),
+        }
+
+    def test_query_count(self):
+        # counts, property distribution, invoices by month
+        with self.assertNumQueries(3):
+            compute_live_stats(self.tenant.pk)
+
+    def test_matches_reference(self):
+        self.assertEqual(compute_live_stats(self.tenant.pk), self.reference_stats())
+
+    def test_empty_tenant(self):
+        tenant = Tenant.objects.create(name='empty', subdomain='empty')
+        stats = compute_live_stats(tenant.pk)
+        self.assertEqual(stats['properties_count'], 0)
+        self.assertEqual(stats['total_revenue'], Decimal('0'))
+        self.assertEqual(stats['monthly_revenue'], {})
+
+
+class DashboardStatsTests(TestCase):
+    def setUp(self):
+        self.tenant = seed_tenant('alpha')
+        self.user = User.objects.create_user('owner', password='password', tenant=self.tenant)
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+
+    def test_rollup_follows_writes(self):
+        invoice = Invoice.objects.filter(tenant=self.tenant, status='PENDING').first()
+        invoice.status = 'PAID'
+        invoice.paid_date = date(2026, 3, 20)
+        invoice.save()
+        Property.objects.filter(tenant=self.tenant).first().delete()
+        self.assertEqual(check_tenant_stats(self.tenant.pk), [])
+
+    def test_stats_is_single_read(self):
+        Invoice.objects.create(
+            tenant=self.tenant, invoice_number='recent', amount=500, due_date=timezone.localdate(),
+            status='PAID', paid_date=timezone.localdate(),
+        )
+        # Warm the tenant cache so only the rollup read is left
+        self.client.get('/api/dashboard/stats/', HTTP_X_TENANT_ID=str(self.tenant.pk))
+        with self.assertNumQueries(1):
+            response = self.client.get('/api/dashboard/stats/', HTTP_X_TENANT_ID=str(self.tenant.pk))
+        self.assertEqual(response.status_code, 200)
+        live = compute_live_stats(self.tenant.pk)
+        self.assertEqual(response.json()['counts']['properties'], live['properties_count'])
+        self.assertEqual(response.json()['financial']['pending_amount'], float(live['pending_amount']))
+        # The chart reads plain numbers
+        month = timezone.localdate().strftime('%Y-%m')
+        self.assertIn(
+            {'month': month, 'revenue': float(live['monthly_revenue'][month])},
+            response.json()['charts']['monthly_revenue'],
+        )
+
+
+class CountingEmailBackend(LocmemEmailBackend):
+    opened = 0
+
+    def open(self):
+        CountingEmailBackend.opened += 1
+        return super().open()
+
+
+class FailingBackend(LocmemBackend):
+    def send_batch(self, notifications):
+        return [('', 'provider unavailable')] * len(notifications)
+
+
+@override_settings(
+    NOTIFICATION_BACKENDS={'EMAIL': 'core.outbox.EmailBackend', 'WHATSAPP': 'core.outbox.LocmemBackend'},
+    EMAIL_BACKEND='core.tests.CountingEmailBackend',
+)
+class NotificationOutboxTests(TestCase):
+    def setUp(self):
+        self.tenant = seed_tenant('alpha')
+        Client.objects.filter(tenant=self.tenant).update(email='client@example.com')
+        self.user = User.objects.create_user('owner', password='password', tenant=self.tenant)
+        self.api = APIClient()
+        self.api.force_authenticate(self.user)
+        LocmemBackend.sent = []
+        CountingEmailBackend.opened = 0
+
+    def create_invoices(self, count):
+        contract = Contract.objects.filter(tenant=self.tenant).first()
+        for i in range(count):
+            response = self.api.post('/api/finance/', {
+                'contract': contract.pk, 'invoice_number': f'OUT-{i}',
+                'amount': '500.00', 'due_date': '2026-06-01',
+            }, HTTP_X_TENANT_ID=str(self.tenant.pk))
+            self.assertEqual(response.status_code, 201)
+
+    def test_create_queues_instead_of_sending(self):
+        self.create_invoices(2)
+        self.assertEqual(len(mail.outbox), 0)
+        self.assertEqual(Notification.objects.filter(status=Notification.Status.PENDING).count(), 4)
+        self.assertTrue(Notification.objects.filter(recipient='whatsapp:+966500000000').exists())
+
+    def test_dispatch_reuses_one_email_connection(self):
+        self.create_invoices(5)
+        Dispatcher().run(once=True)
+        self.assertEqual(len(mail.outbox), 5)
+        self.assertEqual(len(LocmemBackend.sent), 5)
+        self.assertEqual(CountingEmailBackend.opened, 1)
+        self.assertFalse(Notification.objects.exclude(status=Notification.Status.SENT).exists())
+
+    @override_settings(NOTIFICATION_BACKENDS={'EMAIL': 'core.tests.FailingBackend', 'WHATSAPP': 'core.tests.FailingBackend'})
+    def test_failures_back_off_then_give_up(self):
+        self.create_invoices(1)
+        Notification.objects.update(max_attempts=2)
+        Dispatcher().run_batch()
+        notification = Notification.objects.first()
+        self.assertEqual(notification.status, Notification.Status.PENDING)
+        self.assertEqual(notification.last_error, 'provider unavailable')
+        self.assertGreater(notification.run_after, timezone.now())
+
+        Notification.objects.update(run_after=timezone.now())
+        Dispatcher().run_batch()
+        self.assertEqual(Notification.objects.filter(status=Notification.Status.FAILED).count(), 2)
+
+
+class ExportEscapingTests(SimpleTestCase):
+    def test_csv_quotes_formulas(self):
+        rows = [
+            ('=HYPERLINK("http://x","y")', '+cmd|calc', '-2+3', '@SUM(A1)', '\tx', '\rx'),
+            ('Plain', 'عقار', 'a=b', -5, Decimal('-1.50'), None),
+        ]
+        text = ''.join(stream_csv(['a', 'b', 'c', 'd', 'e', 'f'], rows)).lstrip('\ufeff')
+        parsed = list(csv.reader(io.StringIO(text, newline='')))
+        self.assertEqual(parsed[1], ["'" + value for value in rows[0]])
+        # Numbers and text that only contains a sign are left alone
+        self.assertEqual(parsed[2], ['Plain', 'عقار', 'a=b', '-5', '-1.50', ''])
+
+    def test_xlsx_drops_xml_illegal_characters(self):
+        data = b''.join(
+            chunk if isinstance(chunk, bytes) else chunk.encode()
+            for chunk in stream_xlsx(['Name'], [('bad\x00\x0b\x1fname\ufffe',), ('tab\tand\nnewline',)], sheet_name='S\x01')
+        )
+        archive = zipfile.ZipFile(io.BytesIO(data))
+        sheet = ElementTree.fromstring(archive.read('xl/worksheets/sheet1.xml'))
+        texts = [node.text for node in sheet.iter('{http://schemas.openxmlformats.org/spreadsheetml/2006/main}t')]
+        self.assertEqual(texts, ['Name', 'badname', 'tab\tand\nnewline'])
+        ElementTree.fromstring(archive.read('xl/workbook.xml'))
+
+
+@tag('slow')
+@skipUnless(os.environ.get('RUN_SLOW_TESTS'), 'seeds 500k rows; set RUN_SLOW_TESTS=1 to run')
+class ExportMemoryTests(TestCase):
+    ROWS = 500_000
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.tenant = Tenant.objects.create(name='big', subdomain='big')
+        cls.user = User.objects.create_user('owner', password='password', tenant=cls.tenant)
+        Client.objects.bulk_create(
+            (Client(tenant=cls.tenant, name=f'عميل {i}', phone=f'05{i:08d}') for i in range(cls.ROWS)),
+            batch_size=5000,
+        )
+
+    def export_peak(self, output):
+        api = APIClient()
+        api.force_authenticate(self.user)
+        tracemalloc.start()
+        try:
+            response = api.get('/api/clients/export/', {'output': output}, HTTP_X_TENANT_ID=str(self.tenant.pk))
+            rows = size = 0
+            for chunk in response.streaming_content:
+                size += len(chunk)
+                rows += chunk.count(b'\n') if output == 'csv' else 0
+            return tracemalloc.get_traced_memory()[1], rows, size
+        finally:
+            tracemalloc.stop()
+
+    def test_csv_export_memory_is_flat(self):
+        peak, rows, size = self.export_peak('csv')
+        self.assertEqual(rows, self.ROWS + 1)
+        # The CSV itself is ~20 MB; holding it, or the rows, would blow this
+        self.assertGreater(size, 15 * 1024 * 1024)
+        self.assertLess(peak, 8 * 1024 * 1024)
+
+    def test_xlsx_export_memory_is_flat(self):
+        peak, _, size = self.export_peak('xlsx')
+        self.assertGreater(size, 5 * 1024 * 1024)
+        self.assertLess(peak, 8 * 1024 * 1024)
+
+
+CLIENTS_CSV = (
+    'name,phone,email,notes\n'
+    'أحمد,0501111111,ahmed@example.com,\n'
+    'سارة,0502222222,,VIP\n'
+    ',0503333333,,missing name\n'
+    'خالد,0504444444,not-an-email,\n'
+    'منى,0505555555,,\n'
+).encode('utf-8-sig')
+
+
+class CsvImportTests(TestCase):
+    def setUp(self):
+        self.media_root = tempfile.mkdtemp()
+        self.settings_override = override_settings(MEDIA_ROOT=self.media_root)
+        self.settings_override.enable()
+        self.tenant = Tenant.objects.create(name='alpha', subdomain='alpha')
+        self.path = os.path.join(self.media_root, 'clients.csv')
+        with open(self.path, 'wb') as source:
+            source.write(CLIENTS_CSV)
+
+    def tearDown(self):
+        self.settings_override.disable()
+        shutil.rmtree(self.media_root, ignore_errors=True)
+
+    def test_dry_run_reports_rejected_rows(self):
+        report = os.path.join(self.media_root, 'rejected.csv')
+        call_command('import_csv', 'clients', self.path, tenant=self.tenant.pk, dry_run=True, report=report, stdout=open(os.devnull, 'w'))
+        run = ImportRun.objects.get()
+        self.assertEqual((run.status, run.valid_count, run.rejected_count), (ImportRun.Status.DONE, 3, 2))
+        self.assertFalse(Client.objects.exists())
+        with open(report, encoding='utf-8-sig') as rejected:
+            lines = rejected.read().splitlines()
+        self.assertEqual(lines[0], 'row,errors,name,phone,email,notes')
+        self.assertEqual([line.split(',')[0] for line in lines[1:]], ['3', '4'])
+
+    def test_resume_after_failure_continues_from_last_chunk(self):
+        real_process_chunk = imports.process_chunk
+        calls = []
+
+        def failing_second_chunk(*args):
+            calls.append(1)
+            if len(calls) == 2:
+                raise RuntimeError('database went away')
+            return real_process_chunk(*args)
+
+        with mock.patch.object(imports, 'process_chunk', failing_second_chunk):
+            with self.assertRaises(Exception):
+                call_command('import_csv', 'clients', self.path, tenant=self.tenant.pk, chunk_size=2, stdout=open(os.devnull, 'w'))
+        run = ImportRun.objects.get()
+        self.assertEqual((run.status, run.rows_processed), (ImportRun.Status.FAILED, 2))
+        self.assertEqual(Client.objects.count(), 2)
+
+        call_command('import_csv', resume=run.pk, stdout=open(os.devnull, 'w'))
+        run.refresh_from_db()
+        self.assertEqual((run.status, run.rows_processed, run.valid_count, run.rejected_count), (ImportRun.Status.DONE, 5, 3, 2))
+        self.assertEqual(
+            sorted(Client.objects.filter(tenant=self.tenant).values_list('name', flat=True)),
+            sorted(['أحمد', 'سارة', 'منى']),
+        )
+        self.assertEqual(check_tenant_stats(self.tenant.pk), [])
+
+    def test_api_upload_runs_in_background(self):
+        user = User.objects.create_user('owner', password='password', tenant=self.tenant)
+        api = APIClient()
+        api.force_authenticate(user)
+        headers = {'HTTP_X_TENANT_ID': str(self.tenant.pk)}
+        response = api.post('/api/imports/', {
+            'kind': 'CLIENTS', 'file': SimpleUploadedFile('clients.csv', CLIENTS_CSV), 'chunk_size': 2,
+        }, format='multipart', **headers)
+        self.assertEqual(response.status_code, 201)
+        self.assertEqual(Client.objects.count(), 0)
+
+        Worker().run(once=True)
+        run = api.get(f"/api/imports/{response.json()['id']}/", **headers).json()
+        self.assertEqual((run['status'], run['valid_count'], run['rejected_count']), ('DONE', 3, 2))
+        self.assertEqual(Client.objects.filter(tenant=self.tenant).count(), 3)
+
+        response = api.get(f"/api/imports/{run['id']}/rejected/", **headers)
+        lines = b''.join(response.streaming_content).decode('utf-8-sig').splitlines()
+        self.assertEqual(len(lines), 3)
+
+
+class StatusSweepTests(TestCase):
+    def setUp(self):
+        # Each seeded tenant has four PENDING invoices due in March 2026
+        # and two ACTIVE contracts ending on 2026-12-31
+        self.tenant = seed_tenant('alpha')
+        self.other = seed_tenant('beta')
+        self.events = []
+        statuses_swept.connect(self.record, dispatch_uid='test_record_sweep')
+        self.addCleanup(statuses_swept.disconnect, dispatch_uid='test_record_sweep')
+
+    def record(self, sender, signal, **event):
+        self.events.append(event)
+
+    def test_sweeps_in_chunks_with_one_event_per_tenant(self):
+        sweep_statuses(today=date(2027, 1, 1), chunk_size=3)
+
+        self.assertFalse(Invoice.objects.filter(status='PENDING').exists())
+        self.assertEqual(Invoice.objects.filter(status='OVERDUE').count(), 16)
+        self.assertFalse(Contract.objects.filter(status='ACTIVE').exists())
+        self.assertEqual(self.events, [
+            {
+                'tenant_id': tenant.pk, 'overdue_invoices': 4, 'overdue_amount': Decimal('4602.32'),
+                'overdue_days': [date(2026, 3, 1)],
+                'expired_contracts': 2,
+            }
+            for tenant in (self.tenant, self.other)
+        ])
+        self.assertEqual(check_tenant_stats(self.tenant.pk), [])
+        self.assertEqual(check_tenant_stats(self.other.pk), [])
+
+        self.events = []
+        self.assertEqual(sweep_statuses(today=date(2027, 1, 1)), [])
+        self.assertEqual(self.events, [])
+
+    def test_leaves_rows_that_are_not_due(self):
+        sweep_statuses(today=date(2026, 3, 1))
+        self.assertEqual(Invoice.objects.filter(status='PENDING').count(), 8)
+        self.assertEqual(Contract.objects.filter(status='ACTIVE').count(), 4)
+        self.assertEqual(self.events, [])
+
+
+class QueryBudgetTests(QueryBudgetMixin, TestCase):
+    def setUp(self):
+        self.tenant = seed_tenant('alpha')
+        client = Client.objects.filter(tenant=self.tenant).first()
+        Client.objects.bulk_create(Client(tenant=self.tenant, name=f'Client {i}', phone='0500000000') for i in range(25))
+        properties = Property.objects.bulk_create(
+            Property(
+                tenant=self.tenant, title=f'Unit {i}', property_type='APARTMENT',
+                city='Riyadh', address='Street', area=100, price=1000,
+            )
+            for i in range(25)
+        )
+        PropertyImage.objects.bulk_create(
+            PropertyImage(property=prop, image=f'properties/gallery/{prop.pk}-{n}.jpg')
+            for prop in properties for n in range(2)
+        )
+        contracts = Contract.objects.bulk_create(
+            Contract(
+                tenant=self.tenant, property=prop, client=client,
+                start_date=date(2026, 1, 1), end_date=date(2026, 12, 31),
+                monthly_amount=1000, total_amount=12000,
+            )
+            for prop in properties
+        )
+        for contract in contracts:
+            Invoice.objects.create(tenant=self.tenant, contract=contract, amount=1000, due_date=date(2026, 1, 1))
+        self.property = properties[0]
+
+        self.user = User.objects.create_user('owner', password='password', tenant=self.tenant)
+        self.api = APIClient()
+        self.api.force_authenticate(self.user)
+        self.headers = {'HTTP_X_TENANT_ID': str(self.tenant.pk)}
+        tenant_cache.get(self.tenant.pk)
+
+    def test_list_endpoints(self):
+        # Every list and detail also reads its change versions (core.versions)
+        for url, budget in [
+            ('/api/properties/', 2),
+            ('/api/clients/', 2),
+            ('/api/contracts/', 2),
+            ('/api/finance/', 2),
+        ]:
+            with self.subTest(url=url):
+                self.assertQueryBudget(self.api, url, budget, **self.headers)
+
+    def test_detail_endpoints(self):
+        for url, budget in [
+            (f'/api/properties/{self.property.pk}/', 3),
+            ('/api/auth/me/', 0),
+            ('/api/dashboard/stats/', 1),
+        ]:
+            with self.subTest(url=url):
+                self.assertQueryBudget(self.api, url, budget, paginated=False, **self.headers)
+
+    def test_expanded_labels(self):
+        invoice = self.api.get('/api/finance/?page_size=1', **self.headers).json()['results'][0]
+        contract = Contract.objects.select_related('client', 'property').get(pk=invoice['contract'])
+        self.assertEqual(invoice['client_name'], contract.client.name)
+        self.assertEqual(invoice['property_title'], contract.property.title)
+        row = self.api.get('/api/contracts/?page_size=1', **self.headers).json()['results'][0]
+        contract = Contract.objects.select_related('client', 'property').get(pk=row['id'])
+        self.assertEqual((row['client_name'], row['property_title']), (contract.client.name, contract.property.title))
+
+
+class RequestMetricsTests(TestCase):
+    def setUp(self):
+        request_metrics.reset()
+        self.addCleanup(request_metrics.reset)
+        self.tenant = seed_tenant('alpha')
+        self.user = User.objects.create_user('owner', password='password', tenant=self.tenant)
+        self.staff = User.objects.create_user('staff', password='password', is_staff=True)
+        self.api = APIClient()
+
+    def test_server_timing_and_prometheus_output(self):
+        self.api.force_authenticate(self.user)
+        tenant_cache.get(self.tenant.pk)
+        response = self.api.get('/api/clients/', HTTP_X_TENANT_ID=str(self.tenant.pk))
+        # Change versions and the list
+        self.assertRegex(response['Server-Timing'], r'^app;dur=[\d.]+, db;dur=[\d.]+;desc="2 queries"$')
+
+        self.assertEqual(self.api.get('/api/metrics').status_code, 403)
+        self.api.force_authenticate(self.staff)
+        response = self.api.get('/api/metrics')
+        self.assertEqual(response.status_code, 200)
+        self.assertTrue(response['Content-Type'].startswith('text/plain; version=0.0.4'))
+        body = response.content.decode()
+        self.assertIn('aqario_http_requests_total{route="client-list",method="GET",status="200"} 1', body)
+        self.assertIn('aqario_http_request_duration_seconds_bucket{route="client-list",le="+Inf"} 1', body)
+        self.assertIn('aqario_http_request_latency_seconds{route="client-list",quantile="0.99"}', body)
+        self.assertIn(f'aqario_db_queries_total{{route="client-list",tenant="{self.tenant.pk}"}} 2', body)
+
+    @override_settings(METRICS_TOKEN='scrape-me')
+    def test_scraper_token(self):
+        self.assertEqual(self.api.get('/api/metrics', HTTP_AUTHORIZATION='Bearer scrape-me').status_code, 200)
+        self.assertEqual(self.api.get('/api/metrics', HTTP_AUTHORIZATION='Bearer wrong').status_code, 401)
+
+    def test_rolling_quantiles(self):
+        for ms in range(1, 2001):
+            request_metrics.observe('route', 'GET', 200, None, ms / 1000, 0, 0.0)
+        # Only the last METRICS_WINDOW (1024) requests count
+        self.assertEqual(request_metrics.quantiles('route'), {0.5: 1.489, 0.95: 1.949, 0.99: 1.990})
+
+
+class SyntheticDataTests(TestCase):
+    def test_generated_tenants_are_consistent(self):
+        today = date(2026, 3, 15)
+        counts = Generator(seed=3, today=today).run(tenants=3, properties=40)
+
+        self.assertEqual(counts['tenants'], 3)
+        self.assertEqual(counts['properties'], 40)
+        self.assertEqual(counts['invoices'], Invoice.objects.count())
+        sizes = [Property.objects.filter(tenant__subdomain=f'demo{i}').count() for i in (1, 2, 3)]
+        self.assertEqual(sizes, sorted(sizes, reverse=True))
+
+        self.assertFalse(Invoice.objects.filter(due_date__gt=today).exists())
+        self.assertFalse(Contract.objects.filter(status='ACTIVE', end_date__lt=today).exists())
+        self.assertFalse(Invoice.objects.exclude(tenant_id=F('contract__tenant_id')).exists())
+        for tenant in Tenant.objects.all():
+            # New invoices continue the generated numbering, and the
+            # dashboard counters match the rows
+            self.assertEqual(tenant.invoice_sequence.next_value, tenant.invoices.count() + 1)
+            self.assertEqual(check_tenant_stats(tenant.pk), [])
+        self.assertTrue(User.objects.filter(username='demo1_owner', role=User.Role.OWNER).exists())
+
+    def test_same_seed_same_data(self):
+        def snapshot():
+            return list(Invoice.objects.order_by('tenant__subdomain', 'invoice_number').values_list('invoice_number', 'total_amount', 'status'))
+
+        Generator(seed=5, today=date(2026, 3, 15)).run(tenants=2, properties=10)
+        first = snapshot()
+        Tenant.objects.all().delete()
+        Generator(seed=5, today=date(2026, 3, 15)).run(tenants=2, properties=10)
+        self.assertEqual(snapshot(), first)
+
+
+class TokenClaimsTests(TestCase):
+    def setUp(self):
+        caches['default'].clear()
+        self.tenant = seed_tenant('alpha')
+        self.other = seed_tenant('beta')
+        self.user = User.objects.create_user('owner', password='password', tenant=self.tenant, role=User.Role.OWNER)
+        self.api = APIClient()
+
+    def obtain(self, password='password'):
+        response = self.api.post('/api/auth/token/', {'username': 'owner', 'password': password}, format='json')
+        self.assertEqual(response.status_code, 200)
+        return response.json()
+
+    def get(self, url, access, **headers):
+        return self.api.get(url, HTTP_AUTHORIZATION=f'Bearer {access}', **headers)
+
+    def test_claims_and_tenant_from_token(self):
+        tokens = self.obtain()
+        claims = AccessToken(tokens['access'])
+        self.assertEqual((claims['tenant_id'], claims['role'], claims['ver']), (self.tenant.pk, 'OWNER', 0))
+
+        self.get('/api/clients/', tokens['access'])
+        # Tenant and token version are cached; only the change versions and
+        # the list query are left
+        with self.assertNumQueries(2):
+            response = self.get('/api/clients/', tokens['access'])
+        listed = {row['id'] for row in response.json()['results']}
+        self.assertEqual(listed, set(Client.objects.filter(tenant=self.tenant).values_list('id', flat=True)))
+
+        response = self.get('/api/clients/', tokens['access'], HTTP_X_TENANT_ID=str(self.other.pk))
+        self.assertEqual(response.status_code, 403)
+        self.assertEqual(self.get('/api/auth/me/', tokens['access']).json()['username'], 'owner')
+
+    def test_changing_the_user_revokes_tokens(self):
+        tokens = self.obtain()
+        self.assertEqual(self.get('/api/clients/', tokens['access']).status_code, 200)
+
+        self.user.set_password('changed')
+        self.user.save()
+        self.assertEqual(self.get('/api/clients/', tokens['access']).status_code, 401)
+        response = self.api.post('/api/auth/token/refresh/', {'refresh': tokens['refresh']}, format='json')
+        self.assertEqual(response.status_code, 401)
+
+        tokens = self.obtain('changed')
+        self.assertEqual(self.get('/api/clients/', tokens['access']).status_code, 200)
+        self.user.revoke_tokens()
+        self.assertEqual(self.get('/api/clients/', tokens['access']).status_code, 401)
+
+        # Saving unrelated fields keeps tokens valid
+        tokens = self.obtain('changed')
+        self.user.first_name = 'Sara'
+        self.user.save()
+        self.assertEqual(self.get('/api/clients/', tokens['access']).status_code, 200)
+
+    def test_tokens_without_claims_load_the_user(self):
+        access = RefreshToken.for_user(self.user).access_token
+        response = self.get('/api/clients/', access, HTTP_X_TENANT_ID=str(self.other.pk))
+        self.assertEqual(response.status_code, 403)
+        self.assertEqual(self.get('/api/clients/', access).status_code, 200)
+
+
+class SparseFieldsTests(TestCase):
+    def setUp(self):
+        self.tenant = seed_tenant('alpha')
+        Property.objects.filter(tenant=self.tenant).update(description='Long description')
+        self.user = User.objects.create_user('owner', password='password', tenant=self.tenant)
+        self.api = APIClient()
+        self.api.force_authenticate(self.user)
+
+    def get(self, url, **params):
+        response = self.api.get(url, params, HTTP_X_TENANT_ID=str(self.tenant.pk))
+        self.assertEqual(response.status_code, 200, response.content[:300])
+        return response.json()
+
+    def test_list_rows_match_the_detail_serializer(self):
+        for url, left_out in [
+            ('/api/properties/', {'description', 'images'}),
+            ('/api/clients/', {'notes'}),
+            ('/api/contracts/', {'notes'}),
+            ('/api/finance/', {'notes'}),
+        ]:
+            with self.subTest(url=url):
+                row = self.get(url)['results'][0]
+                detail = self.get(f"{url}{row['id']}/")
+                self.assertEqual(set(detail) - set(row), left_out)
+                self.assertEqual(row, {name: detail[name] for name in row})
+
+    def test_fields_and_expand(self):
+        rows = self.get('/api/finance/', fields='id,total_amount', expand='contract')['results']
+        self.assertEqual(set(rows[0]), {'id', 'total_amount', 'contract'})
+        self.assertEqual(rows[0]['contract']['client_name'], 'Client')
+        self.assertNotIn('notes', rows[0]['contract'])
+
+        prop = self.get('/api/properties/', expand='images')['results'][0]
+        self.assertEqual(prop['images'], [])
+        self.assertEqual(set(self.get(f"/api/properties/{prop['id']}/", fields='title')), {'title'})
+        contract = self.get('/api/contracts/', expand='client,property')['results'][0]
+        self.assertEqual((contract['client']['name'], contract['property']['city']), ('Client', 'Riyadh'))
+
+        for params in ({'fields': 'id,nope'}, {'expand': 'tenant'}):
+            response = self.api.get('/api/clients/', params, HTTP_X_TENANT_ID=str(self.tenant.pk))
+            self.assertEqual(response.status_code, 400)
+
+    def test_lookup_follows_next(self):
+        # What the invoice form loads: every ACTIVE contract, page by page
+        expected = set(Contract.objects.filter(tenant=self.tenant, status='ACTIVE').values_list('id', flat=True))
+        page = self.get('/api/contracts/', status='ACTIVE', fields='id,property_title,client_name', page_size=1)
+        rows = page['results']
+        while page['next']:
+            response = self.api.get(page['next'], HTTP_X_TENANT_ID=str(self.tenant.pk))
+            page = response.json()
+            rows += page['results']
+        self.assertEqual({row['id'] for row in rows}, expected)
+        self.assertEqual(len(rows), len(expected))
+        self.assertEqual(set(rows[0]), {'id', 'property_title', 'client_name'})
+
+    def test_fast_renderer_matches_json_renderer(self):
+        data = {
+            'amount': Decimal('10.50'), 'when': timezone.now(), 'day': date(2026, 1, 1),
+            'label': gettext_lazy('Paid'), 'counts': {1: 'one'}, 'tags': {'a'}, 'text': 'عقار',
+        }
+        self.assertEqual(FastJSONRenderer().render(data), JSONRenderer().render(data))
+
+
+class ConditionalGetTests(TestCase):
+    def setUp(self):
+        self.tenant = seed_tenant('alpha')
+        self.other = seed_tenant('beta')
+        self.user = User.objects.create_user('owner', password='password', tenant=self.tenant)
+        self.api = APIClient()
+        self.api.force_authenticate(self.user)
+        self.headers = {'HTTP_X_TENANT_ID': str(self.tenant.pk)}
+        tenant_cache.get(self.tenant.pk)
+
+    def etag(self, url):
+        response = self.api.get(url, **self.headers)
+        self.assertEqual(response.status_code, 200)
+        self.assertTrue(response['ETag'].startswith('W/"'))
+        self.assertIn('no-cache', response['Cache-Control'])
+        return response['ETag']
+
+    def revalidate(self, url, etag):
+        return self.api.get(url, HTTP_IF_NONE_MATCH=etag, **self.headers).status_code
+
+    def test_not_modified_skips_the_queryset(self):
+        client = Client.objects.filter(tenant=self.tenant).first()
+        for url in ('/api/clients/', f'/api/clients/{client.pk}/', '/api/properties/', '/api/finance/?status=PENDING'):
+            with self.subTest(url=url):
+                etag = self.etag(url)
+                # Only the change versions are read
+                with self.assertNumQueries(1):
+                    response = self.api.get(url, HTTP_IF_NONE_MATCH=f'"other", {etag}', **self.headers)
+                self.assertEqual(response.status_code, 304)
+                self.assertEqual(response.content, b'')
+                self.assertEqual(response['ETag'], etag)
+
+        self.assertNotEqual(self.etag('/api/clients/'), self.etag('/api/clients/?fields=id'))
+
+    def test_writes_change_the_etag(self):
+        clients, contracts, invoices = '/api/clients/', '/api/contracts/', '/api/finance/'
+        etags = {url: self.etag(url) for url in (clients, contracts, invoices)}
+
+        # Another tenant's writes don't matter
+        Client.objects.filter(tenant=self.other).first().save()
+        self.assertEqual(self.revalidate(clients, etags[clients]), 304)
+
+        client = Client.objects.filter(tenant=self.tenant).first()
+        self.api.patch(f'/api/clients/{client.pk}/', {'name': 'Renamed'}, format='json', **self.headers)
+        # Contracts and invoices show the client's name too
+        for url in (clients, contracts, invoices):
+            self.assertEqual(self.revalidate(url, etags[url]), 200)
+
+        expanded = f'{contracts}?expand=property'
+        etag = self.etag(expanded)
+        PropertyImage.objects.create(property=Property.objects.filter(tenant=self.tenant).first(), image='properties/gallery/x.jpg')
+        self.assertEqual(self.revalidate(expanded, etag), 200)
+
+        etag = self.etag(invoices)
+        sweep_statuses(today=date(2030, 1, 1))
+        self.assertEqual(self.revalidate(invoices, etag), 200)
+
+        etag = self.etag(clients)
+        client.delete()
+        self.assertEqual(self.revalidate(clients, etag), 200)
+
+    @override_settings(CHANGE_VERSION_CACHE={'ALIAS': 'default', 'TTL': 60})
+    def test_cached_versions(self):
+        caches['default'].clear()
+        etag = self.etag('/api/properties/')
+        with self.assertNumQueries(0):
+            self.assertEqual(self.revalidate('/api/properties/', etag), 304)
+
+        Property.objects.filter(tenant=self.tenant).first().save()
+        self.assertEqual(self.revalidate('/api/properties/', etag), 200)
+
+
+class RevenueSeriesTests(TestCase):
+    def setUp(self):
+        self.tenant = seed_tenant('alpha')
+        seed_tenant('beta')
+        self.user = User.objects.create_user('owner', password='password', tenant=self.tenant)
+        self.api = APIClient()
+        self.api.force_authenticate(self.user)
+        self.invoice_total = Invoice.objects.filter(tenant=self.tenant).first().total_amount
+
+    def daily_rows(self):
+        return sorted(DailyRevenue.objects.filter(tenant=self.tenant).values_list(
+            'basis', 'day', 'status', 'property_type', 'amount', 'invoices',
+        ))
+
+    def assertDailyInStep(self):
+        stored = self.daily_rows()
+        revenue.rebuild_daily_revenue(self.tenant.pk)
+        self.assertEqual(stored, self.daily_rows())
+
+    def test_daily_table_matches_the_invoices(self):
+        for granularity in revenue.GRANULARITIES:
+            for basis in DailyRevenue.Basis:
+                for split in (None, *revenue.SPLITS):
+                    with self.subTest(granularity=granularity, basis=basis, split=split):
+                        args = (self.tenant.pk, date(2025, 12, 20), date(2026, 6, 10), granularity, basis, split)
+                        with mock.patch.object(revenue, 'DIRECT_MAX_DAYS', 10 ** 6):
+                            direct = revenue.revenue_series(*args)
+                        with mock.patch.object(revenue, 'DIRECT_MAX_DAYS', 0):
+                            self.assertEqual(revenue.revenue_series(*args), direct)
+
+    def test_zero_filled_periods(self):
+        series = revenue.revenue_series(self.tenant.pk, date(2025, 11, 1), date(2026, 4, 30), 'quarter')
+        self.assertEqual(series['periods'], [date(2025, 10, 1), date(2026, 1, 1), date(2026, 4, 1)])
+        self.assertEqual(series['series'][0]['amounts'], [0, 8 * self.invoice_total, 0])
+
+        series = revenue.revenue_series(self.tenant.pk, date(2026, 1, 1), date(2026, 1, 31), 'week', 'due', 'status')
+        self.assertEqual(series['periods'][0], date(2025, 12, 29))
+        self.assertEqual([row['key'] for row in series['series']], ['PAID'])
+        self.assertEqual(series['series'][0]['invoices'], [4, 0, 0, 0, 0])
+
+    def test_daily_table_follows_writes(self):
+        self.assertDailyInStep()
+        invoice = Invoice.objects.filter(tenant=self.tenant, status='PENDING').first()
+        invoice.status = 'PAID'
+        invoice.paid_date = date(2026, 3, 20)
+        invoice.save()
+        self.assertDailyInStep()
+
+        prop = Property.objects.get(tenant=self.tenant, property_type='SHOP')
+        prop.property_type = 'LAND'
+        prop.save()
+        self.assertDailyInStep()
+        self.assertTrue(DailyRevenue.objects.filter(tenant=self.tenant, property_type='LAND').exists())
+
+        Contract.objects.filter(tenant=self.tenant).first().delete()
+        # Only the swept invoices' days are re-aggregated
+        with mock.patch.object(revenue, 'rebuild_daily_revenue') as rebuild:
+            sweep_statuses(today=date(2030, 1, 1))
+        rebuild.assert_not_called()
+        self.assertDailyInStep()
+
+    def test_bulk_updates_refresh_old_and_new_days(self):
+        headers = {'HTTP_X_TENANT_ID': str(self.tenant.pk)}
+        invoice = Invoice.objects.filter(tenant=self.tenant, status='PAID').first()
+        prop = Property.objects.filter(tenant=self.tenant).first()
+        with mock.patch.object(revenue, 'rebuild_daily_revenue') as rebuild:
+            response = self.api.patch('/api/finance/bulk/', [
+                {'id': invoice.pk, 'paid_date': '2026-05-05', 'due_date': '2026-05-01'},
+            ], format='json', **headers)
+        self.assertEqual(response.status_code, 200)
+        rebuild.assert_not_called()
+        self.assertDailyInStep()
+
+        with mock.patch.object(revenue, 'rebuild_daily_revenue') as rebuild:
+            response = self.api.patch('/api/properties/bulk/', [
+                {'id': prop.pk, 'property_type': 'LAND'},
+            ], format='json', **headers)
+        self.assertEqual(response.status_code, 200)
+        rebuild.assert_not_called()
+        self.assertDailyInStep()
+        self.assertTrue(DailyRevenue.objects.filter(tenant=self.tenant, property_type='LAND').exists())
+
+    def test_endpoint(self):
+        headers = {'HTTP_X_TENANT_ID': str(self.tenant.pk)}
+        response = self.api.get('/api/dashboard/revenue/', {
+            'granularity': 'month', 'start': '2021-01-01', 'end': '2026-12-31', 'split': 'property_type',
+        }, **headers)
+        self.assertEqual(response.status_code, 200)
+        body = response.json()
+        self.assertEqual(len(body['periods']), 72)
+        self.assertEqual([row['key'] for row in body['series']], ['APARTMENT', 'SHOP', 'VILLA'])
+        self.assertAlmostEqual(body['total'], float(8 * self.invoice_total))
+
+        # Twelve months up to today by default
+        self.assertEqual(len(self.api.get('/api/dashboard/revenue/', **headers).json()['periods']), 12)
+        for params in ({'granularity': 'year'}, {'start': '2026-02-01', 'end': '2026-01-01'}, {'granularity': 'day', 'start': '1990-01-01'}):
+            response = self.api.get('/api/dashboard/revenue/', params, **headers)
+            self.assertEqual(response.status_code, 400, params)
@@ -0,0 +1,158 @@
+"""
+JWTs that carry the user's tenant and role, so requests can be
+authenticated without loading the User row.
+
+Tokens from TokenObtainPairView get tenant_id, role, is_staff,
+is_superuser and ``ver`` (User.token_version) claims. TenantJWTAuthentication
+trusts them, checking only that ``ver`` is still the user's current token
+version. That lookup goes through a cache, so a request costs no query
+while the version is cached. Changing a user's password, role, tenant or
+flags bumps the version and revokes every token issued before.
+
+With the default per-process cache other workers notice a revocation
+within TOKEN_VERSION_CACHE['TTL'] seconds; point ALIAS at a shared cache
+(e.g. Redis) to make it immediate everywhere.
+"""
+from django.conf import settings
+from django.core.cache import caches
+from django.db import transaction
+from django.utils.functional import cached_property
+from django.utils.translation import gettext_lazy as _
+from rest_framework.exceptions import AuthenticationFailed, PermissionDenied
+from rest_framework_simplejwt.authentication import JWTAuthentication
+from rest_framework_simplejwt.exceptions import InvalidToken
+from rest_framework_simplejwt.models import TokenUser
+from rest_framework_simplejwt.serializers import TokenObtainPairSerializer, TokenRefreshSerializer
+from rest_framework_simplejwt.settings import api_settings
+from rest_framework_simplejwt.tokens import RefreshToken
+
+from .models import User
+from .tenant_cache import tenant_cache
+
+VERSION_CLAIM = 'ver'
+
+# Cached for users that are inactive or gone; matches no token
+_REVOKED = -1
+
+
+def _cache():
+    return caches[settings.TOKEN_VERSION_CACHE['ALIAS']]
+
+
+def _key(user_id):
+    return f'token_version:{user_id}'
+
+
+def current_token_version(user_id):
+    """
+    The version a token of ``user_id`` must carry to be valid
+    """
+    cache = _cache()
+    version = cache.get(_key(user_id))
+    if version is None:
+        row = User.objects.filter(pk=user_id).values_list('token_version', 'is_active').first()
+        version = row[0] if row is not None and row[1] else _REVOKED
+        cache.set(_key(user_id), version, settings.TOKEN_VERSION_CACHE['TTL'])
+    return version
+
+
+def forget_token_version(user_id):
+    """
+    Drop the cached version now, and again once the transaction commits in
+    case a concurrent request re-cached the old value in between
+    """
+    _cache().delete(_key(user_id))
+    transaction.on_commit(lambda: _cache().delete(_key(user_id)))
+
+
+def claims_for(user):
+    return {
+        'username': user.username,
+        'tenant_id': user.tenant_id,
+        'role': user.role,
+        'is_staff': user.is_staff,
+        'is_superuser': user.is_superuser,
+        VERSION_CLAIM: user.token_version,
+    }
+
+
+class TenantRefreshToken(RefreshToken):
+    @classmethod
+    def for_user(cls, user):
+        token = super().for_user(user)
+        for claim, value in claims_for(user).items():
+            token[claim] = value
+        return token
+
+
+class TenantTokenObtainPairSerializer(TokenObtainPairSerializer):
+    token_class = TenantRefreshToken
+
+
+class TenantTokenRefreshSerializer(TokenRefreshSerializer):
+    def validate(self, attrs):
+        # Access tokens copy the refresh token's claims; don't hand out new
+        # ones for a revoked refresh token
+        refresh = self.token_class(attrs['refresh'])
+        if VERSION_CLAIM in refresh and refresh[VERSION_CLAIM] != current_token_version(refresh[api_settings.USER_ID_CLAIM]):
+            raise InvalidToken(_('Token has been revoked'))
+        return super().validate(attrs)
+
+
+class ClaimsUser(TokenUser):
+    """
+    request.user built from token claims. Has no database row behind it:
+    load the User if you need to change it.
+    """
+
+    @cached_property
+    def tenant_id(self):
+        return self.token.get('tenant_id')
+
+    @cached_property
+    def role(self):
+        return self.token.get('role')
+
+    @cached_property
+    def tenant(self):
+        return tenant_cache.get(self.tenant_id) if self.tenant_id is not None else None
+
+
+class TenantJWTAuthentication(JWTAuthentication):
+    """
+    JWTAuthentication that trusts the token's claims instead of loading the
+    user, and takes request.tenant from the token.
+
+    An X-Tenant-ID header naming another tenant is refused; only superusers
+    without a tenant of their own may pick one with it. Tokens issued before
+    the claims existed still work, at the cost of loading the user.
+    """
+
+    def authenticate(self, request):
+        result = super().authenticate(request)
+        if result is None:
+            return None
+        user, token = result
+        self.bind_tenant(request, user)
+        return user, token
+
+    def get_user(self, validated_token):
+        if VERSION_CLAIM not in validated_token:
+            return super().get_user(validated_token)
+        user = ClaimsUser(validated_token)
+        if validated_token[VERSION_CLAIM] != current_token_version(user.id):
+            raise AuthenticationFailed(_('Token has been revoked'), code='token_revoked')
+        return user
+
+    def bind_tenant(self, request, user):
+        requested = getattr(request, 'tenant', None)
+        if user.tenant_id is None:
+            if not user.is_superuser:
+                request._request.tenant = None
+            return
+        if requested is not None and requested.pk != user.tenant_id:
+            raise PermissionDenied(_('This token is not valid for the requested tenant.'))
+        tenant = tenant_cache.get(user.tenant_id)
+        if tenant is None:
+            raise AuthenticationFailed(_('Tenant not found'), code='tenant_not_found')
+        request._request.tenant = tenant
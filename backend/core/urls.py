@@ -1,5 +1,5 @@
 from django.urls import path
-from .views import RegisterView, UserDetailView
+from .views import RegisterView, UserDetailView, TenantCacheStatsView
 from rest_framework_simplejwt.views import (
     TokenObtainPairView,
     TokenRefreshView,
@@ -10,4 +10,5 @@ urlpatterns = [
     path('me/', UserDetailView.as_view(), name='user-detail'),
     path('token/', TokenObtainPairView.as_view(), name='token_obtain_pair'),
     path('token/refresh/', TokenRefreshView.as_view(), name='token_refresh'),
+    path('tenant-cache/', TenantCacheStatsView.as_view(), name='tenant-cache-stats'),
 ]
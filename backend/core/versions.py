@@ -0,0 +1,172 @@
+"""
+Per-tenant change versions and conditional GETs.
+
+Every write to a tracked model bumps the tenant's ChangeVersion row for
+that model, in the same transaction. ConditionalGetMixin derives a weak
+ETag for list and detail responses from the versions of the models the
+response reads, and answers a matching If-None-Match with 304 before the
+queryset runs or anything is serialized.
+
+Writes that skip the model signals (queryset.update(), bulk_create) must
+send core.bulk.bulk_saved or call bump() themselves.
+"""
+import hashlib
+
+from django.conf import settings
+from django.core.cache import caches
+from django.db import transaction
+from django.db.models import F
+from django.utils.cache import patch_cache_control, patch_vary_headers
+from django.utils.http import parse_etags
+from rest_framework import status
+from rest_framework.response import Response
+
+from clients.models import Client
+from contracts.models import Contract
+from finance.models import Invoice
+from properties.models import Property, PropertyImage
+from .models import ChangeVersion
+
+# model -> path from a row to its tenant's id
+TRACKED = {
+    Property: 'tenant_id',
+    PropertyImage: 'property__tenant_id',
+    Client: 'tenant_id',
+    Contract: 'tenant_id',
+    Invoice: 'tenant_id',
+}
+
+
+def _cache():
+    alias = settings.CHANGE_VERSION_CACHE['ALIAS']
+    return caches[alias] if alias else None
+
+
+def _key(tenant_id, label):
+    return f'change_version:{tenant_id}:{label}'
+
+
+def tenant_of(instance):
+    """
+    The tenant id of a tracked row, without a query when it's on the row
+    """
+    path = TRACKED[type(instance)]
+    if '__' not in path:
+        return getattr(instance, path)
+    name, rest = path.split('__', 1)
+    relation = instance._meta.get_field(name)
+    if relation.is_cached(instance):
+        return getattr(getattr(instance, name), rest)
+    return relation.related_model.objects.filter(
+        pk=getattr(instance, relation.attname),
+    ).values_list(rest, flat=True).first()
+
+
+def bump(tenant_id, *models):
+    """
+    Move the versions of ``models`` on for ``tenant_id``
+    """
+    if tenant_id is None or not models:
+        return
+    labels = [model._meta.label_lower for model in models]
+    rows = ChangeVersion.objects.filter(tenant_id=tenant_id, model__in=labels)
+    if rows.update(version=F('version') + 1) < len(labels):
+        ChangeVersion.objects.bulk_create(
+            [ChangeVersion(tenant_id=tenant_id, model=label) for label in labels],
+            ignore_conflicts=True,
+        )
+        # Versions only have to change, so counting the labels that
+        # already had a row twice is harmless
+        rows.update(version=F('version') + 1)
+
+    cache = _cache()
+    if cache is not None:
+        keys = [_key(tenant_id, label) for label in labels]
+        cache.delete_many(keys)
+        transaction.on_commit(lambda: cache.delete_many(keys))
+
+
+def current_versions(tenant_id, models):
+    """
+    The versions of ``models`` for ``tenant_id``, in order
+    """
+    labels = [model._meta.label_lower for model in models]
+    keys = {label: _key(tenant_id, label) for label in labels}
+    cache = _cache()
+    found = cache.get_many(keys.values()) if cache is not None else {}
+    missing = [label for label in labels if keys[label] not in found]
+    if missing:
+        rows = dict(ChangeVersion.objects.filter(tenant_id=tenant_id, model__in=missing).values_list('model', 'version'))
+        loaded = {keys[label]: rows.get(label, 0) for label in missing}
+        if cache is not None:
+            cache.set_many(loaded, settings.CHANGE_VERSION_CACHE['TTL'])
+        found.update(loaded)
+    return tuple(found[keys[label]] for label in labels)
+
+
+# Signal receivers, connected in core.signals
+
+def on_save(sender, instance, raw=False, **kwargs):
+    if not raw:
+        bump(tenant_of(instance), sender)
+
+
+def on_delete(sender, instance, **kwargs):
+    bump(tenant_of(instance), sender)
+
+
+def on_bulk_save(sender, instances, **kwargs):
+    for tenant_id in {tenant_of(instance) for instance in instances}:
+        bump(tenant_id, sender)
+
+
+def on_statuses_swept(sender, tenant_id, overdue_invoices, expired_contracts, **kwargs):
+    bump(tenant_id, *([Invoice] if overdue_invoices else []), *([Contract] if expired_contracts else []))
+
+
+class ConditionalGetMixin:
+    """
+    Weak ETags and 304s for list and retrieve.
+
+    ``etag_models`` lists every tracked model the serializer reads from,
+    including the relations behind labels and ?expand=. The ETag also
+    covers the path, query string, host and media type, so each page,
+    filter and field selection has its own.
+    """
+    etag_models = ()
+
+    def list(self, request, *args, **kwargs):
+        return self.conditional(super().list, request, *args, **kwargs)
+
+    def retrieve(self, request, *args, **kwargs):
+        return self.conditional(super().retrieve, request, *args, **kwargs)
+
+    def get_etag(self, request):
+        tenant = getattr(request, 'tenant', None)
+        if tenant is None or not self.etag_models:
+            return None
+        versions = current_versions(tenant.pk, self.etag_models)
+        key = '\n'.join(map(str, (
+            tenant.pk, versions, request.get_host(), request.get_full_path(), request.accepted_media_type,
+        )))
+        return f'W/"{hashlib.sha1(key.encode()).hexdigest()}"'
+
+    def conditional(self, handler, request, *args, **kwargs):
+        etag = self.get_etag(request)
+        if etag is None:
+            return handler(request, *args, **kwargs)
+
+        # If-None-Match uses the weak comparison
+        strong = etag.removeprefix('W/')
+        if strong in {tag.removeprefix('W/') for tag in parse_etags(request.headers.get('If-None-Match', ''))}:
+            response = Response(status=status.HTTP_304_NOT_MODIFIED)
+        else:
+            response = handler(request, *args, **kwargs)
+            if response.status_code != status.HTTP_200_OK:
+                return response
+
+        response['ETag'] = etag
+        # Let browsers store the response but revalidate it every time
+        patch_cache_control(response, private=True, no_cache=True)
+        patch_vary_headers(response, ('Authorization', 'X-Tenant-ID'))
+        return response
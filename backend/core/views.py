@@ -1,7 +1,11 @@
+from django.http import HttpResponse
 from rest_framework import generics, permissions
 from rest_framework.response import Response
+from rest_framework.settings import api_settings
 from rest_framework.views import APIView
+from .metrics import CanReadMetrics, MetricsTokenAuthentication, request_metrics
 from .serializers import UserSerializer, RegisterSerializer
+from .tenant_cache import tenant_cache
 from django.contrib.auth import get_user_model
 
 User = get_user_model()
@@ -17,4 +21,31 @@ class UserDetailView(generics.RetrieveUpdateAPIView):
     permission_classes = [permissions.IsAuthenticated]
 
     def get_object(self):
-        return self.request.user
+        user = self.request.user
+        if not isinstance(user, User):
+            # Built from token claims (core.tokens); the profile needs the row
+            user = User.objects.get(pk=user.pk)
+        if user.tenant_id is not None:
+            # Nested in the response; served from the tenant cache
+            # instead of a query per request
+            user.tenant = tenant_cache.get(user.tenant_id)
+        return user
+
+class TenantCacheStatsView(APIView):
+    """
+    Hit/miss counters of the tenant resolution cache
+    """
+    permission_classes = [permissions.IsAdminUser]
+
+    def get(self, request):
+        return Response(tenant_cache.stats())
+
+class MetricsView(APIView):
+    """
+    Request metrics in the Prometheus text format
+    """
+    authentication_classes = [MetricsTokenAuthentication, *api_settings.DEFAULT_AUTHENTICATION_CLASSES]
+    permission_classes = [CanReadMetrics]
+
+    def get(self, request):
+        return HttpResponse(request_metrics.render(), content_type='text/plain; version=0.0.4; charset=utf-8')
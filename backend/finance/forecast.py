@@ -0,0 +1,177 @@
+"""
+Projected receivables per month for a tenant.
+
+ACTIVE contracts are read as columns (id, start, end, rent)
+with one values_list() query and laid out as a contracts x months matrix
+with NumPy: each cell is the rent plus tax the contract falls due for that
+month. Months that already have an invoice are left to the unpaid
+invoices, which are counted in the month they are expected to be paid.
+
+Scenario parameters:
+
+    renewal_probability  chance that a contract is renewed at the same rent
+                         for another term of the same length when it ends;
+                         the n-th renewal counts with weight p**n
+    collection_delay     months between a payment falling due and the cash
+                         coming in
+
+Amounts are computed in integer cents with tax rounded like billing does.
+"""
+from decimal import Decimal
+
+import numpy as np
+from django.utils import timezone
+
+from contracts.models import Contract
+from .models import Invoice
+
+UNPAID = ('PENDING', 'OVERDUE')
+
+# Contracts per block of the matrix; bounds memory to a few MB per array
+CHUNK_ROWS = 16384
+
+
+def month_index(day):
+    return day.year * 12 + day.month - 1
+
+
+def _months(days):
+    # month_index() over a column of dates; datetime64[M] counts months
+    # from 1970-01. Done here rather than in SQL, where SQLite would
+    # extract the parts one row at a time in Python.
+    return np.asarray(days, dtype='datetime64[M]').astype(np.int64) + 1970 * 12
+
+
+def _cents(values):
+    return np.rint(np.asarray(values, dtype=np.float64) * 100).astype(np.int64)
+
+
+def _columns(rows, count):
+    rows = list(rows)
+    return list(zip(*rows)) if rows else [()] * count
+
+
+def with_tax(cents, tax_rate):
+    """
+    ``cents`` plus tax at ``tax_rate`` percent, rounded half up as in
+    finance.billing
+    """
+    basis_points = int(Decimal(str(tax_rate)) * 100)
+    return cents + (cents * basis_points + 5000) // 10000
+
+
+def load_contracts(tenant_id):
+    """
+    ACTIVE contracts of ``tenant_id`` as arrays: ids, first and last month
+    (month_index) and monthly rent in cents
+    """
+    rows = Contract.objects.filter(tenant_id=tenant_id, status='ACTIVE').values_list(
+        'id', 'start_date', 'end_date', 'monthly_amount',
+    ).order_by('id')
+    ids, start, end, rent = _columns(rows, 4)
+    return np.asarray(ids, dtype=np.int64), _months(start), _months(end), _cents(rent)
+
+
+def _invoiced(tenant_id, since):
+    """
+    (contract id, month) pairs from the month of ``since`` on that already
+    have an invoice
+    """
+    rows = Invoice.objects.filter(
+        tenant_id=tenant_id, contract__isnull=False, billing_period__gte=since.replace(day=1),
+    ).values_list('contract_id', 'billing_period')
+    contract_ids, periods = _columns(rows, 2)
+    return np.asarray(contract_ids, dtype=np.int64), _months(periods)
+
+
+def _unpaid(tenant_id):
+    rows = Invoice.objects.filter(tenant_id=tenant_id, status__in=UNPAID).values_list('due_date', 'total_amount')
+    days, totals = _columns(rows, 2)
+    return _months(days), _cents(totals)
+
+
+def project(first, last, due, horizon, renewal_probability=0.0, invoiced=None):
+    """
+    Monthly sums of the contracts x months matrix for contracts running
+    from ``first`` to ``last`` (month indexes) and owing ``due`` cents a
+    month. Returns (contracted, renewals) over ``horizon``.
+
+    ``invoiced`` is (row, column) cells to leave out.
+    """
+    contracted = np.zeros(len(horizon), dtype=np.int64)
+    renewals = np.zeros(len(horizon), dtype=np.float64)
+    skip = np.zeros((len(first), len(horizon)), dtype=bool) if invoiced is not None else None
+    if skip is not None:
+        skip[invoiced] = True
+
+    for offset in range(0, len(first), CHUNK_ROWS):
+        block = slice(offset, offset + CHUNK_ROWS)
+        start, end, amount = first[block, None], last[block, None], due[block, None]
+        running = (horizon >= start) & (horizon <= end)
+        if skip is not None:
+            running &= ~skip[block]
+        contracted += np.where(running, amount, 0).sum(axis=0)
+
+        if renewal_probability > 0:
+            term = end - start + 1
+            after = horizon - end
+            renewed = after > 0
+            # How many renewals it takes to reach each month past the end
+            count = np.where(renewed, -(-after // term), 0)
+            weight = np.where(renewed, renewal_probability ** count, 0.0)
+            renewals += (weight * amount).sum(axis=0)
+    return contracted, renewals
+
+
+def _money(cents):
+    return [Decimal(int(value)).scaleb(-2) for value in np.rint(cents)]
+
+
+def forecast(tenant_id, months=12, renewal_probability=0.0, collection_delay=0, today=None):
+    """
+    {'months', 'contracted', 'renewals', 'outstanding', 'collections',
+    'totals', 'contracts'} for the ``months`` months from the current one.
+
+    ``contracted`` and ``renewals`` are what falls due each month,
+    ``outstanding`` the unpaid invoices expected in and ``collections``
+    the cash expected in once ``collection_delay`` is applied.
+    """
+    today = today or timezone.localdate()
+    current = month_index(today)
+    horizon = current + np.arange(months)
+
+    ids, first, last, rent = load_contracts(tenant_id)
+    due = with_tax(rent, Invoice._meta.get_field('tax_rate').default)
+
+    invoiced_ids, invoiced_months = _invoiced(tenant_id, today)
+    columns = invoiced_months - current
+    # Invoices of contracts that aren't ACTIVE have no row to clear
+    known = np.isin(invoiced_ids, ids) & (columns < months)
+    cells = (np.searchsorted(ids, invoiced_ids[known]), columns[known])
+    contracted, renewals = project(first, last, due, horizon, renewal_probability, cells)
+
+    # Unpaid invoices come in collection_delay months after falling due,
+    # and the ones already late no earlier than this month
+    unpaid_months, unpaid_cents = _unpaid(tenant_id)
+    arrives = np.maximum(unpaid_months + collection_delay - current, 0)
+    in_horizon = arrives < months
+    outstanding = np.bincount(arrives[in_horizon], weights=unpaid_cents[in_horizon], minlength=months)
+
+    scheduled = contracted + renewals
+    # bincount gives integers when there is nothing unpaid
+    collections = outstanding.astype(np.float64)
+    if collection_delay < months:
+        collections[collection_delay:] += scheduled[:months - collection_delay]
+
+    result = {
+        'contracted': _money(contracted),
+        'renewals': _money(renewals),
+        'outstanding': _money(outstanding),
+        'collections': _money(collections),
+    }
+    return {
+        'months': [f'{index // 12:04d}-{index % 12 + 1:02d}' for index in horizon.tolist()],
+        **result,
+        'totals': {name: sum(values, Decimal('0.00')) for name, values in result.items()},
+        'contracts': len(ids),
+    }
@@ -0,0 +1,88 @@
+import tempfile
+from django.core.files import File
+from django.core.files.base import ContentFile
+from core.jobs import register, enqueue
+from core.versions import bump
+from .billing import generate_invoices, parse_period
+from .models import Invoice, InvoiceBatch
+from .pdf_batch import write_merged_pdf, write_zip
+from .pdf_generator import generate_invoice_pdf
+
+
+def queue_invoice_pdf(invoice):
+    """
+    Queue the invoice's PDF for rendering, unless it already is
+    """
+    job = enqueue('render_invoice_pdf', key=f'invoice:{invoice.pk}', invoice_id=invoice.pk)
+    if job is not None:
+        Invoice.objects.filter(pk=invoice.pk).update(pdf_status=Invoice.PdfStatus.PENDING)
+        bump(invoice.tenant_id, Invoice)
+        invoice.pdf_status = Invoice.PdfStatus.PENDING
+    return job
+
+
+@register('render_invoice_pdf')
+def render_invoice_pdf(invoice_id):
+    invoice = Invoice.objects.select_related('contract__client').filter(pk=invoice_id).first()
+    if invoice is None:
+        return
+    Invoice.objects.filter(pk=invoice_id).update(pdf_status=Invoice.PdfStatus.RENDERING)
+    bump(invoice.tenant_id, Invoice)
+
+    try:
+        pdf_data = generate_invoice_pdf(invoice)
+        pdf_filename = f'invoice_{invoice.invoice_number}.pdf'
+        invoice.pdf_file.save(pdf_filename, ContentFile(pdf_data), save=False)
+    except Exception:
+        Invoice.objects.filter(pk=invoice_id).update(pdf_status=Invoice.PdfStatus.FAILED)
+        bump(invoice.tenant_id, Invoice)
+        raise
+
+    # Update only the PDF columns so concurrent edits to the invoice survive
+    Invoice.objects.filter(pk=invoice_id).update(
+        pdf_file=invoice.pdf_file.name,
+        pdf_status=Invoice.PdfStatus.READY,
+    )
+    bump(invoice.tenant_id, Invoice)
+
+
+def queue_invoice_batch(batch):
+    return enqueue('render_invoice_batch', key=f'invoice_batch:{batch.pk}', batch_id=batch.pk)
+
+
+@register('render_invoice_batch')
+def render_invoice_batch(batch_id):
+    batch = InvoiceBatch.objects.filter(pk=batch_id).first()
+    if batch is None:
+        return
+    InvoiceBatch.objects.filter(pk=batch_id).update(status=InvoiceBatch.Status.RENDERING)
+
+    # Rendered inline: pool processes can't start pools of their own
+    write = write_merged_pdf if batch.output == InvoiceBatch.Output.MERGED else write_zip
+    try:
+        with tempfile.TemporaryFile() as output:
+            write(batch.invoice_ids, output)
+            output.seek(0)
+            batch.file.save(f'batch_{batch.pk}_{batch.filename}', File(output), save=False)
+    except Exception:
+        InvoiceBatch.objects.filter(pk=batch_id).update(status=InvoiceBatch.Status.FAILED)
+        raise
+
+    InvoiceBatch.objects.filter(pk=batch_id).update(file=batch.file.name, status=InvoiceBatch.Status.READY)
+
+
+def queue_invoice_generation(period, tenant_id=None):
+    """
+    Queue a billing run for ``period``, unless the same run is already waiting
+    """
+    return enqueue(
+        'generate_invoices',
+        key=f'billing:{tenant_id or "all"}:{period:%Y-%m}',
+        period=f'{period:%Y-%m}',
+        tenant_id=tenant_id,
+    )
+
+
+@register('generate_invoices')
+def generate_invoices_job(period, tenant_id=None):
+    generate_invoices(parse_period(period), tenant_id=tenant_id)
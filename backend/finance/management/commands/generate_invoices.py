@@ -0,0 +1,31 @@
+from django.core.management.base import BaseCommand, CommandError
+from django.utils import timezone
+from finance.billing import BATCH_SIZE, billing_period, generate_invoices, parse_period
+
+
+class Command(BaseCommand):
+    help = "Generate the month's invoices for every ACTIVE contract that doesn't have one yet"
+
+    def add_arguments(self, parser):
+        parser.add_argument('--period', help='Month to bill (YYYY-MM), the current month by default')
+        parser.add_argument('--tenant', type=int, help='Only contracts of this tenant')
+        parser.add_argument('--batch-size', type=int, default=BATCH_SIZE)
+        parser.add_argument('--dry-run', action='store_true', help='Only count the contracts that would be billed')
+
+    def handle(self, *args, **options):
+        if options['period']:
+            try:
+                period = parse_period(options['period'])
+            except ValueError:
+                raise CommandError('--period must look like YYYY-MM')
+        else:
+            period = billing_period(timezone.localdate())
+
+        count = generate_invoices(
+            period,
+            tenant_id=options['tenant'],
+            batch_size=options['batch_size'],
+            dry_run=options['dry_run'],
+        )
+        verb = 'Would bill' if options['dry_run'] else 'Billed'
+        self.stdout.write(self.style.SUCCESS(f'{verb} {count} contract(s) for {period:%Y-%m}'))
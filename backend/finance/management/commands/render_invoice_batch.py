@@ -0,0 +1,43 @@
+from datetime import datetime
+from django.core.management.base import BaseCommand, CommandError
+from finance.models import Invoice
+from finance.pdf_batch import write_zip, write_merged_pdf
+
+
+class Command(BaseCommand):
+    help = 'Render many invoice PDFs at once into a ZIP archive or one merged PDF'
+
+    def add_arguments(self, parser):
+        parser.add_argument('output', help='Path of the .zip or .pdf file to write')
+        parser.add_argument('--tenant', type=int, help='Only invoices of this tenant')
+        parser.add_argument('--month', help='Only invoices due in this month (YYYY-MM)')
+        parser.add_argument('--status', help='Only invoices with this status')
+        parser.add_argument('--merged', action='store_true', help='Write a single merged PDF instead of a ZIP')
+        parser.add_argument('--processes', type=int, default=4, help='Render processes for ZIP output, 0 renders inline')
+        parser.add_argument('--chunk-size', type=int, default=25)
+
+    def handle(self, *args, **options):
+        invoices = Invoice.objects.order_by('tenant_id', 'invoice_number')
+        if options['tenant']:
+            invoices = invoices.filter(tenant_id=options['tenant'])
+        if options['status']:
+            invoices = invoices.filter(status=options['status'])
+        if options['month']:
+            try:
+                month = datetime.strptime(options['month'], '%Y-%m')
+            except ValueError:
+                raise CommandError('--month must look like YYYY-MM')
+            invoices = invoices.filter(due_date__year=month.year, due_date__month=month.month)
+
+        invoice_ids = invoices.values_list('pk', flat=True).iterator(chunk_size=2000)
+        with open(options['output'], 'wb') as output:
+            if options['merged']:
+                count = write_merged_pdf(invoice_ids, output)
+            else:
+                count = write_zip(
+                    invoice_ids, output,
+                    processes=options['processes'],
+                    chunk_size=options['chunk_size'],
+                )
+
+        self.stdout.write(self.style.SUCCESS(f"Rendered {count} invoice(s) to {options['output']}"))
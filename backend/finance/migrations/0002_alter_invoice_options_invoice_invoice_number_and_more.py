@@ -0,0 +1,61 @@
+# Generated by Django 5.2.18 on 2026-10-18 09:11
+
+from decimal import Decimal
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('finance', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.AlterModelOptions(
+            name='invoice',
+            options={'ordering': ['-created_at']},
+        ),
+        migrations.AddField(
+            model_name='invoice',
+            name='invoice_number',
+            field=models.CharField(default='', max_length=50, unique=True),
+            preserve_default=False,
+        ),
+        migrations.AddField(
+            model_name='invoice',
+            name='notes',
+            field=models.TextField(blank=True),
+        ),
+        migrations.AddField(
+            model_name='invoice',
+            name='paid_date',
+            field=models.DateField(blank=True, null=True),
+        ),
+        migrations.AddField(
+            model_name='invoice',
+            name='tax_amount',
+            field=models.DecimalField(decimal_places=2, default=Decimal('0'), editable=False, max_digits=12),
+            preserve_default=False,
+        ),
+        migrations.AddField(
+            model_name='invoice',
+            name='tax_rate',
+            field=models.DecimalField(decimal_places=2, default=15.0, help_text='Tax percentage', max_digits=5),
+        ),
+        migrations.AddField(
+            model_name='invoice',
+            name='total_amount',
+            field=models.DecimalField(decimal_places=2, default=Decimal('0'), editable=False, max_digits=12),
+            preserve_default=False,
+        ),
+        migrations.AddField(
+            model_name='invoice',
+            name='updated_at',
+            field=models.DateTimeField(auto_now=True),
+        ),
+        migrations.AlterField(
+            model_name='invoice',
+            name='pdf_file',
+            field=models.FileField(blank=True, null=True, upload_to='invoices/'),
+        ),
+    ]
@@ -0,0 +1,23 @@
+# Generated by Django 5.2.18 on 2026-10-18 09:14
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('contracts', '0004_tenant_created_index'),
+        ('core', '0002_tenantstats'),
+        ('finance', '0002_alter_invoice_options_invoice_invoice_number_and_more'),
+    ]
+
+    operations = [
+        migrations.AlterModelOptions(
+            name='invoice',
+            options={'ordering': ['-created_at', '-id']},
+        ),
+        migrations.AddIndex(
+            model_name='invoice',
+            index=models.Index(fields=['tenant', 'created_at', 'id'], name='invoice_tenant_created_idx'),
+        ),
+    ]
@@ -0,0 +1,25 @@
+# Generated by Django 5.2.18 on 2026-10-18 09:18
+
+from django.db import migrations, models
+
+
+def mark_rendered(apps, schema_editor):
+    # Invoices rendered before the queue existed already have their file
+    Invoice = apps.get_model('finance', 'Invoice')
+    Invoice.objects.exclude(pdf_file='').exclude(pdf_file__isnull=True).update(pdf_status='READY')
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('finance', '0003_tenant_created_index'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='invoice',
+            name='pdf_status',
+            field=models.CharField(choices=[('PENDING', 'Pending'), ('RENDERING', 'Rendering'), ('READY', 'Ready'), ('FAILED', 'Failed')], default='PENDING', editable=False, max_length=20),
+        ),
+        migrations.RunPython(mark_rendered, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,24 @@
+# Generated by Django 5.2.18 on 2026-10-18 09:46
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('contracts', '0004_tenant_created_index'),
+        ('core', '0005_importrun'),
+        ('finance', '0004_invoice_pdf_status'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='invoice',
+            name='billing_period',
+            field=models.DateField(blank=True, editable=False, null=True),
+        ),
+        migrations.AddConstraint(
+            model_name='invoice',
+            constraint=models.UniqueConstraint(fields=('contract', 'billing_period'), name='invoice_contract_period_uniq'),
+        ),
+    ]
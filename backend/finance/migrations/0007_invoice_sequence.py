@@ -0,0 +1,37 @@
+# Generated by Django 5.2.18 on 2026-10-18 09:52
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('contracts', '0005_status_sweep_index'),
+        ('core', '0005_importrun'),
+        ('finance', '0006_status_sweep_index'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='InvoiceSequence',
+            fields=[
+                ('tenant', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='invoice_sequence', serialize=False, to='core.tenant')),
+                ('prefix', models.CharField(blank=True, default='INV-', max_length=20)),
+                ('number_format', models.CharField(default='{prefix}{number:06d}', help_text='Python format string with {prefix}, {number} and {year}', max_length=50)),
+                ('next_value', models.PositiveBigIntegerField(default=1)),
+                ('block_size', models.PositiveIntegerField(default=50)),
+                ('gap_free', models.BooleanField(default=False)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+            ],
+        ),
+        migrations.AlterField(
+            model_name='invoice',
+            name='invoice_number',
+            field=models.CharField(blank=True, max_length=50),
+        ),
+        migrations.AddConstraint(
+            model_name='invoice',
+            constraint=models.UniqueConstraint(fields=('tenant', 'invoice_number'), name='invoice_tenant_number_uniq'),
+        ),
+    ]
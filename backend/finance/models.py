@@ -1,7 +1,10 @@
-from django.db import models
+from decimal import Decimal, ROUND_HALF_UP
+from django.db import models, transaction
 from core.models import Tenant
 from contracts.models import Contract
 
+CENT = Decimal('0.01')
+
 
 class Invoice(models.Model):
     STATUS_CHOICES = [
@@ -11,29 +14,118 @@ class Invoice(models.Model):
         ('CANCELLED', 'Cancelled'),
     ]
 
+    class PdfStatus(models.TextChoices):
+        PENDING = 'PENDING', 'Pending'
+        RENDERING = 'RENDERING', 'Rendering'
+        READY = 'READY', 'Ready'
+        FAILED = 'FAILED', 'Failed'
+
     tenant = models.ForeignKey(Tenant, on_delete=models.CASCADE, related_name='invoices')
     contract = models.ForeignKey(Contract, on_delete=models.CASCADE, related_name='invoices', null=True, blank=True)
-    invoice_number = models.CharField(max_length=50, unique=True)
+    # Assigned from the tenant's InvoiceSequence when left blank
+    invoice_number = models.CharField(max_length=50, blank=True)
     amount = models.DecimalField(max_digits=12, decimal_places=2)
     tax_rate = models.DecimalField(max_digits=5, decimal_places=2, default=15.00, help_text="Tax percentage")
     tax_amount = models.DecimalField(max_digits=12, decimal_places=2, editable=False)
     total_amount = models.DecimalField(max_digits=12, decimal_places=2, editable=False)
     due_date = models.DateField()
     paid_date = models.DateField(null=True, blank=True)
+    # First day of the month a generated recurring invoice bills for
+    billing_period = models.DateField(null=True, blank=True, editable=False)
     status = models.CharField(max_length=20, choices=STATUS_CHOICES, default='PENDING')
     pdf_file = models.FileField(upload_to='invoices/', blank=True, null=True)
+    pdf_status = models.CharField(max_length=20, choices=PdfStatus.choices, default=PdfStatus.PENDING, editable=False)
     notes = models.TextField(blank=True)
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
 
     class Meta:
-        ordering = ['-created_at']
+        ordering = ['-created_at', '-id']
+        indexes = [
+            # Matches the keyset used by core.pagination.TenantCursorPagination
+            models.Index(fields=['tenant', 'created_at', 'id'], name='invoice_tenant_created_idx'),
+            # Lets core.sweep find PENDING invoices past their due date
+            models.Index(fields=['status', 'due_date'], name='invoice_status_due_idx'),
+            # Short-range revenue series read straight from the invoices (core.revenue)
+            models.Index(fields=['tenant', 'paid_date'], name='invoice_tenant_paid_idx'),
+            models.Index(fields=['tenant', 'due_date'], name='invoice_tenant_due_idx'),
+        ]
+        constraints = [
+            models.UniqueConstraint(fields=['tenant', 'invoice_number'], name='invoice_tenant_number_uniq'),
+            # One generated invoice per contract and month, however often
+            # or concurrently the billing run is repeated
+            models.UniqueConstraint(fields=['contract', 'billing_period'], name='invoice_contract_period_uniq'),
+        ]
 
-    def save(self, *args, **kwargs):
-        # Auto-calculate tax and total
-        self.tax_amount = (self.amount * self.tax_rate) / 100
+    def compute_totals(self):
+        # Auto-calculate tax and total, rounded to cents like a numeric(12, 2)
+        # column would so SQLite stores the same value as Postgres
+        tax = (Decimal(self.amount) * Decimal(str(self.tax_rate))) / 100
+        self.tax_amount = tax.quantize(CENT, rounding=ROUND_HALF_UP)
         self.total_amount = self.amount + self.tax_amount
-        super().save(*args, **kwargs)
+
+    def save(self, *args, **kwargs):
+        self.compute_totals()
+        if self.invoice_number:
+            return super().save(*args, **kwargs)
+        from .numbering import number_invoices
+        # Gap-free numbers are only used up if the invoice is saved too
+        with transaction.atomic():
+            number_invoices([self])
+            super().save(*args, **kwargs)
 
     def __str__(self):
         return f"Invoice #{self.invoice_number} - {self.total_amount} ({self.status})"
+
+
+class InvoiceSequence(models.Model):
+    """
+    Source of a tenant's invoice numbers. Processes reserve ``block_size``
+    numbers at a time (finance.numbering), so numbers are unique but may
+    skip; with ``gap_free`` every number is taken inside the transaction
+    that saves its invoice, one creator at a time.
+    """
+    tenant = models.OneToOneField(Tenant, on_delete=models.CASCADE, primary_key=True, related_name='invoice_sequence')
+    prefix = models.CharField(max_length=20, default='INV-', blank=True)
+    number_format = models.CharField(
+        max_length=50, default='{prefix}{number:06d}',
+        help_text="Python format string with {prefix}, {number} and {year}",
+    )
+    next_value = models.PositiveBigIntegerField(default=1)
+    block_size = models.PositiveIntegerField(default=50)
+    gap_free = models.BooleanField(default=False)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    def format(self, number, year):
+        return self.number_format.format(prefix=self.prefix, number=number, year=year)
+
+    def __str__(self):
+        return f"{self.tenant} invoice numbers from {self.next_value}"
+
+
+class InvoiceBatch(models.Model):
+    """
+    Invoice PDFs requested together that are too many to render inside
+    the request (InvoiceViewSet.batch_pdf); a background job renders them
+    into ``file``
+    """
+    Status = Invoice.PdfStatus
+
+    class Output(models.TextChoices):
+        ZIP = 'zip', 'ZIP of PDFs'
+        MERGED = 'merged', 'Merged PDF'
+
+    tenant = models.ForeignKey(Tenant, on_delete=models.CASCADE, related_name='invoice_batches')
+    output = models.CharField(max_length=10, choices=Output.choices, default=Output.ZIP)
+    invoice_ids = models.JSONField(default=list)
+    status = models.CharField(max_length=20, choices=Status.choices, default=Status.PENDING)
+    file = models.FileField(upload_to='invoice_batches/', blank=True, null=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    @property
+    def filename(self):
+        return 'invoices.pdf' if self.output == self.Output.MERGED else 'invoices.zip'
+
+    def __str__(self):
+        return f"{len(self.invoice_ids)} invoices as {self.output} ({self.status})"
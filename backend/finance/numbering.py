@@ -0,0 +1,156 @@
+import re
+import threading
+from collections import defaultdict
+
+from django.db import models, transaction
+from django.db.models.functions import Cast, Substr
+from django.utils import timezone
+
+from .models import Invoice, InvoiceSequence
+
+_lock = threading.Lock()
+
+# tenant_id -> [sequence, next number, end] of the block this process has
+# reserved; only committed reservations are put here
+_blocks = {}
+
+# Numbers looked up per query when checking which are already in use
+CHECK_BATCH = 500
+
+# Sequence settings a reserved block was formatted with
+SETTINGS_FIELDS = ('prefix', 'number_format', 'gap_free')
+
+
+def _last_number(tenant_id):
+    """
+    Highest number among the tenant's invoices that look like the default
+    '{prefix}{number:06d}' format, or 0
+    """
+    prefix = InvoiceSequence._meta.get_field('prefix').default
+    return Invoice.objects.filter(
+        tenant_id=tenant_id, invoice_number__regex=rf'^{re.escape(prefix)}[0-9]{{1,18}}$'
+    ).aggregate(
+        last=models.Max(Cast(Substr('invoice_number', len(prefix) + 1), models.BigIntegerField()))
+    )['last'] or 0
+
+
+def sequence_for_update(tenant_id):
+    """
+    The tenant's sequence row, locked for the current transaction and
+    created on first use to continue after the tenant's existing invoices
+    """
+    sequence = InvoiceSequence.objects.select_for_update().filter(pk=tenant_id).first()
+    if sequence is None:
+        InvoiceSequence.objects.get_or_create(
+            tenant_id=tenant_id,
+            defaults={'next_value': _last_number(tenant_id) + 1},
+        )
+        sequence = InvoiceSequence.objects.select_for_update().get(pk=tenant_id)
+    return sequence
+
+
+def _publish(tenant_id, sequence, start, end):
+    with _lock:
+        _blocks[tenant_id] = [sequence, start, end]
+
+
+def forget(tenant_id):
+    """
+    Drop this process's block, e.g. after the tenant's format changed
+    """
+    with _lock:
+        _blocks.pop(tenant_id, None)
+
+
+def _drop_if_stale(tenant_id):
+    """
+    Drop this process's block if the tenant's numbering settings changed
+    since it was reserved (another process handled the change)
+    """
+    with _lock:
+        block = _blocks.get(tenant_id)
+    if block is None:
+        return
+    cached = tuple(getattr(block[0], field) for field in SETTINGS_FIELDS)
+    if InvoiceSequence.objects.filter(pk=tenant_id).values_list(*SETTINGS_FIELDS).first() != cached:
+        with _lock:
+            if _blocks.get(tenant_id) is block:
+                del _blocks[tenant_id]
+
+
+def _reserve(tenant_id, count):
+    year = timezone.localdate().year
+    _drop_if_stale(tenant_id)
+    with _lock:
+        block = _blocks.get(tenant_id)
+        if block is not None and block[2] - block[1] >= count:
+            sequence, start = block[0], block[1]
+            block[1] += count
+            return [sequence.format(number, year) for number in range(start, start + count)]
+
+    with transaction.atomic():
+        sequence = sequence_for_update(tenant_id)
+        size = count if sequence.gap_free else max(count, sequence.block_size)
+        start = sequence.next_value
+        sequence.next_value += size
+        sequence.save(update_fields=['next_value', 'updated_at'])
+        if size > count:
+            transaction.on_commit(lambda: _publish(tenant_id, sequence, start + count, start + size))
+    return [sequence.format(number, year) for number in range(start, start + count)]
+
+
+def _in_use(tenant_id, numbers):
+    taken = set()
+    for i in range(0, len(numbers), CHECK_BATCH):
+        taken.update(Invoice.objects.filter(
+            tenant_id=tenant_id, invoice_number__in=numbers[i:i + CHECK_BATCH]
+        ).values_list('invoice_number', flat=True))
+    return taken
+
+
+def take_numbers(tenant_id, count, exclude=()):
+    """
+    ``count`` new, formatted invoice numbers for the tenant.
+
+    Numbers come from the block this process reserved earlier, without
+    locking anything; a primary-key read of the sequence's settings drops
+    the block once another process has changed the prefix, format or
+    gap-free mode. When it runs out the sequence row is locked just
+    long enough to move it past a new block (hi/lo); inside a caller's
+    transaction the rest of that block becomes usable once the transaction
+    commits, so a rollback never hands out numbers another process may
+    also get.
+
+    Gap-free tenants never use blocks: their numbers are taken under the
+    row lock in the caller's transaction, so they are only used up if the
+    invoices saving them commit.
+
+    Numbers clients typed in can be ones the sequence reaches later. Those
+    already saved, and those in ``exclude``, are passed over, at the cost
+    of one indexed lookup per call.
+    """
+    exclude = set(exclude)
+    numbers = []
+    while len(numbers) < count:
+        candidates = [number for number in _reserve(tenant_id, count - len(numbers)) if number not in exclude]
+        taken = _in_use(tenant_id, candidates)
+        numbers += [number for number in candidates if number not in taken]
+    return numbers
+
+
+def number_invoices(invoices):
+    """
+    Fill in the blank invoice numbers, taking each tenant's numbers at once
+    and passing over the numbers given to the others
+    """
+    pending = defaultdict(list)
+    given = defaultdict(set)
+    for invoice in invoices:
+        if invoice.invoice_number:
+            given[invoice.tenant_id].add(invoice.invoice_number)
+        else:
+            pending[invoice.tenant_id].append(invoice)
+    for tenant_id, tenant_invoices in pending.items():
+        numbers = take_numbers(tenant_id, len(tenant_invoices), exclude=given[tenant_id])
+        for invoice, number in zip(tenant_invoices, numbers):
+            invoice.invoice_number = number
@@ -0,0 +1,112 @@
+import zipfile
+from collections import deque
+
+from reportlab.platypus import PageBreak
+
+from core.export import ChunkBuffer
+from core.pool import call, process_pool
+from .models import Invoice
+from .pdf_generator import generate_invoice_pdf, get_template
+
+
+def _load(invoice_ids):
+    invoices = Invoice.objects.select_related('contract__client').in_bulk(invoice_ids)
+    return [invoices[pk] for pk in invoice_ids if pk in invoices]
+
+
+def render_chunk(invoice_ids):
+    """
+    Render a chunk of invoices with this process's shared template.
+    Returns [(invoice_number, pdf_bytes), ...] in the given order.
+    """
+    return [(invoice.invoice_number, generate_invoice_pdf(invoice)) for invoice in _load(invoice_ids)]
+
+
+def _chunks(ids, size):
+    chunk = []
+    for pk in ids:
+        chunk.append(pk)
+        if len(chunk) >= size:
+            yield chunk
+            chunk = []
+    if chunk:
+        yield chunk
+
+
+def render_invoices(invoice_ids, processes=0, chunk_size=25):
+    """
+    Yield (invoice_number, pdf_bytes) for ``invoice_ids`` in order.
+
+    With ``processes`` > 0 chunks are rendered across a process pool. At most
+    two chunks per process are in flight, so memory stays bounded no matter
+    how many invoices are rendered.
+    """
+    if not processes:
+        for chunk in _chunks(invoice_ids, chunk_size):
+            yield from render_chunk(chunk)
+        return
+
+    pool = process_pool(processes, initializer='finance.pdf_generator.get_template')
+    try:
+        pending = deque()
+        for chunk in _chunks(invoice_ids, chunk_size):
+            pending.append(pool.submit(call, 'finance.pdf_batch.render_chunk', chunk))
+            if len(pending) >= processes * 2:
+                yield from pending.popleft().result()
+        while pending:
+            yield from pending.popleft().result()
+    finally:
+        pool.shutdown(wait=True, cancel_futures=True)
+
+
+def write_zip(invoice_ids, output, **options):
+    """
+    Write one PDF per invoice into a ZIP archive on ``output``, which may be
+    a non-seekable stream. Returns the number of invoices written.
+    """
+    count = 0
+    # PDFs are already compressed; deflating them again only costs CPU
+    with zipfile.ZipFile(output, 'w', compression=zipfile.ZIP_STORED) as archive:
+        for invoice_number, pdf_data in render_invoices(invoice_ids, **options):
+            archive.writestr(f'invoice_{invoice_number}.pdf', pdf_data)
+            count += 1
+    return count
+
+
+def stream_zip(invoice_ids, **options):
+    """
+    Like write_zip, but yields the archive bytes as each PDF is added,
+    for use as a StreamingHttpResponse body
+    """
+    buffer = ChunkBuffer()
+    with zipfile.ZipFile(buffer, 'w', compression=zipfile.ZIP_STORED) as archive:
+        for invoice_number, pdf_data in render_invoices(invoice_ids, **options):
+            archive.writestr(f'invoice_{invoice_number}.pdf', pdf_data)
+            yield from buffer.drain()
+    yield from buffer.drain()
+
+
+def write_merged_pdf(invoice_ids, output, chunk_size=200):
+    """
+    Render all invoices into a single PDF, one invoice per page group.
+    Returns the number of invoices written.
+
+    A single document can't be split across processes, so this runs in the
+    calling process. Invoices are loaded ``chunk_size`` at a time, but
+    ReportLab keeps every page of a document until it is saved, so memory
+    grows with the number of invoices: InvoiceViewSet.batch_pdf renders
+    large batches in a background job rather than inside the request.
+    """
+    template = get_template()
+    story = []
+    count = 0
+    for chunk in _chunks(invoice_ids, chunk_size):
+        for invoice in _load(chunk):
+            if count:
+                story.append(PageBreak())
+            story.extend(template.story(invoice))
+            count += 1
+
+    doc = template.new_document(output)
+    doc.build(story)
+    return count
@@ -1,13 +1,96 @@
+import re
+from string import Formatter
+
 from rest_framework import serializers
-from .models import Invoice
+from rest_framework.validators import UniqueValidator
+from contracts.models import Contract
+from core.bulk import BulkListSerializer, PrefetchedPrimaryKeyRelatedField
+from core.sparse import SparseFieldsMixin
+from .models import Invoice, InvoiceSequence
+from .numbering import number_invoices
+
+class InvoiceSerializer(SparseFieldsMixin, serializers.ModelSerializer):
+    serializer_related_field = PrefetchedPrimaryKeyRelatedField
+    bulk_computed_fields = ('tax_amount', 'total_amount')
+    # Read-only labels for lists; the view selects contract, client and property
+    client_name = serializers.CharField(source='contract.client.name', read_only=True, allow_null=True)
+    property_title = serializers.CharField(source='contract.property.title', read_only=True, allow_null=True)
+    expandable_fields = {'contract': 'contracts.serializers.ContractSerializer'}
 
-class InvoiceSerializer(serializers.ModelSerializer):
     class Meta:
         model = Invoice
         fields = '__all__'
         read_only_fields = ['tenant']
+        list_serializer_class = BulkListSerializer
+        list_exclude = ['notes']
+
+    def get_fields(self):
+        fields = super().get_fields()
+        # Numbers are unique per tenant; left blank, one is assigned on save
+        request = self.context.get('request')
+        if request is not None and getattr(request, 'tenant', None) is not None:
+            fields['invoice_number'].validators.append(
+                UniqueValidator(queryset=Invoice.objects.filter(tenant=request.tenant))
+            )
+            # Only the tenant's own contracts, loaded with what the
+            # notifications and the response read from them
+            fields['contract'].queryset = Contract.objects.filter(tenant=request.tenant).select_related('client', 'property')
+        return fields
 
     def create(self, validated_data):
         request = self.context.get('request')
         validated_data['tenant'] = request.tenant
         return super().create(validated_data)
+
+    def prepare_bulk(self, invoices):
+        # bulk_create / bulk_update bypass Invoice.save()
+        for invoice in invoices:
+            invoice.compute_totals()
+        number_invoices(invoices)
+
+
+class InvoiceSequenceSerializer(serializers.ModelSerializer):
+    class Meta:
+        model = InvoiceSequence
+        fields = ['prefix', 'number_format', 'next_value', 'block_size', 'gap_free']
+        read_only_fields = ['next_value']
+
+    def validate_number_format(self, value):
+        limit = Invoice._meta.get_field('invoice_number').max_length
+        try:
+            fields = list(Formatter().parse(value))
+        except ValueError as e:
+            raise serializers.ValidationError(f'Invalid format: {e}')
+        for _, name, spec, _ in fields:
+            # Checked before formatting: '{number:999999999}' would build
+            # a gigabyte-long string
+            if spec and ('{' in spec or any(int(width) > limit for width in re.findall(r'\d+', spec))):
+                raise serializers.ValidationError(f'Widths above {limit} are not allowed.')
+        try:
+            sample = value.format(prefix='', number=1, year=2000)
+        except (KeyError, IndexError, TypeError, ValueError) as e:
+            raise serializers.ValidationError(f'Invalid format: {e}')
+        if sample == value.format(prefix='', number=2, year=2000):
+            raise serializers.ValidationError('The format must include {number}.')
+        return value
+
+    def validate(self, attrs):
+        # Rendered numbers must fit Invoice.invoice_number, up to a
+        # billion invoices
+        limit = Invoice._meta.get_field('invoice_number').max_length
+        sequence = InvoiceSequence(
+            prefix=attrs.get('prefix', getattr(self.instance, 'prefix', '')),
+            number_format=attrs.get('number_format', getattr(self.instance, 'number_format', '')),
+        )
+        if len(sequence.format(999_999_999, 2000)) > limit:
+            raise serializers.ValidationError({'number_format': f'Invoice numbers would be longer than {limit} characters.'})
+        return attrs
+
+
+class ForecastQuerySerializer(serializers.Serializer):
+    """
+    Query string of /api/finance/forecast/ (see finance.forecast)
+    """
+    months = serializers.IntegerField(min_value=12, max_value=36, default=12)
+    renewal_probability = serializers.FloatField(min_value=0, max_value=1, default=0)
+    collection_delay = serializers.IntegerField(min_value=0, max_value=12, default=0)
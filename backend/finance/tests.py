@@ -1,3 +1,581 @@
-from django.test import TestCase
+import io
+import shutil
+import tempfile
+import zipfile
+from concurrent.futures import ThreadPoolExecutor
+from datetime import date
+from unittest import mock
 
-# Create your tests here.
+from decimal import Decimal
+
+from django.core.files.base import ContentFile
+from django.core.management import call_command
+from django.db import connection, connections, transaction
+from django.test import TestCase, TransactionTestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from rest_framework.test import APIClient
+
+from clients.models import Client
+from contracts.models import Contract
+from core.jobs import Worker
+from core.models import Job, Tenant, User
+from core.rollup import check_tenant_stats
+from core.tests import seed_tenant
+from properties.models import Property
+from .billing import _write_batch, generate_invoices
+from .forecast import forecast
+from .models import Invoice, InvoiceBatch, InvoiceSequence
+from . import numbering
+
+
+class InvoicePdfDownloadTests(TestCase):
+    def setUp(self):
+        self.media_root = tempfile.mkdtemp()
+        self.settings_override = override_settings(MEDIA_ROOT=self.media_root)
+        self.settings_override.enable()
+
+        self.tenant = Tenant.objects.create(name='alpha', subdomain='alpha')
+        self.user = User.objects.create_user('owner', password='password', tenant=self.tenant)
+        self.api = APIClient()
+        self.api.force_authenticate(self.user)
+        self.invoice = Invoice.objects.create(
+            tenant=self.tenant, invoice_number='INV-1', amount=100, due_date=date(2026, 1, 1),
+        )
+        self.content = bytes(range(256)) * 1000
+        self.invoice.pdf_file.save('invoice_INV-1.pdf', ContentFile(self.content))
+        self.url = f'/api/finance/{self.invoice.pk}/download_pdf/'
+
+    def tearDown(self):
+        self.settings_override.disable()
+        shutil.rmtree(self.media_root, ignore_errors=True)
+
+    def get(self, **headers):
+        return self.api.get(self.url, HTTP_X_TENANT_ID=str(self.tenant.pk), **headers)
+
+    def test_streams_with_validators(self):
+        response = self.get()
+        self.assertEqual(response.status_code, 200)
+        self.assertTrue(response.streaming)
+        self.assertEqual(b''.join(response.streaming_content), self.content)
+        self.assertTrue(response['ETag'].startswith('"'))
+        self.assertIn('Last-Modified', response)
+        self.assertEqual(response['Accept-Ranges'], 'bytes')
+
+    def test_repeat_download_is_not_modified(self):
+        first = self.get()
+        response = self.get(HTTP_IF_NONE_MATCH=first['ETag'])
+        self.assertEqual(response.status_code, 304)
+        response = self.get(HTTP_IF_MODIFIED_SINCE=first['Last-Modified'])
+        self.assertEqual(response.status_code, 304)
+
+    def test_byte_ranges(self):
+        response = self.get(HTTP_RANGE='bytes=1000-1999')
+        self.assertEqual(response.status_code, 206)
+        self.assertEqual(response['Content-Range'], f'bytes 1000-1999/{len(self.content)}')
+        self.assertEqual(b''.join(response.streaming_content), self.content[1000:2000])
+
+        response = self.get(HTTP_RANGE='bytes=-10')
+        self.assertEqual(b''.join(response.streaming_content), self.content[-10:])
+
+        response = self.get(HTTP_RANGE=f'bytes={len(self.content)}-')
+        self.assertEqual(response.status_code, 416)
+
+        # A stale If-Range gets the whole, current file
+        response = self.get(HTTP_RANGE='bytes=0-9', HTTP_IF_RANGE='"stale"')
+        self.assertEqual(response.status_code, 200)
+
+    @override_settings(PRIVATE_FILE_SERVER='nginx', PRIVATE_FILE_ACCEL_PREFIX='/protected-media/')
+    def test_web_server_offload(self):
+        response = self.get()
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response['X-Accel-Redirect'], f'/protected-media/{self.invoice.pdf_file.name}')
+        self.assertEqual(response.content, b'')
+
+
+class InvoicePdfJobTests(TestCase):
+    def setUp(self):
+        self.media_root = tempfile.mkdtemp()
+        self.settings_override = override_settings(MEDIA_ROOT=self.media_root)
+        self.settings_override.enable()
+
+        self.tenant = Tenant.objects.create(name='alpha', subdomain='alpha')
+        self.user = User.objects.create_user('owner', password='password', tenant=self.tenant)
+        self.api = APIClient()
+        self.api.force_authenticate(self.user)
+        self.headers = {'HTTP_X_TENANT_ID': str(self.tenant.pk)}
+
+    def tearDown(self):
+        self.settings_override.disable()
+        shutil.rmtree(self.media_root, ignore_errors=True)
+
+    def create_invoice(self):
+        response = self.api.post('/api/finance/', {'amount': '100.00', 'due_date': '2026-01-01'}, format='json', **self.headers)
+        self.assertEqual(response.status_code, 201)
+        return Invoice.objects.get(pk=response.json()['id'])
+
+    def download(self, invoice):
+        return self.api.get(f'/api/finance/{invoice.pk}/download_pdf/', **self.headers)
+
+    def test_created_invoices_render_in_the_background(self):
+        invoice = self.create_invoice()
+        self.assertEqual(invoice.pdf_status, Invoice.PdfStatus.PENDING)
+        self.assertTrue(Job.objects.filter(kind='render_invoice_pdf', key=f'invoice:{invoice.pk}').exists())
+
+        response = self.download(invoice)
+        self.assertEqual(response.status_code, 202)
+        self.assertEqual(response['Retry-After'], '2')
+        self.assertEqual(response.json()['status'], Invoice.PdfStatus.PENDING)
+        # Asking again doesn't queue a second render
+        self.assertEqual(self.download(invoice).status_code, 202)
+        self.assertEqual(Job.objects.filter(kind='render_invoice_pdf').count(), 1)
+
+        seen = []
+
+        def render(rendering):
+            seen.append(Invoice.objects.get(pk=rendering.pk).pdf_status)
+            return b'%PDF-1.4 test'
+
+        with mock.patch('finance.jobs.generate_invoice_pdf', render):
+            Worker().run(once=True)
+        self.assertEqual(seen, [Invoice.PdfStatus.RENDERING])
+        invoice.refresh_from_db()
+        self.assertEqual(invoice.pdf_status, Invoice.PdfStatus.READY)
+        self.assertFalse(Job.objects.exists())
+
+        response = self.download(invoice)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(b''.join(response.streaming_content), b'%PDF-1.4 test')
+
+    def test_failed_render_is_retried(self):
+        invoice = self.create_invoice()
+        with mock.patch('finance.jobs.generate_invoice_pdf', side_effect=ValueError('bad font')), self.assertLogs('core.jobs', 'WARNING'):
+            Worker().run(once=True)
+        invoice.refresh_from_db()
+        self.assertEqual(invoice.pdf_status, Invoice.PdfStatus.FAILED)
+        self.assertFalse(invoice.pdf_file)
+        job = Job.objects.get(kind='render_invoice_pdf')
+        self.assertEqual((job.status, job.attempts), (Job.Status.PENDING, 1))
+        self.assertIn('bad font', job.last_error)
+        self.assertEqual(self.download(invoice).status_code, 202)
+
+
+class InvoiceBatchPdfTests(TestCase):
+    def setUp(self):
+        self.media_root = tempfile.mkdtemp()
+        self.settings_override = override_settings(MEDIA_ROOT=self.media_root, INVOICE_BATCH_SYNC_MAX=2)
+        self.settings_override.enable()
+
+        self.tenant = Tenant.objects.create(name='alpha', subdomain='alpha')
+        self.user = User.objects.create_user('owner', password='password', tenant=self.tenant)
+        self.api = APIClient()
+        self.api.force_authenticate(self.user)
+        self.invoices = [
+            Invoice.objects.create(tenant=self.tenant, invoice_number=f'INV-{i}', amount=100, due_date=date(2026, 1, 1))
+            for i in range(3)
+        ]
+
+    def tearDown(self):
+        self.settings_override.disable()
+        shutil.rmtree(self.media_root, ignore_errors=True)
+
+    def get(self, url, **params):
+        return self.api.get(url, params, HTTP_X_TENANT_ID=str(self.tenant.pk))
+
+    def test_small_batches_render_in_the_request(self):
+        ids = ','.join(str(invoice.pk) for invoice in self.invoices[:2])
+        response = self.get('/api/finance/batch_pdf/', ids=ids)
+        self.assertEqual(response.status_code, 200)
+        archive = zipfile.ZipFile(io.BytesIO(b''.join(response.streaming_content)))
+        self.assertEqual(archive.namelist(), ['invoice_INV-0.pdf', 'invoice_INV-1.pdf'])
+
+        response = self.get('/api/finance/batch_pdf/', ids=ids, output='merged')
+        self.assertEqual(response.status_code, 200)
+        self.assertTrue(b''.join(response.streaming_content).startswith(b'%PDF'))
+
+        self.assertEqual(self.get('/api/finance/batch_pdf/', output='tar').status_code, 400)
+
+    def test_large_batches_go_through_the_job_queue(self):
+        response = self.get('/api/finance/batch_pdf/')
+        self.assertEqual(response.status_code, 202)
+        self.assertEqual(response.json()['invoices'], 3)
+        url = response['Location']
+        self.assertEqual(self.get(url).status_code, 202)
+        self.assertEqual(InvoiceBatch.objects.get(pk=response.json()['batch']).tenant, self.tenant)
+
+        Worker().run(once=True)
+        response = self.get(url)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response['Content-Type'], 'application/zip')
+        archive = zipfile.ZipFile(io.BytesIO(b''.join(response.streaming_content)))
+        self.assertEqual(len(archive.namelist()), 3)
+
+        # Other tenants can't fetch it
+        other = Tenant.objects.create(name='beta', subdomain='beta')
+        self.user.tenant = other
+        self.user.save()
+        self.assertEqual(self.api.get(url, HTTP_X_TENANT_ID=str(other.pk)).status_code, 404)
+
+
+class InvoiceBulkTests(TestCase):
+    def setUp(self):
+        self.tenant = seed_tenant('alpha')
+        self.contract = Contract.objects.filter(tenant=self.tenant).first()
+        self.user = User.objects.create_user('owner', password='password', tenant=self.tenant)
+        self.api = APIClient()
+        self.api.force_authenticate(self.user)
+
+    def post(self, items, method='post'):
+        return getattr(self.api, method)(
+            '/api/finance/bulk/', items, format='json', HTTP_X_TENANT_ID=str(self.tenant.pk),
+        )
+
+    def items(self, count, prefix='BULK'):
+        return [
+            {'contract': self.contract.pk, 'invoice_number': f'{prefix}-{i}', 'amount': '100.10', 'due_date': '2026-07-01'}
+            for i in range(count)
+        ]
+
+    def test_bulk_create_computes_totals(self):
+        # Inserts are folded into the rollup, not rebuilt from the invoices
+        with mock.patch('core.rollup.rebuild_tenant_stats') as rebuild:
+            response = self.post(self.items(20))
+        rebuild.assert_not_called()
+        self.assertEqual(response.status_code, 201)
+        self.assertEqual(response.json()['created'], 20)
+        invoice = Invoice.objects.get(invoice_number='BULK-7')
+        self.assertEqual(invoice.tax_amount, Decimal('15.02'))
+        self.assertEqual(invoice.total_amount, Decimal('115.12'))
+        self.assertEqual(check_tenant_stats(self.tenant.pk), [])
+
+    def test_query_count_does_not_grow_with_batch(self):
+        self.post(self.items(1, prefix='WARM'))
+        with CaptureQueriesContext(connection) as small:
+            self.post(self.items(5, prefix='SMALL'))
+        with CaptureQueriesContext(connection) as large:
+            self.post(self.items(200, prefix='LARGE'))
+        # Only the INSERTs grow, split by the database's parameter limit
+        def lookups(queries):
+            return [query for query in queries if not query['sql'].startswith('INSERT')]
+        self.assertEqual(len(lookups(small)), len(lookups(large)))
+        # Includes refreshing the batch's days in core.revenue's DailyRevenue
+        self.assertLess(len(large), 25)
+
+    def test_errors_are_reported_per_item(self):
+        items = self.items(4)
+        items[1]['invoice_number'] = 'alpha-0-1'  # already exists
+        items[3]['invoice_number'] = items[2]['invoice_number']
+        items[2]['amount'] = 'abc'
+        response = self.post(items)
+        self.assertEqual(response.status_code, 400)
+        errors = {error['index']: error['errors'] for error in response.json()['errors']}
+        self.assertEqual(sorted(errors), [1, 2, 3])
+        self.assertIn('invoice_number', errors[1])
+        self.assertEqual(sorted(errors[2]), ['amount', 'invoice_number'])
+        self.assertFalse(Invoice.objects.filter(invoice_number__startswith='BULK').exists())
+
+    def test_bulk_update(self):
+        invoices = list(Invoice.objects.filter(tenant=self.tenant, status='PENDING'))
+        response = self.post(
+            [{'id': invoice.pk, 'amount': '200.00', 'status': 'PAID', 'paid_date': '2026-07-02'} for invoice in invoices],
+            method='patch',
+        )
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json()['updated'], len(invoices))
+        invoice = Invoice.objects.get(pk=invoices[0].pk)
+        self.assertEqual(invoice.total_amount, Decimal('230.00'))
+        self.assertEqual(check_tenant_stats(self.tenant.pk), [])
+
+        other = seed_tenant('beta')
+        foreign = Invoice.objects.filter(tenant=other).first()
+        response = self.post([{'id': foreign.pk, 'amount': '1.00'}], method='patch')
+        self.assertEqual(response.status_code, 400)
+
+
+class RecurringBillingTests(TestCase):
+    def setUp(self):
+        # seed_tenant: two ACTIVE and two EXPIRED contracts running through 2026
+        self.tenant = seed_tenant('alpha')
+        self.other = seed_tenant('beta')
+        contract = Contract.objects.filter(tenant=self.tenant, status='ACTIVE').first()
+        self.late_starter = Contract.objects.create(
+            tenant=self.tenant, property=contract.property, client=contract.client,
+            start_date=date(2026, 1, 31), end_date=date(2026, 12, 31),
+            monthly_amount=Decimal('2500.10'), total_amount=30000,
+        )
+        Contract.objects.create(
+            tenant=self.tenant, property=contract.property, client=contract.client,
+            start_date=date(2025, 1, 1), end_date=date(2026, 1, 31),
+            monthly_amount=1000, total_amount=12000,
+        )
+        # Tenant ids are reused between tests; start without number blocks
+        numbering.forget(self.tenant.pk)
+        numbering.forget(self.other.pk)
+
+    def test_bills_each_active_contract_once(self):
+        period = date(2026, 2, 1)
+        with CaptureQueriesContext(connection) as queries:
+            self.assertEqual(generate_invoices(period), 5)
+        # Selection, the inserts and reading them back, and per tenant a
+        # block of invoice numbers and a rollup rebuild, however many
+        # contracts there are
+        self.assertLess(len(queries), 60)
+
+        invoice = Invoice.objects.get(contract=self.late_starter, billing_period=period)
+        self.assertEqual(invoice.due_date, date(2026, 2, 28))
+        self.assertEqual(invoice.tax_amount, Decimal('375.02'))
+        self.assertEqual(invoice.total_amount, Decimal('2875.12'))
+        self.assertEqual(invoice.status, 'PENDING')
+
+        self.assertEqual(generate_invoices(period), 0)
+        self.assertEqual(Invoice.objects.filter(billing_period=period).count(), 5)
+        self.assertEqual(check_tenant_stats(self.tenant.pk), [])
+        self.assertEqual(check_tenant_stats(self.other.pk), [])
+
+    def test_command_and_api(self):
+        call_command('generate_invoices', period='2026-03', tenant=self.other.pk, stdout=open('/dev/null', 'w'))
+        self.assertEqual(Invoice.objects.filter(billing_period=date(2026, 3, 1)).count(), 2)
+
+        user = User.objects.create_user('owner', password='password', tenant=self.tenant)
+        api = APIClient()
+        api.force_authenticate(user)
+        response = api.post('/api/finance/generate/', {'period': '2026-03'}, format='json', HTTP_X_TENANT_ID=str(self.tenant.pk))
+        self.assertEqual(response.status_code, 202)
+        Worker().run(once=True)
+        self.assertEqual(Invoice.objects.filter(tenant=self.tenant, billing_period=date(2026, 3, 1)).count(), 3)
+        self.assertEqual(Invoice.objects.filter(billing_period=date(2026, 3, 1)).count(), 5)
+
+        response = api.post('/api/finance/generate/', {'period': 'March'}, format='json', HTTP_X_TENANT_ID=str(self.tenant.pk))
+        self.assertEqual(response.status_code, 400)
+
+        # No tenant to bill for
+        response = api.post('/api/finance/generate/', {'period': '2026-03'}, format='json')
+        self.assertEqual(response.status_code, 400)
+
+    def test_counts_only_invoices_created(self):
+        period = date(2026, 2, 1)
+        rows = list(Contract.objects.filter(tenant=self.tenant, status='ACTIVE').values(
+            'id', 'tenant_id', 'monthly_amount', 'start_date'
+        ))
+        # A racing run bills one of the selected contracts first
+        Invoice.objects.create(
+            tenant=self.tenant, contract_id=rows[0]['id'], billing_period=period,
+            amount=rows[0]['monthly_amount'], due_date=period,
+        )
+        self.assertEqual(_write_batch(period, rows, 15), len(rows) - 1)
+        self.assertEqual(Invoice.objects.filter(tenant=self.tenant, billing_period=period).count(), len(rows))
+        self.assertEqual(check_tenant_stats(self.tenant.pk), [])
+
+        # A number that is already in use leaves its contract unbilled,
+        # and says so
+        taken = Invoice.objects.get(contract_id=rows[0]['id'], billing_period=period).invoice_number
+
+        def clash(invoices):
+            for invoice in invoices:
+                invoice.invoice_number = taken
+
+        with mock.patch('finance.billing.number_invoices', clash), self.assertLogs('finance.billing', 'WARNING'):
+            self.assertEqual(_write_batch(date(2026, 3, 1), rows[1:2], 15), 0)
+        self.assertFalse(Invoice.objects.filter(contract_id=rows[1]['id'], billing_period=date(2026, 3, 1)).exists())
+
+
+class ForecastTests(TestCase):
+    def setUp(self):
+        self.tenant = Tenant.objects.create(name='alpha', subdomain='alpha')
+        client = Client.objects.create(tenant=self.tenant, name='Client', phone='0500000000')
+        prop = Property.objects.create(
+            tenant=self.tenant, title='Tower', property_type='APARTMENT',
+            city='Riyadh', address='Street', area=100, price=1000,
+        )
+
+        def contract(start, end, rent, status='ACTIVE'):
+            return Contract.objects.create(
+                tenant=self.tenant, property=prop, client=client, start_date=start, end_date=end,
+                monthly_amount=rent, total_amount=rent * 12, status=status,
+            )
+
+        # 1150.00 and 2300.00 a month with tax
+        ending = contract(date(2026, 1, 1), date(2026, 12, 31), Decimal('1000'))
+        contract(date(2026, 6, 15), date(2027, 5, 31), Decimal('2000'))
+        contract(date(2026, 1, 1), date(2027, 12, 31), Decimal('5000'), status='EXPIRED')
+        for period, status in [(date(2026, 8, 1), 'OVERDUE'), (date(2026, 10, 1), 'PENDING')]:
+            Invoice.objects.create(
+                tenant=self.tenant, contract=ending, amount=1000, due_date=period,
+                billing_period=period, status=status,
+            )
+        self.today = date(2026, 10, 18)
+
+    def amounts(self, values):
+        return [float(value) for value in values]
+
+    def test_contracted_and_outstanding(self):
+        with self.assertNumQueries(3):
+            result = forecast(self.tenant.pk, today=self.today)
+        self.assertEqual(result['months'][0], '2026-10')
+        self.assertEqual(result['contracts'], 2)
+        # October is already invoiced for the first contract
+        self.assertEqual(self.amounts(result['contracted']), [2300, 3450, 3450] + [2300] * 5 + [0] * 4)
+        self.assertEqual(self.amounts(result['outstanding']), [2300] + [0] * 11)
+        self.assertEqual(self.amounts(result['renewals']), [0] * 12)
+        self.assertEqual(result['totals']['collections'], Decimal('23000.00'))
+
+    def test_scenario(self):
+        result = forecast(self.tenant.pk, renewal_probability=0.5, collection_delay=1, today=self.today)
+        # Each renewal of a 12-month term counts at half the rent
+        self.assertEqual(self.amounts(result['renewals']), [0, 0, 0] + [575] * 5 + [575 + 1150] * 4)
+        # The overdue invoice can't come in before this month, the pending
+        # one a month after it falls due
+        self.assertEqual(self.amounts(result['outstanding'][:2]), [1150, 1150])
+        self.assertEqual(self.amounts(result['collections'][:3]), [1150, 1150 + 2300, 3450])
+
+        three_years = forecast(self.tenant.pk, months=36, renewal_probability=0.5, today=self.today)
+        self.assertEqual(float(three_years['renewals'][-1]), 1150 * 0.125 + 2300 * 0.125)
+
+    def test_endpoint(self):
+        user = User.objects.create_user('owner', password='password', tenant=self.tenant)
+        api = APIClient()
+        api.force_authenticate(user)
+        headers = {'HTTP_X_TENANT_ID': str(self.tenant.pk)}
+        response = api.get('/api/finance/forecast/', {'months': 24, 'renewal_probability': 0.8}, **headers)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(len(response.json()['collections']), 24)
+        for params in ({'months': 6}, {'renewal_probability': 2}, {'collection_delay': -1}):
+            self.assertEqual(api.get('/api/finance/forecast/', params, **headers).status_code, 400)
+
+        # No tenant: an empty forecast rather than an error
+        response = api.get('/api/finance/forecast/')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(self.amounts(response.json()['collections']), [0] * 12)
+
+
+class InvoiceNumberingTests(TestCase):
+    def setUp(self):
+        self.tenant = Tenant.objects.create(name='alpha', subdomain='alpha')
+        self.other = Tenant.objects.create(name='beta', subdomain='beta')
+        numbering.forget(self.tenant.pk)
+        numbering.forget(self.other.pk)
+
+    def create(self, tenant, **fields):
+        # Reserved blocks are only shared once their transaction commits
+        with self.captureOnCommitCallbacks(execute=True):
+            return Invoice.objects.create(tenant=tenant, amount=100, due_date=date(2026, 1, 1), **fields)
+
+    def test_numbers_are_per_tenant_and_formatted(self):
+        InvoiceSequence.objects.create(tenant=self.other, prefix='B-', number_format='{prefix}{year}-{number:04d}')
+        self.assertEqual(self.create(self.tenant).invoice_number, 'INV-000001')
+        self.assertEqual(self.create(self.tenant).invoice_number, 'INV-000002')
+        year = date.today().year
+        self.assertEqual(self.create(self.other).invoice_number, f'B-{year}-0001')
+        # Numbers given by the client are kept
+        self.assertEqual(self.create(self.tenant, invoice_number='MANUAL-1').invoice_number, 'MANUAL-1')
+
+    def test_typed_numbers_are_passed_over(self):
+        # Existing invoices numbered by hand: the sequence continues after
+        # the highest one in the default format
+        for number in ('INV-000007', 'INV-000003', 'INV-12', 'OLD-99'):
+            self.create(self.tenant, invoice_number=number)
+        self.assertEqual(self.create(self.tenant).invoice_number, 'INV-000013')
+        # A client types in the next number the block would hand out
+        self.create(self.tenant, invoice_number='INV-000014')
+        self.assertEqual(self.create(self.tenant).invoice_number, 'INV-000015')
+
+        # Typed and blank numbers in one batch
+        invoices = [
+            Invoice(tenant=self.tenant, invoice_number='INV-000017', amount=100, due_date=date(2026, 1, 1)),
+            Invoice(tenant=self.tenant, amount=100, due_date=date(2026, 1, 1)),
+            Invoice(tenant=self.tenant, amount=100, due_date=date(2026, 1, 1)),
+        ]
+        numbering.number_invoices(invoices)
+        self.assertEqual([invoice.invoice_number for invoice in invoices], ['INV-000017', 'INV-000016', 'INV-000018'])
+
+    def test_blocks_need_no_queries(self):
+        self.create(self.tenant)
+        with CaptureQueriesContext(connection) as queries:
+            self.create(self.tenant)
+        # Only a read of the settings; the row is neither locked nor moved
+        sequence_queries = [query['sql'] for query in queries if 'invoicesequence' in query['sql']]
+        self.assertEqual(len(sequence_queries), 1)
+        self.assertTrue(sequence_queries[0].startswith('SELECT'))
+        self.assertEqual(InvoiceSequence.objects.get(pk=self.tenant).next_value, 51)
+
+    def test_settings_changed_elsewhere_drop_the_block(self):
+        self.assertEqual(self.create(self.tenant).invoice_number, 'INV-000001')
+        # Another process switches to gap-free numbers and a new prefix;
+        # this one never hears of it through forget()
+        InvoiceSequence.objects.filter(pk=self.tenant).update(gap_free=True, prefix='G-')
+        self.assertEqual(self.create(self.tenant).invoice_number, 'G-000051')
+        self.assertEqual(self.create(self.tenant).invoice_number, 'G-000052')
+        self.assertEqual(InvoiceSequence.objects.get(pk=self.tenant).next_value, 53)
+
+    def test_gap_free_numbers_survive_rollbacks(self):
+        InvoiceSequence.objects.create(tenant=self.tenant, gap_free=True)
+        self.create(self.tenant)
+        try:
+            with transaction.atomic():
+                self.create(self.tenant)
+                raise RuntimeError
+        except RuntimeError:
+            pass
+        self.assertEqual(self.create(self.tenant).invoice_number, 'INV-000002')
+        self.assertEqual(InvoiceSequence.objects.get(pk=self.tenant).next_value, 3)
+
+    def test_numbering_settings_api(self):
+        user = User.objects.create_user('owner', password='password', tenant=self.tenant)
+        api = APIClient()
+        api.force_authenticate(user)
+        headers = {'HTTP_X_TENANT_ID': str(self.tenant.pk)}
+        self.create(self.tenant)
+
+        response = api.patch('/api/finance/numbering/', {'prefix': 'A-', 'number_format': '{prefix}{number}'}, format='json', **headers)
+        self.assertEqual(response.status_code, 200)
+        response = api.post('/api/finance/', {'amount': '100.00', 'due_date': '2026-01-01'}, format='json', **headers)
+        self.assertEqual(response.status_code, 201)
+        self.assertEqual(response.json()['invoice_number'], 'A-51')
+
+        response = api.post('/api/finance/', {'invoice_number': 'A-51', 'amount': '1', 'due_date': '2026-01-01'}, format='json', **headers)
+        self.assertEqual(response.status_code, 400)
+        response = api.patch('/api/finance/numbering/', {'number_format': '{prefix}'}, format='json', **headers)
+        self.assertEqual(response.status_code, 400)
+        # Formats whose numbers wouldn't fit invoice_number, or that would
+        # take gigabytes to render
+        for number_format in ('{prefix}{number:0100d}', '{number:999999999}', '{number:{number}}', '{number[0]}', 'X' * 45 + '{number}'):
+            response = api.patch('/api/finance/numbering/', {'number_format': number_format}, format='json', **headers)
+            self.assertEqual(response.status_code, 400, number_format)
+        response = api.patch('/api/finance/numbering/', {'prefix': 'P' * 20, 'number_format': '{prefix}{year}-{number:030d}'}, format='json', **headers)
+        self.assertEqual(response.status_code, 400)
+
+        # No tenant to number for
+        self.assertEqual(api.get('/api/finance/numbering/').status_code, 400)
+
+
+class InvoiceNumberingConcurrencyTests(TransactionTestCase):
+    threads = 8
+    per_thread = 25
+
+    def setUp(self):
+        if connection.vendor == 'sqlite' and connection.is_in_memory_db():
+            self.skipTest('needs a test database every thread can write to: PostgreSQL, or SQLITE_TEST_FILE=1')
+        self.tenant = Tenant.objects.create(name='alpha', subdomain='alpha')
+        numbering.forget(self.tenant.pk)
+
+    def create_many(self, index):
+        try:
+            for i in range(self.per_thread):
+                with transaction.atomic():
+                    Invoice.objects.create(tenant=self.tenant, amount=100, due_date=date(2026, 1, 1))
+        finally:
+            connections.close_all()
+
+    def stress(self):
+        with ThreadPoolExecutor(max_workers=self.threads) as pool:
+            list(pool.map(self.create_many, range(self.threads)))
+        numbers = list(Invoice.objects.filter(tenant=self.tenant).values_list('invoice_number', flat=True))
+        self.assertEqual(len(numbers), self.threads * self.per_thread)
+        self.assertEqual(len(set(numbers)), len(numbers))
+        return sorted(int(number.removeprefix('INV-')) for number in numbers)
+
+    def test_parallel_creators_get_unique_numbers(self):
+        self.stress()
+
+    def test_parallel_creators_gap_free(self):
+        InvoiceSequence.objects.create(tenant=self.tenant, gap_free=True)
+        self.assertEqual(self.stress(), list(range(1, self.threads * self.per_thread + 1)))
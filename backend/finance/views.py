@@ -1,66 +1,237 @@
 from rest_framework import viewsets, status
 from rest_framework.decorators import action
 from rest_framework.response import Response
-from django.http import HttpResponse
-from django.core.files.base import ContentFile
-from .models import Invoice
-from .serializers import InvoiceSerializer
-from .pdf_generator import generate_invoice_pdf
-from core.notifications import send_invoice_email, send_invoice_whatsapp
-import os
+from django.db import transaction
+from django.conf import settings
+from django.http import FileResponse, StreamingHttpResponse
+from django.shortcuts import get_object_or_404
+from django.utils import timezone
+import tempfile
+from clients.models import Client
+from contracts.models import Contract
+from properties.models import Property
+from .models import Invoice, InvoiceBatch
+from .numbering import forget, sequence_for_update
+from .serializers import ForecastQuerySerializer, InvoiceSequenceSerializer, InvoiceSerializer
+from .billing import billing_period, parse_period
+from . import forecast as forecasting
+from .jobs import queue_invoice_batch, queue_invoice_generation, queue_invoice_pdf
+from .pdf_batch import stream_zip, write_merged_pdf
+from core.bulk import BulkWriteMixin
+from core.export import ExportMixin
+from core.sparse import SparseFieldsViewMixin
+from core.versions import ConditionalGetMixin
+from core.downloads import serve_file
+from core.notifications import queue_invoice_notifications
 
 
-class InvoiceViewSet(viewsets.ModelViewSet):
+# Seconds a client should wait before asking again for a PDF being rendered
+PDF_RETRY_AFTER = 2
+
+
+class InvoiceViewSet(ConditionalGetMixin, SparseFieldsViewMixin, BulkWriteMixin, ExportMixin, viewsets.ModelViewSet):
     serializer_class = InvoiceSerializer
+    etag_models = (Invoice, Contract, Client, Property)
+    export_name = 'invoices'
+    export_columns = (
+        ('invoice_number', 'Invoice number'),
+        ('contract__client__name', 'Client'),
+        ('contract__property__title', 'Property'),
+        ('status', 'Status'),
+        ('amount', 'Amount'),
+        ('tax_rate', 'Tax rate'),
+        ('tax_amount', 'Tax'),
+        ('total_amount', 'Total'),
+        ('due_date', 'Due date'),
+        ('paid_date', 'Paid date'),
+        ('created_at', 'Created at'),
+    )
     
     def get_queryset(self):
-        return Invoice.objects.filter(tenant=self.request.tenant)
+        return Invoice.objects.filter(tenant=self.request.tenant).select_related('contract__client', 'contract__property')
     
     def perform_create(self, serializer):
-        # Save invoice
-        invoice = serializer.save()
-        
-        # Generate PDF
+        # Save invoice, queue its PDF and its notifications in one
+        # transaction; the run_jobs and dispatch_notifications workers
+        # do the actual work
+        with transaction.atomic():
+            invoice = serializer.save()
+            queue_invoice_pdf(invoice)
+            queue_invoice_notifications(invoice)
+    
+    @action(detail=False, methods=['post', 'patch'], url_path='bulk')
+    def bulk(self, request):
+        """
+        Create (POST) or update (PATCH) up to BULK_MAX_ITEMS invoices at once.
+        Imported invoices get no notifications; their PDFs render on first download.
+        """
+        return self.bulk_write(request)
+    
+    @action(detail=False, methods=['get', 'patch'])
+    def numbering(self, request):
+        """
+        How this tenant's invoice numbers are assigned: prefix, format
+        ({prefix}, {number}, {year}), block size and gap-free mode
+        """
+        if request.tenant is None:
+            return Response({'error': 'Invoice numbering is set per tenant'}, status=status.HTTP_400_BAD_REQUEST)
+        with transaction.atomic():
+            sequence = sequence_for_update(request.tenant.pk)
+            if request.method == 'GET':
+                return Response(InvoiceSequenceSerializer(sequence).data)
+            serializer = InvoiceSequenceSerializer(sequence, data=request.data, partial=True)
+            serializer.is_valid(raise_exception=True)
+            serializer.save()
+        # Other processes pick the change up when their current block runs out
+        forget(request.tenant.pk)
+        return Response(serializer.data)
+    
+    @action(detail=False, methods=['post'])
+    def generate(self, request):
+        """
+        Queue this tenant's recurring invoices for {"period": "YYYY-MM"}
+        (default: the current month). Contracts already billed for the
+        period are skipped, so repeating the request is harmless.
+        """
+        if request.tenant is None:
+            return Response({'error': 'Invoices are generated per tenant'}, status=status.HTTP_400_BAD_REQUEST)
+        period = request.data.get('period')
         try:
-            pdf_data = generate_invoice_pdf(invoice)
-            pdf_filename = f'invoice_{invoice.invoice_number}.pdf'
-            invoice.pdf_file.save(pdf_filename, ContentFile(pdf_data), save=True)
-        except Exception as e:
-            print(f"Error generating PDF: {e}")
+            period = parse_period(period) if period else billing_period(timezone.localdate())
+        except (AttributeError, ValueError):
+            return Response({'error': 'period must look like YYYY-MM'}, status=status.HTTP_400_BAD_REQUEST)
         
-        # Send notifications
-        try:
-            send_invoice_email(invoice)
-            send_invoice_whatsapp(invoice)
-        except Exception as e:
-            print(f"Error sending notifications: {e}")
+        with transaction.atomic():
+            queue_invoice_generation(period, tenant_id=request.tenant.pk)
+        return Response({'period': f'{period:%Y-%m}', 'status': 'PENDING'}, status=status.HTTP_202_ACCEPTED)
+    
+    @action(detail=False, methods=['get'])
+    def forecast(self, request):
+        """
+        Projected receivables for the next ?months= (12-36) months from
+        ACTIVE contracts and unpaid invoices, under ?renewal_probability=
+        (0-1) and ?collection_delay= (months)
+        """
+        query = ForecastQuerySerializer(data=request.query_params)
+        query.is_valid(raise_exception=True)
+        # Like the dashboard, a request without a tenant sees an empty forecast
+        tenant = request.tenant
+        return Response(forecasting.forecast(tenant.pk if tenant is not None else None, **query.validated_data))
+    
+    @action(detail=False, methods=['get'])
+    def export(self, request):
+        """
+        Stream all invoices as ?output=csv or ?output=xlsx
+        """
+        return super().export(request)
     
     @action(detail=True, methods=['get'])
     def download_pdf(self, request, pk=None):
         """
-        Download invoice PDF
+        Download invoice PDF, or 202 with Retry-After while it is rendering
         """
         invoice = self.get_object()
         
         if not invoice.pdf_file:
-            # Generate PDF if it doesn't exist
-            try:
-                pdf_data = generate_invoice_pdf(invoice)
-                pdf_filename = f'invoice_{invoice.invoice_number}.pdf'
-                invoice.pdf_file.save(pdf_filename, ContentFile(pdf_data), save=True)
-            except Exception as e:
-                return Response(
-                    {'error': 'Failed to generate PDF'},
-                    status=status.HTTP_500_INTERNAL_SERVER_ERROR
-                )
+            # Queue rendering unless it's already waiting or running
+            with transaction.atomic():
+                queue_invoice_pdf(invoice)
+            response = Response(
+                {'status': invoice.pdf_status, 'retry_after': PDF_RETRY_AFTER},
+                status=status.HTTP_202_ACCEPTED
+            )
+            response['Retry-After'] = str(PDF_RETRY_AFTER)
+            return response
         
-        # Return PDF file
+        # Stream the stored file, with validators and range support
         try:
-            response = HttpResponse(invoice.pdf_file.read(), content_type='application/pdf')
-            response['Content-Disposition'] = f'attachment; filename="invoice_{invoice.invoice_number}.pdf"'
-            return response
+            return serve_file(
+                request, invoice.pdf_file,
+                filename=f'invoice_{invoice.invoice_number}.pdf',
+                content_type='application/pdf',
+            )
         except Exception as e:
             return Response(
                 {'error': 'Failed to download PDF'},
                 status=status.HTTP_500_INTERNAL_SERVER_ERROR
             )
+    
+    @action(detail=False, methods=['get'])
+    def batch_pdf(self, request):
+        """
+        Download many invoice PDFs at once, as a ZIP (?output=zip, default)
+        or one merged PDF (?output=merged). Narrow the set with ?ids=1,2,3,
+        ?status= and ?month=YYYY-MM (due date). Up to INVOICE_BATCH_SYNC_MAX
+        invoices are rendered in the request; larger sets are queued and
+        answered with 202 and the batch_pdf/<id>/ URL to fetch them from.
+        """
+        invoices = self.get_queryset().order_by('invoice_number')
+        
+        ids = request.query_params.get('ids')
+        if ids:
+            try:
+                invoices = invoices.filter(pk__in=[int(pk) for pk in ids.split(',')])
+            except ValueError:
+                return Response({'error': 'ids must be a comma separated list of numbers'}, status=status.HTTP_400_BAD_REQUEST)
+        if request.query_params.get('status'):
+            invoices = invoices.filter(status=request.query_params['status'])
+        month = request.query_params.get('month')
+        if month:
+            try:
+                year, month_number = (int(part) for part in month.split('-'))
+            except ValueError:
+                return Response({'error': 'month must look like YYYY-MM'}, status=status.HTTP_400_BAD_REQUEST)
+            invoices = invoices.filter(due_date__year=year, due_date__month=month_number)
+        
+        output = request.query_params.get('output') or InvoiceBatch.Output.ZIP
+        if output not in InvoiceBatch.Output.values:
+            return Response({'error': 'output must be zip or merged'}, status=status.HTTP_400_BAD_REQUEST)
+        
+        invoice_ids = list(invoices.values_list('pk', flat=True))
+        if len(invoice_ids) > settings.INVOICE_BATCH_SYNC_MAX:
+            # Too many to render here; the job worker renders them and
+            # batch_pdf/<id>/ hands out the file once it's ready
+            with transaction.atomic():
+                batch = InvoiceBatch.objects.create(tenant=request.tenant, output=output, invoice_ids=invoice_ids)
+                queue_invoice_batch(batch)
+            return self._batch_pending(request, batch, location=f'{request.path}{batch.pk}/')
+        
+        if output == InvoiceBatch.Output.MERGED:
+            # ReportLab writes the file in one go at the end; spool it to disk
+            merged = tempfile.SpooledTemporaryFile(max_size=10 * 1024 * 1024)
+            write_merged_pdf(invoice_ids, merged)
+            merged.seek(0)
+            return FileResponse(merged, as_attachment=True, filename='invoices.pdf', content_type='application/pdf')
+        
+        response = StreamingHttpResponse(stream_zip(invoice_ids), content_type='application/zip')
+        response['Content-Disposition'] = 'attachment; filename="invoices.zip"'
+        return response
+    
+    @action(detail=False, methods=['get'], url_path=r'batch_pdf/(?P<batch_id>\d+)')
+    def batch_pdf_download(self, request, batch_id=None):
+        """
+        Download a batch queued by batch_pdf, or 202 with Retry-After while
+        it is rendering
+        """
+        batch = get_object_or_404(InvoiceBatch, pk=batch_id, tenant=request.tenant)
+        if batch.status == InvoiceBatch.Status.FAILED:
+            return Response({'status': batch.status, 'error': 'Rendering failed'}, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
+        if batch.status != InvoiceBatch.Status.READY:
+            return self._batch_pending(request, batch)
+        content_type = 'application/pdf' if batch.output == InvoiceBatch.Output.MERGED else 'application/zip'
+        return serve_file(request, batch.file, filename=batch.filename, content_type=content_type)
+    
+    def _batch_pending(self, request, batch, location=None):
+        response = Response(
+            {
+                'batch': batch.pk,
+                'status': batch.status,
+                'invoices': len(batch.invoice_ids),
+                'retry_after': PDF_RETRY_AFTER,
+            },
+            status=status.HTTP_202_ACCEPTED,
+        )
+        response['Retry-After'] = str(PDF_RETRY_AFTER)
+        if location:
+            response['Location'] = request.build_absolute_uri(location)
+        return response
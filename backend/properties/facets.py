@@ -0,0 +1,116 @@
+"""
+Counts behind the property list filters.
+
+Each facet is counted with every other filter (and ?search=) applied but
+not its own, so the options next to a selected one keep their counts.
+That is one grouped query per facet family. Results are cached under the
+tenant's Property change version, so any write to a property starts a
+fresh entry.
+"""
+import hashlib
+
+from django.conf import settings
+from django.core.cache import caches
+from django.db.models import Case, Count, IntegerField, Value, When
+from django_filters.utils import translate_validation
+
+from core.versions import current_versions
+from .filters import PropertyFilter
+from .models import Property
+from .search import search
+
+# Bucket edges; a bucket holds min <= value < max
+PRICE_EDGES = (25000, 50000, 100000, 200000, 500000)
+AREA_EDGES = (50, 100, 200, 500, 1000)
+
+# facet -> the query parameters that filter on it
+FACETS = {
+    'property_type': ('property_type',),
+    'city': ('city',),
+    'price': ('min_price', 'max_price'),
+    'area': ('min_area', 'max_area'),
+}
+
+HISTOGRAMS = {
+    'price': PRICE_EDGES,
+    'area': AREA_EDGES,
+}
+
+
+def _filtered(queryset, params, request, without):
+    data = params.copy()
+    for name in without:
+        data.pop(name, None)
+    filterset = PropertyFilter(data, queryset=queryset, request=request)
+    if not filterset.is_valid():
+        raise translate_validation(filterset.errors)
+    tenant = getattr(request, 'tenant', None)
+    return search(filterset.qs, data.get('search', ''), tenant.pk if tenant is not None else None).order_by()
+
+
+def _bucket(field, edges):
+    return Case(
+        *[When(**{f'{field}__lt': edge}, then=Value(index)) for index, edge in enumerate(edges)],
+        default=Value(len(edges)),
+        output_field=IntegerField(),
+    )
+
+
+def value_counts(queryset, field):
+    rows = queryset.values_list(field).annotate(count=Count('pk')).order_by('-count', field)
+    labels = dict(Property._meta.get_field(field).flatchoices)
+    return [{'value': value, 'label': labels.get(value, value), 'count': count} for value, count in rows]
+
+
+def histogram(queryset, field, edges):
+    counts = dict(queryset.annotate(bucket=_bucket(field, edges)).values_list('bucket').annotate(Count('pk')))
+    bounds = [None, *edges, None]
+    return [
+        {'min': bounds[index], 'max': bounds[index + 1], 'count': counts.get(index, 0)}
+        for index in range(len(edges) + 1)
+    ]
+
+
+def compute_facets(queryset, params, request=None):
+    """
+    {'count': matches, <facet>: [...]} for ``queryset`` under the list
+    filters in ``params``
+    """
+    facets = {}
+    for facet, own in FACETS.items():
+        filtered = _filtered(queryset, params, request, without=own)
+        if facet in HISTOGRAMS:
+            facets[facet] = histogram(filtered, facet, HISTOGRAMS[facet])
+        else:
+            facets[facet] = value_counts(filtered, facet)
+
+    # Every filter applies to the type counts but the type itself, so the
+    # total is the count of the selected types
+    selected = {value for value in params.get('property_type', '').split(',') if value}
+    count = sum(row['count'] for row in facets['property_type'] if not selected or row['value'] in selected)
+    return {'count': count, **facets}
+
+
+def _cache_key(tenant_id, params):
+    version, = current_versions(tenant_id, (Property,))
+    query = '&'.join(sorted(f'{name}={value}' for name, values in params.lists() for value in values))
+    return f'property_facets:{tenant_id}:{version}:{hashlib.sha1(query.encode()).hexdigest()}'
+
+
+def cached_facets(tenant, params, request=None):
+    """
+    compute_facets() for the tenant's properties, cached per change version
+    """
+    params = params.copy()
+    for name in list(params):
+        if name not in PropertyFilter.base_filters and name != 'search':
+            params.pop(name)
+    if tenant is None:
+        return compute_facets(Property.objects.none(), params, request)
+    cache = caches[settings.PROPERTY_FACETS_CACHE['ALIAS']]
+    key = _cache_key(tenant.pk, params)
+    facets = cache.get(key)
+    if facets is None:
+        facets = compute_facets(Property.objects.filter(tenant=tenant), params, request)
+        cache.set(key, facets, settings.PROPERTY_FACETS_CACHE['TTL'])
+    return facets
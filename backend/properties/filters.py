@@ -0,0 +1,24 @@
+import django_filters
+from .models import Property
+
+
+class CharInFilter(django_filters.BaseInFilter, django_filters.CharFilter):
+    pass
+
+
+class ChoiceInFilter(django_filters.BaseInFilter, django_filters.ChoiceFilter):
+    pass
+
+
+class PropertyFilter(django_filters.FilterSet):
+    # ?city=A,B and ?property_type=VILLA,OFFICE match any of the values
+    city = CharInFilter(field_name='city')
+    property_type = ChoiceInFilter(field_name='property_type', choices=Property.PROPERTY_TYPES)
+    min_price = django_filters.NumberFilter(field_name='price', lookup_expr='gte')
+    max_price = django_filters.NumberFilter(field_name='price', lookup_expr='lte')
+    min_area = django_filters.NumberFilter(field_name='area', lookup_expr='gte')
+    max_area = django_filters.NumberFilter(field_name='area', lookup_expr='lte')
+
+    class Meta:
+        model = Property
+        fields = ['city', 'property_type', 'min_price', 'max_price', 'min_area', 'max_area']
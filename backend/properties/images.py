@@ -0,0 +1,133 @@
+"""
+Resized variants of property photos.
+
+Uploads are stored as they come in; a background job (properties.jobs)
+renders each one at a few sizes, in WebP and JPEG, and records the files on
+the row as {'source': <original>, '<variant>': {'width', 'height', 'webp',
+'jpeg'}}. Orientation is applied to the pixels and the EXIF block (camera,
+GPS location) is not copied over.
+"""
+import posixpath
+from io import BytesIO
+
+from django.core.files.base import ContentFile
+from django.core.files.storage import default_storage
+from django.db.models import Q
+from PIL import Image, ImageOps
+
+from core.versions import bump, tenant_of
+from .models import Property, PropertyImage
+
+# Longest edge in pixels; smaller images are never upscaled
+VARIANTS = {
+    'thumbnail': 320,
+    'card': 800,
+    'full': 1920,
+}
+
+FORMATS = {
+    'webp': ('WEBP', {'quality': 80, 'method': 4}),
+    'jpeg': ('JPEG', {'quality': 82, 'optimize': True, 'progressive': True}),
+}
+
+# kind -> (model, image field, variants field)
+IMAGE_FIELDS = {
+    'property': (Property, 'main_image', 'main_image_variants'),
+    'gallery': (PropertyImage, 'image', 'variants'),
+}
+
+
+def _load(field_file):
+    with field_file.open('rb'):
+        with Image.open(field_file) as image:
+            # Let the JPEG decoder scale down while reading; much cheaper
+            # than decoding a 24MP photo at full size
+            edge = max(VARIANTS.values())
+            image.draft('RGB', (edge, edge))
+            icc_profile = image.info.get('icc_profile')
+            image = ImageOps.exif_transpose(image)
+            if image.mode in ('RGBA', 'LA', 'P'):
+                image = image.convert('RGBA')
+                flat = Image.new('RGB', image.size, 'white')
+                flat.paste(image, mask=image.getchannel('A'))
+                image = flat
+            elif image.mode != 'RGB':
+                image = image.convert('RGB')
+            image.load()
+    return image, icc_profile
+
+
+def render_variants(field_file):
+    """
+    Write every variant of ``field_file`` next to it and return the map
+    """
+    source, icc_profile = _load(field_file)
+    folder, name = posixpath.split(field_file.name)
+    stem = posixpath.splitext(name)[0]
+    variants = {'source': field_file.name}
+    for variant, edge in VARIANTS.items():
+        image = source.copy()
+        image.thumbnail((edge, edge), Image.Resampling.LANCZOS)
+        entry = {'width': image.width, 'height': image.height}
+        for extension, (image_format, options) in FORMATS.items():
+            buffer = BytesIO()
+            # No exif= argument, so the metadata is dropped
+            image.save(buffer, image_format, icc_profile=icc_profile, **options)
+            path = posixpath.join(folder, 'variants', f'{stem}_{variant}.{extension}')
+            entry[extension] = default_storage.save(path, ContentFile(buffer.getvalue()))
+        variants[variant] = entry
+    return variants
+
+
+def delete_variants(variants):
+    for variant in VARIANTS:
+        for extension in FORMATS:
+            path = variants.get(variant, {}).get(extension)
+            if path:
+                default_storage.delete(path)
+
+
+def needs_processing(instance, kind):
+    _, field, variants_field = IMAGE_FIELDS[kind]
+    image = getattr(instance, field)
+    return (image.name or '') != getattr(instance, variants_field).get('source', '')
+
+
+def process_image(kind, pk, force=False):
+    """
+    Bring the row's variants up to date with its current image. Returns
+    the variants map, or None if the row is gone.
+    """
+    model, field, variants_field = IMAGE_FIELDS[kind]
+    tenant_field = 'tenant' if model is Property else 'property'
+    instance = model.objects.filter(pk=pk).only('pk', tenant_field, field, variants_field).first()
+    if instance is None:
+        return None
+    old = getattr(instance, variants_field)
+    if not force and not needs_processing(instance, kind):
+        return old
+
+    image = getattr(instance, field)
+    variants = render_variants(image) if image else {}
+    # Only if the image is still the one rendered; concurrent edits to the
+    # rest of the row are left alone
+    unchanged = Q(**{field: image.name}) if image else Q(**{field: ''}) | Q(**{f'{field}__isnull': True})
+    updated = model.objects.filter(unchanged, pk=pk).update(**{variants_field: variants})
+    if not updated:
+        # Replaced while rendering; start over with the new upload
+        delete_variants(variants)
+        return process_image(kind, pk)
+    bump(tenant_of(instance), model)
+    delete_variants(old)
+    return variants
+
+
+def process_chunk(kind, pks, force=False):
+    """
+    Process a chunk of rows in a pool process; returns how many were rendered
+    """
+    rendered = 0
+    for pk in pks:
+        if process_image(kind, pk, force=force):
+            rendered += 1
+    return rendered
@@ -0,0 +1,14 @@
+from core.jobs import register, enqueue
+from .images import process_image
+
+
+def queue_image_processing(kind, pk):
+    """
+    Queue rendering of a row's image variants, unless it already is
+    """
+    return enqueue('process_property_image', key=f'image:{kind}:{pk}', model=kind, pk=pk)
+
+
+@register('process_property_image')
+def process_property_image(model, pk):
+    process_image(model, pk)
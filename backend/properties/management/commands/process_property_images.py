@@ -0,0 +1,48 @@
+from django.core.management.base import BaseCommand
+from core.pool import call, process_pool
+from properties.images import IMAGE_FIELDS, needs_processing, process_chunk
+from properties.jobs import queue_image_processing
+
+
+class Command(BaseCommand):
+    help = 'Render the resized variants of property images that are missing or out of date'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--tenant', type=int, help='Only images of this tenant')
+        parser.add_argument('--force', action='store_true', help='Re-render images that are already up to date')
+        parser.add_argument('--queue', action='store_true', help='Queue a job per image for run_jobs instead of rendering here')
+        parser.add_argument('--processes', type=int, default=4, help='Render processes, 0 renders inline')
+        parser.add_argument('--chunk-size', type=int, default=20)
+
+    def handle(self, *args, **options):
+        pending = {}
+        for kind, (model, field, variants_field) in IMAGE_FIELDS.items():
+            rows = model.objects.exclude(**{field: ''}).exclude(**{f'{field}__isnull': True})
+            if options['tenant']:
+                tenant_path = 'tenant_id' if kind == 'property' else 'property__tenant_id'
+                rows = rows.filter(**{tenant_path: options['tenant']})
+            pending[kind] = [
+                row.pk for row in rows.only('pk', field, variants_field).iterator(chunk_size=2000)
+                if options['force'] or needs_processing(row, kind)
+            ]
+
+        if options['queue']:
+            for kind, pks in pending.items():
+                for pk in pks:
+                    queue_image_processing(kind, pk)
+            self.stdout.write(self.style.SUCCESS(f'Queued {sum(map(len, pending.values()))} image(s)'))
+            return
+
+        size = options['chunk_size']
+        chunks = [(kind, pks[start:start + size]) for kind, pks in pending.items() for start in range(0, len(pks), size)]
+        if options['processes']:
+            pool = process_pool(options['processes'])
+            try:
+                futures = [pool.submit(call, 'properties.images.process_chunk', kind, pks, options['force']) for kind, pks in chunks]
+                rendered = sum(future.result() for future in futures)
+            finally:
+                pool.shutdown(wait=True, cancel_futures=True)
+        else:
+            rendered = sum(process_chunk(kind, pks, options['force']) for kind, pks in chunks)
+
+        self.stdout.write(self.style.SUCCESS(f'Rendered variants of {rendered} image(s)'))
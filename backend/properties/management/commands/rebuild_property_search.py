@@ -0,0 +1,11 @@
+from django.core.management.base import BaseCommand
+from properties.models import Property
+from properties.search import rebuild_index
+
+
+class Command(BaseCommand):
+    help = 'Rebuild the full-text search index for properties'
+
+    def handle(self, *args, **options):
+        count = rebuild_index(Property.objects.order_by('pk'))
+        self.stdout.write(self.style.SUCCESS(f'Indexed {count} properties'))
@@ -0,0 +1,61 @@
+# Generated by Django 5.2.18 on 2026-10-18 09:11
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('properties', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.AlterModelOptions(
+            name='property',
+            options={'ordering': ['-created_at']},
+        ),
+        migrations.RemoveField(
+            model_name='property',
+            name='image',
+        ),
+        migrations.RemoveField(
+            model_name='property',
+            name='location',
+        ),
+        migrations.AddField(
+            model_name='property',
+            name='address',
+            field=models.CharField(default='', max_length=500),
+            preserve_default=False,
+        ),
+        migrations.AddField(
+            model_name='property',
+            name='city',
+            field=models.CharField(default='', max_length=100),
+            preserve_default=False,
+        ),
+        migrations.AddField(
+            model_name='property',
+            name='main_image',
+            field=models.ImageField(blank=True, null=True, upload_to='properties/main/'),
+        ),
+        migrations.AddField(
+            model_name='property',
+            name='updated_at',
+            field=models.DateTimeField(auto_now=True),
+        ),
+        migrations.CreateModel(
+            name='PropertyImage',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('image', models.ImageField(upload_to='properties/gallery/')),
+                ('caption', models.CharField(blank=True, max_length=255)),
+                ('uploaded_at', models.DateTimeField(auto_now_add=True)),
+                ('property', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='images', to='properties.property')),
+            ],
+            options={
+                'ordering': ['uploaded_at'],
+            },
+        ),
+    ]
@@ -0,0 +1,22 @@
+# Generated by Django 5.2.18 on 2026-10-18 09:14
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0002_tenantstats'),
+        ('properties', '0002_alter_property_options_remove_property_image_and_more'),
+    ]
+
+    operations = [
+        migrations.AlterModelOptions(
+            name='property',
+            options={'ordering': ['-created_at', '-id']},
+        ),
+        migrations.AddIndex(
+            model_name='property',
+            index=models.Index(fields=['tenant', 'created_at', 'id'], name='property_tenant_created_idx'),
+        ),
+    ]
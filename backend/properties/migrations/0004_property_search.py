@@ -0,0 +1,98 @@
+import re
+
+from django.db import migrations
+
+# Frozen copy of what properties.search did when this migration was
+# written, so later changes to that module can't alter it. Run
+# rebuild_property_search to re-index with the current normalization.
+
+SEARCH_TABLE = 'properties_property_search'
+
+SEARCH_COLUMNS = ('title', 'city', 'address', 'description')
+
+_ARABIC_MARKS = re.compile('[\u0610-\u061a\u064b-\u065f\u0670\u06d6-\u06ed\u0640]')
+
+_ARABIC_FOLDS = str.maketrans({
+    'أ': 'ا',
+    'إ': 'ا',
+    'آ': 'ا',
+    'ٱ': 'ا',
+    'ى': 'ي',
+    'ئ': 'ي',
+    'ؤ': 'و',
+    'ة': 'ه',
+})
+
+_ARABIC_ARTICLE = re.compile(r'\bال(?=\w{2,})')
+
+CREATE_SQL = {
+    'sqlite': [
+        f"CREATE VIRTUAL TABLE IF NOT EXISTS {SEARCH_TABLE} USING fts5("
+        f"{', '.join(SEARCH_COLUMNS)}, tenant_id UNINDEXED, tokenize='unicode61')",
+    ],
+    'postgresql': [
+        f'CREATE TABLE IF NOT EXISTS {SEARCH_TABLE} ('
+        f'property_id bigint PRIMARY KEY REFERENCES properties_property (id) ON DELETE CASCADE '
+        f'DEFERRABLE INITIALLY DEFERRED, '
+        f'tenant_id bigint NOT NULL, '
+        f'document tsvector NOT NULL)',
+        f'CREATE INDEX IF NOT EXISTS {SEARCH_TABLE}_document_idx ON {SEARCH_TABLE} USING gin (document)',
+    ],
+}
+
+INSERT_SQL = {
+    'sqlite': (
+        f"INSERT INTO {SEARCH_TABLE} (rowid, {', '.join(SEARCH_COLUMNS)}, tenant_id) "
+        f"VALUES (%s, %s, %s, %s, %s, %s)"
+    ),
+    'postgresql': (
+        f"INSERT INTO {SEARCH_TABLE} (property_id, document, tenant_id) VALUES (%s, "
+        f"setweight(to_tsvector('simple', %s), 'A') || "
+        f"setweight(to_tsvector('simple', %s), 'B') || "
+        f"setweight(to_tsvector('simple', %s), 'C') || "
+        f"setweight(to_tsvector('simple', %s), 'D'), %s) "
+        f"ON CONFLICT (property_id) DO UPDATE SET document = EXCLUDED.document, tenant_id = EXCLUDED.tenant_id"
+    ),
+}
+
+
+def normalize_arabic(text):
+    if not text:
+        return ''
+    text = _ARABIC_MARKS.sub('', text)
+    text = _ARABIC_ARTICLE.sub('', text)
+    return text.translate(_ARABIC_FOLDS).lower()
+
+
+def create_search_table(apps, schema_editor):
+    vendor = schema_editor.connection.vendor
+    if vendor not in CREATE_SQL:
+        return
+    Property = apps.get_model('properties', 'Property')
+    with schema_editor.connection.cursor() as cursor:
+        for sql in CREATE_SQL[vendor]:
+            cursor.execute(sql)
+        rows = [
+            (prop.pk, *[normalize_arabic(getattr(prop, column)) for column in SEARCH_COLUMNS], prop.tenant_id)
+            for prop in Property.objects.only('pk', 'tenant_id', *SEARCH_COLUMNS).iterator()
+        ]
+        if rows:
+            cursor.executemany(INSERT_SQL[vendor], rows)
+
+
+def drop_search_table(apps, schema_editor):
+    if schema_editor.connection.vendor not in CREATE_SQL:
+        return
+    with schema_editor.connection.cursor() as cursor:
+        cursor.execute(f'DROP TABLE IF EXISTS {SEARCH_TABLE}')
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('properties', '0003_tenant_created_index'),
+    ]
+
+    operations = [
+        migrations.RunPython(create_search_table, drop_search_table),
+    ]
@@ -0,0 +1,30 @@
+# Generated by Django 5.2.18 on 2026-10-18 10:17
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0007_changeversion'),
+        ('properties', '0005_image_variants'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='property',
+            index=models.Index(fields=['tenant', 'city'], name='property_tenant_city_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='property',
+            index=models.Index(fields=['tenant', 'property_type'], name='property_tenant_type_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='property',
+            index=models.Index(fields=['tenant', 'price'], name='property_tenant_price_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='property',
+            index=models.Index(fields=['tenant', 'area'], name='property_tenant_area_idx'),
+        ),
+    ]
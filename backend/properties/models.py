@@ -19,11 +19,22 @@ class Property(models.Model):
     price = models.DecimalField(max_digits=12, decimal_places=2)
     description = models.TextField(blank=True)
     main_image = models.ImageField(upload_to='properties/main/', blank=True, null=True)
+    # Resized copies of main_image, filled in by properties.images
+    main_image_variants = models.JSONField(default=dict, blank=True, editable=False)
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
 
     class Meta:
-        ordering = ['-created_at']
+        ordering = ['-created_at', '-id']
+        indexes = [
+            # Matches the keyset used by core.pagination.TenantCursorPagination
+            models.Index(fields=['tenant', 'created_at', 'id'], name='property_tenant_created_idx'),
+            # Facet filters and counts (properties.facets)
+            models.Index(fields=['tenant', 'city'], name='property_tenant_city_idx'),
+            models.Index(fields=['tenant', 'property_type'], name='property_tenant_type_idx'),
+            models.Index(fields=['tenant', 'price'], name='property_tenant_price_idx'),
+            models.Index(fields=['tenant', 'area'], name='property_tenant_area_idx'),
+        ]
 
     def __str__(self):
         return self.title
@@ -32,6 +43,8 @@ class Property(models.Model):
 class PropertyImage(models.Model):
     property = models.ForeignKey(Property, on_delete=models.CASCADE, related_name='images')
     image = models.ImageField(upload_to='properties/gallery/')
+    # Resized copies of image, filled in by properties.images
+    variants = models.JSONField(default=dict, blank=True, editable=False)
     caption = models.CharField(max_length=255, blank=True)
     uploaded_at = models.DateTimeField(auto_now_add=True)
 
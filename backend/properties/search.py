@@ -0,0 +1,272 @@
+import re
+
+from django.db import connection, transaction
+from django.db.models import FloatField, Q, Value
+from django.db.models.expressions import RawSQL
+from rest_framework import filters
+
+from core.pagination import RANK_ANNOTATION
+
+
+# Harakat, Quranic marks, superscript alef and tatweel carry no meaning for matching
+_ARABIC_MARKS = re.compile('[\u0610-\u061a\u064b-\u065f\u0670\u06d6-\u06ed\u0640]')
+
+_ARABIC_FOLDS = str.maketrans({
+    'أ': 'ا',  # alef with hamza above -> alef
+    'إ': 'ا',  # alef with hamza below -> alef
+    'آ': 'ا',  # alef with madda -> alef
+    'ٱ': 'ا',  # alef wasla -> alef
+    'ى': 'ي',  # alef maksura -> ya
+    'ئ': 'ي',  # ya with hamza -> ya
+    'ؤ': 'و',  # waw with hamza -> waw
+    'ة': 'ه',  # ta marbuta -> ha
+})
+
+# Definite article prefix, only stripped when a real word (2+ letters) remains
+_ARABIC_ARTICLE = re.compile(r'\bال(?=\w{2,})')
+
+_TOKEN = re.compile(r'\w+')
+
+SEARCH_TABLE = 'properties_property_search'
+
+# Relative weight of each indexed column, highest first
+SEARCH_COLUMNS = ('title', 'city', 'address', 'description')
+
+
+def normalize_arabic(text):
+    """
+    Fold Arabic spelling variants so that e.g. "المدرسة" matches "مدرسه" and
+    "إسكان" matches "اسكان"; also strips diacritics and lowercases Latin.
+    """
+    if not text:
+        return ''
+    text = _ARABIC_MARKS.sub('', text)
+    text = _ARABIC_ARTICLE.sub('', text)
+    return text.translate(_ARABIC_FOLDS).lower()
+
+
+def tokenize(text):
+    return _TOKEN.findall(normalize_arabic(text))
+
+
+def query_terms(text):
+    """
+    Tokens of a search query, each as a tuple of the spellings that match
+    it. Query tokens match by prefix, and a partial word such as "الر" (on
+    the way to "الرياض") is too short for its article to be stripped, while
+    the indexed word has lost it; so such tokens match with or without it.
+    The bare article matches anything and is left out.
+    """
+    terms = []
+    for token in tokenize(text):
+        if token == 'ال':
+            continue
+        if token.startswith('ال') and len(token) > 2:
+            terms.append((token, token[2:]))
+        else:
+            terms.append((token,))
+    return terms
+
+
+class SQLiteSearchBackend:
+    """
+    FTS5 virtual table keyed by the property id (rowid)
+    """
+    vendor = 'sqlite'
+
+    def create_table(self, cursor):
+        cursor.execute(
+            f"CREATE VIRTUAL TABLE IF NOT EXISTS {SEARCH_TABLE} USING fts5("
+            f"{', '.join(SEARCH_COLUMNS)}, tenant_id UNINDEXED, tokenize='unicode61')"
+        )
+
+    def drop_table(self, cursor):
+        cursor.execute(f'DROP TABLE IF EXISTS {SEARCH_TABLE}')
+
+    def upsert(self, cursor, rows):
+        cursor.executemany(f'DELETE FROM {SEARCH_TABLE} WHERE rowid = %s', [(row[0],) for row in rows])
+        cursor.executemany(
+            f"INSERT INTO {SEARCH_TABLE} (rowid, {', '.join(SEARCH_COLUMNS)}, tenant_id) "
+            f"VALUES (%s, %s, %s, %s, %s, %s)",
+            rows,
+        )
+
+    def delete(self, cursor, property_ids):
+        cursor.executemany(f'DELETE FROM {SEARCH_TABLE} WHERE rowid = %s', [(pk,) for pk in property_ids])
+
+    def clear(self, cursor):
+        cursor.execute(f'DELETE FROM {SEARCH_TABLE}')
+
+    def build_query(self, terms):
+        # Quoted prefix terms, so FTS syntax in user input is never interpreted
+        return ' AND '.join(
+            '(' + ' OR '.join(f'"{spelling}"*' for spelling in spellings) + ')' for spellings in terms
+        )
+
+    def match_sql(self, scoped=False):
+        sql = f'SELECT rowid FROM {SEARCH_TABLE} WHERE {SEARCH_TABLE} MATCH %s'
+        return sql + ' AND tenant_id = %s' if scoped else sql
+
+    def rank_sql(self, table):
+        # bm25() is lower-is-better; negate it so every backend ranks descending
+        return (
+            f'SELECT -bm25({SEARCH_TABLE}, 10.0, 5.0, 2.0, 1.0) FROM {SEARCH_TABLE} '
+            f'WHERE {SEARCH_TABLE} MATCH %s AND rowid = "{table}"."id"'
+        )
+
+
+class PostgresSearchBackend:
+    """
+    Side table holding a weighted tsvector per property, with a GIN index
+    """
+    vendor = 'postgresql'
+
+    def create_table(self, cursor):
+        cursor.execute(
+            f'CREATE TABLE IF NOT EXISTS {SEARCH_TABLE} ('
+            f'property_id bigint PRIMARY KEY REFERENCES properties_property (id) ON DELETE CASCADE '
+            f'DEFERRABLE INITIALLY DEFERRED, '
+            f'tenant_id bigint NOT NULL, '
+            f'document tsvector NOT NULL)'
+        )
+        cursor.execute(
+            f'CREATE INDEX IF NOT EXISTS {SEARCH_TABLE}_document_idx ON {SEARCH_TABLE} USING gin (document)'
+        )
+
+    def drop_table(self, cursor):
+        cursor.execute(f'DROP TABLE IF EXISTS {SEARCH_TABLE}')
+
+    def upsert(self, cursor, rows):
+        cursor.executemany(
+            f"INSERT INTO {SEARCH_TABLE} (property_id, document, tenant_id) VALUES (%s, "
+            f"setweight(to_tsvector('simple', %s), 'A') || "
+            f"setweight(to_tsvector('simple', %s), 'B') || "
+            f"setweight(to_tsvector('simple', %s), 'C') || "
+            f"setweight(to_tsvector('simple', %s), 'D'), %s) "
+            f"ON CONFLICT (property_id) DO UPDATE SET document = EXCLUDED.document, tenant_id = EXCLUDED.tenant_id",
+            rows,
+        )
+
+    def delete(self, cursor, property_ids):
+        cursor.execute(f'DELETE FROM {SEARCH_TABLE} WHERE property_id = ANY(%s)', [list(property_ids)])
+
+    def clear(self, cursor):
+        # DELETE rather than TRUNCATE: searches running during a rebuild
+        # keep reading the committed index instead of waiting on a lock
+        cursor.execute(f'DELETE FROM {SEARCH_TABLE}')
+
+    def build_query(self, terms):
+        return ' & '.join(
+            '(' + ' | '.join(f'{spelling}:*' for spelling in spellings) + ')' for spellings in terms
+        )
+
+    def match_sql(self, scoped=False):
+        sql = f"SELECT property_id FROM {SEARCH_TABLE} WHERE document @@ to_tsquery('simple', %s)"
+        return sql + ' AND tenant_id = %s' if scoped else sql
+
+    def rank_sql(self, table):
+        return (
+            f"SELECT ts_rank(document, to_tsquery('simple', %s)) FROM {SEARCH_TABLE} "
+            f'WHERE property_id = "{table}"."id"'
+        )
+
+
+BACKENDS = {backend.vendor: backend for backend in (SQLiteSearchBackend(), PostgresSearchBackend())}
+
+
+def get_backend(conn=None):
+    """
+    Search backend for the connection's database, or None if unsupported
+    """
+    return BACKENDS.get((conn or connection).vendor)
+
+
+def _document(prop):
+    return [normalize_arabic(getattr(prop, column)) for column in SEARCH_COLUMNS]
+
+
+def index_properties(properties):
+    backend = get_backend()
+    if backend is None:
+        return
+    rows = [(prop.pk, *_document(prop), prop.tenant_id) for prop in properties]
+    if rows:
+        with connection.cursor() as cursor:
+            backend.upsert(cursor, rows)
+
+
+def unindex_properties(property_ids):
+    backend = get_backend()
+    if backend is None or not property_ids:
+        return
+    with connection.cursor() as cursor:
+        backend.delete(cursor, property_ids)
+
+
+def rebuild_index(queryset, batch_size=1000):
+    """
+    Re-index every property of ``queryset`` in one transaction, so searches
+    see the old index until the new one is complete and a failure leaves
+    it untouched
+    """
+    backend = get_backend()
+    if backend is None:
+        return 0
+    count = 0
+    batch = []
+    with transaction.atomic():
+        with connection.cursor() as cursor:
+            backend.clear(cursor)
+        for prop in queryset.only('pk', 'tenant_id', *SEARCH_COLUMNS).iterator(chunk_size=batch_size):
+            batch.append(prop)
+            if len(batch) >= batch_size:
+                index_properties(batch)
+                count += len(batch)
+                batch = []
+        index_properties(batch)
+    return count + len(batch)
+
+
+def search(queryset, text, tenant_id=None):
+    """
+    Restrict ``queryset`` to properties matching ``text`` and annotate each
+    with a relevance score (higher is better), ordered best first. With
+    ``tenant_id`` only that tenant's index rows are matched.
+    """
+    terms = query_terms(text)
+    if not terms:
+        return queryset
+
+    backend = get_backend()
+    if backend is None:
+        # No full-text support: plain substring match, unranked
+        condition = Q()
+        for spellings in terms:
+            matches = Q()
+            for spelling in spellings:
+                for column in SEARCH_COLUMNS:
+                    matches |= Q(**{f'{column}__icontains': spelling})
+            condition &= matches
+        return queryset.filter(condition).annotate(
+            **{RANK_ANNOTATION: Value(0.0, output_field=FloatField())}
+        )
+
+    query = backend.build_query(terms)
+    table = queryset.model._meta.db_table
+    scoped = tenant_id is not None
+    return queryset.filter(
+        pk__in=RawSQL(backend.match_sql(scoped), [query, tenant_id] if scoped else [query])
+    ).annotate(
+        **{RANK_ANNOTATION: RawSQL(backend.rank_sql(table), [query], output_field=FloatField())}
+    ).order_by(f'-{RANK_ANNOTATION}', '-id')
+
+
+class PropertySearchFilter(filters.SearchFilter):
+    """
+    ?search= backed by the full-text index instead of icontains scans
+    """
+
+    def filter_queryset(self, request, queryset, view):
+        text = request.query_params.get(self.search_param, '')
+        tenant = getattr(request, 'tenant', None)
+        return search(queryset, text, tenant.pk if tenant is not None else None)
@@ -1,21 +1,72 @@
+from django.core.files.storage import default_storage
 from rest_framework import serializers
+from core.bulk import BulkListSerializer
+from core.sparse import SparseFieldsMixin
+from .images import FORMATS, VARIANTS
 from .models import Property, PropertyImage
 
 
+class ImageVariantsField(serializers.Field):
+    """
+    Resized copies of an image, for <img srcset> / <picture>:
+
+        {"thumbnail": {"width": 320, "height": 240, "webp": url, "jpeg": url},
+         ..., "srcset": {"webp": "url 320w, url 800w, ...", "jpeg": ...}}
+
+    Empty until the background job has rendered them.
+    """
+
+    def __init__(self, **kwargs):
+        kwargs['read_only'] = True
+        super().__init__(**kwargs)
+
+    def to_representation(self, variants):
+        request = self.context.get('request')
+
+        def url(path):
+            url = default_storage.url(path)
+            return request.build_absolute_uri(url) if request is not None else url
+
+        data = {}
+        for variant in VARIANTS:
+            entry = variants.get(variant)
+            if entry:
+                data[variant] = {
+                    'width': entry['width'],
+                    'height': entry['height'],
+                    **{extension: url(entry[extension]) for extension in FORMATS},
+                }
+        if data:
+            # Small originals are not upscaled, so variants can share a width
+            widths = {entry['width']: entry for entry in reversed(list(data.values()))}
+            data['srcset'] = {
+                extension: ', '.join(f'{entry[extension]} {width}w' for width, entry in sorted(widths.items()))
+                for extension in FORMATS
+            }
+        return data
+
+
 class PropertyImageSerializer(serializers.ModelSerializer):
+    variants = ImageVariantsField()
+
     class Meta:
         model = PropertyImage
-        fields = ['id', 'image', 'caption', 'uploaded_at']
+        fields = ['id', 'image', 'caption', 'uploaded_at', 'variants']
         read_only_fields = ['uploaded_at']
 
 
-class PropertySerializer(serializers.ModelSerializer):
+class PropertySerializer(SparseFieldsMixin, serializers.ModelSerializer):
     images = PropertyImageSerializer(many=True, read_only=True)
-    
+    main_image_variants = ImageVariantsField()
+    # Lists show the gallery only with ?expand=images
+    expandable_fields = {'images': None}
+
     class Meta:
         model = Property
         fields = '__all__'
         read_only_fields = ['tenant', 'created_at', 'updated_at']
+        list_serializer_class = BulkListSerializer
+        list_exclude = ['description', 'images']
 
     def create(self, validated_data):
         request = self.context.get('request')
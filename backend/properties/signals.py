@@ -0,0 +1,41 @@
+from django.db import transaction
+from django.db.models.signals import post_save, post_delete
+from django.dispatch import receiver
+from core.bulk import bulk_saved
+from .images import delete_variants, needs_processing
+from .jobs import queue_image_processing
+from .models import Property, PropertyImage
+from .search import index_properties, unindex_properties
+
+
+@receiver(post_save, sender=Property)
+def index_property(sender, instance, raw=False, **kwargs):
+    if not raw:
+        index_properties([instance])
+
+
+@receiver(bulk_saved, sender=Property)
+def index_bulk_properties(sender, instances, **kwargs):
+    index_properties(instances)
+
+
+@receiver(post_delete, sender=Property)
+def unindex_property(sender, instance, **kwargs):
+    unindex_properties([instance.pk])
+
+
+# Resize new uploads in the background so the upload request returns at once
+@receiver(post_save, sender=Property)
+@receiver(post_save, sender=PropertyImage)
+def queue_image_variants(sender, instance, raw=False, **kwargs):
+    kind = 'property' if sender is Property else 'gallery'
+    if not raw and needs_processing(instance, kind):
+        queue_image_processing(kind, instance.pk)
+
+
+@receiver(post_delete, sender=Property)
+@receiver(post_delete, sender=PropertyImage)
+def delete_image_variants(sender, instance, **kwargs):
+    variants = instance.main_image_variants if sender is Property else instance.variants
+    if variants:
+        transaction.on_commit(lambda: delete_variants(variants))
@@ -1,3 +1,288 @@
-from django.test import TestCase
+import csv
+import os
+import shutil
+import tempfile
+import zipfile
+from io import BytesIO, StringIO
+from unittest import mock
+from xml.etree import ElementTree
 
-# Create your tests here.
+from django.core.files.base import ContentFile
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.core.management import call_command
+from django.test import TestCase, override_settings
+from PIL import Image
+from rest_framework.test import APIClient
+
+from core.jobs import Worker
+from core.models import Job, Tenant, User
+from core.rollup import check_tenant_stats
+from .models import Property, PropertyImage
+from .search import normalize_arabic, query_terms, rebuild_index, search
+
+XLSX_NS = '{http://schemas.openxmlformats.org/spreadsheetml/2006/main}'
+
+
+class PropertyBulkTests(TestCase):
+    def setUp(self):
+        self.tenant = Tenant.objects.create(name='alpha', subdomain='alpha')
+        self.user = User.objects.create_user('owner', password='password', tenant=self.tenant)
+        self.api = APIClient()
+        self.api.force_authenticate(self.user)
+
+    def test_bulk_created_properties_are_searchable(self):
+        items = [
+            {'title': f'شقة {i}', 'property_type': 'APARTMENT', 'city': 'الرياض', 'address': 'Street', 'area': 100, 'price': 1000}
+            for i in range(10)
+        ]
+        headers = {'HTTP_X_TENANT_ID': str(self.tenant.pk)}
+        response = self.api.post('/api/properties/bulk/', items, format='json', **headers)
+        self.assertEqual(response.status_code, 201)
+        self.assertEqual(Property.objects.filter(tenant=self.tenant).count(), 10)
+        self.assertEqual(check_tenant_stats(self.tenant.pk), [])
+
+        response = self.api.get('/api/properties/', {'search': 'رياض'}, **headers)
+        self.assertEqual(response.json()['count'], 10)
+
+    def test_export_applies_list_filters_and_search(self):
+        headers = {'HTTP_X_TENANT_ID': str(self.tenant.pk)}
+        for i, (title, city) in enumerate([
+            ('فيلا البحر', 'جدة'), ('فيلا الحديقة', 'جدة'), ('شقة البحر', 'جدة'), ('فيلا النخيل', 'الرياض'),
+        ]):
+            Property.objects.create(
+                tenant=self.tenant, title=title, property_type='VILLA',
+                city=city, address='Street', area=100, price=1000 * (i + 1),
+            )
+        params = {'city': 'جدة', 'search': 'فيلا', 'ordering': '-price'}
+        listed = [
+            [str(row['id']), row['title']]
+            for row in self.api.get('/api/properties/', params, **headers).json()['results']
+        ]
+        self.assertEqual([title for _, title in listed], ['فيلا الحديقة', 'فيلا البحر'])
+
+        response = self.api.get('/api/properties/export/', {**params, 'output': 'csv'}, **headers)
+        self.assertTrue(response.streaming)
+        text = b''.join(response.streaming_content).decode('utf-8-sig')
+        rows = list(csv.reader(StringIO(text, newline='')))
+        self.assertEqual(rows[0][:2], ['ID', 'Title'])
+        self.assertEqual([row[:2] for row in rows[1:]], listed)
+
+        response = self.api.get('/api/properties/export/', {**params, 'output': 'xlsx'}, **headers)
+        self.assertTrue(response.streaming)
+        archive = zipfile.ZipFile(BytesIO(b''.join(response.streaming_content)))
+        self.assertIsNone(archive.testzip())
+        ElementTree.fromstring(archive.read('xl/workbook.xml'))
+        sheet = ElementTree.fromstring(archive.read('xl/worksheets/sheet1.xml'))
+        rows = [
+            [''.join(cell.itertext()) for cell in row.iter(f'{XLSX_NS}c')]
+            for row in sheet.iter(f'{XLSX_NS}row')
+        ]
+        self.assertEqual(rows[0][:2], ['ID', 'Title'])
+        self.assertEqual([row[:2] for row in rows[1:]], listed)
+
+
+class PropertySearchTests(TestCase):
+    def setUp(self):
+        self.tenant = Tenant.objects.create(name='alpha', subdomain='alpha')
+        self.user = User.objects.create_user('owner', password='password', tenant=self.tenant)
+        self.api = APIClient()
+        self.api.force_authenticate(self.user)
+        titles = ['المدرسة الأهلية', 'إسكان الشَّاطِئ', 'مبنى الرياض', 'Sea View Villa']
+        self.ids = {
+            title: Property.objects.create(
+                tenant=self.tenant, title=title, property_type='APARTMENT',
+                city='جدة', address='Street', area=100, price=1000,
+            ).pk
+            for title in titles
+        }
+
+    def found(self, text):
+        response = self.api.get('/api/properties/', {'search': text}, HTTP_X_TENANT_ID=str(self.tenant.pk))
+        self.assertEqual(response.status_code, 200)
+        return {row['title'] for row in response.json()['results']}
+
+    def test_normalization(self):
+        self.assertEqual(normalize_arabic('المدرسة'), 'مدرسه')
+        self.assertEqual(normalize_arabic('إسكان'), 'اسكان')
+        self.assertEqual(normalize_arabic('الشَّاطِئ'), 'شاطي')
+        self.assertEqual(normalize_arabic('مبنى'), 'مبني')
+        # The article stays on words too short to lose it
+        self.assertEqual(normalize_arabic('الف'), 'الف')
+        self.assertEqual(normalize_arabic('Sea VIEW'), 'sea view')
+        self.assertEqual(query_terms('ال الر مدرسة'), [('الر', 'ر'), ('مدرسه',)])
+
+    def test_spelling_variants_match(self):
+        for text in ('مدرسه', 'المدرسة', 'اهليه', 'اسكان', 'شاطئ', 'الشاطئ', 'مبني', 'sea'):
+            with self.subTest(text=text):
+                self.assertTrue(self.found(text), text)
+        self.assertEqual(self.found('مدرسه اهليه'), {'المدرسة الأهلية'})
+        self.assertEqual(self.found('مدرسه رياض'), set())
+
+    def test_prefix_queries(self):
+        # Each step of typing "الرياض"
+        for text in ('ال', 'الر', 'الري', 'الرياض', 'ريا'):
+            with self.subTest(text=text):
+                self.assertIn('مبنى الرياض', self.found(text))
+        self.assertEqual(self.found('الم'), {'المدرسة الأهلية', 'مبنى الرياض'})
+        self.assertEqual(self.found('vil'), {'Sea View Villa'})
+
+    def test_index_rows_are_scoped_to_the_tenant(self):
+        other = Tenant.objects.create(name='beta', subdomain='beta')
+        Property.objects.create(
+            tenant=other, title='مدرسة أخرى', property_type='APARTMENT',
+            city='جدة', address='Street', area=100, price=1000,
+        )
+        everything = Property.objects.all()
+        self.assertEqual(search(everything, 'مدرسه').count(), 2)
+        self.assertEqual(list(search(everything, 'مدرسه', self.tenant.pk).values_list('pk', flat=True)), [self.ids['المدرسة الأهلية']])
+        self.assertEqual(search(everything, 'مدرسه', other.pk).get().tenant, other)
+
+    def test_failed_rebuild_keeps_the_index(self):
+        with mock.patch('properties.search.index_properties', side_effect=RuntimeError('disk full')):
+            with self.assertRaises(RuntimeError):
+                rebuild_index(Property.objects.order_by('pk'), batch_size=2)
+        self.assertEqual(self.found('مدرسه'), {'المدرسة الأهلية'})
+        self.assertEqual(rebuild_index(Property.objects.order_by('pk'), batch_size=3), 4)
+        self.assertEqual(self.found('sea'), {'Sea View Villa'})
+
+
+class PropertyFacetTests(TestCase):
+    def setUp(self):
+        self.tenant = Tenant.objects.create(name='alpha', subdomain='alpha')
+        self.user = User.objects.create_user('owner', password='password', tenant=self.tenant)
+        self.api = APIClient()
+        self.api.force_authenticate(self.user)
+        self.headers = {'HTTP_X_TENANT_ID': str(self.tenant.pk)}
+        for property_type, city, area, price in [
+            ('APARTMENT', 'الرياض', 90, 30000),
+            ('APARTMENT', 'الرياض', 120, 60000),
+            ('APARTMENT', 'جدة', 150, 60000),
+            ('VILLA', 'الرياض', 400, 150000),
+            ('VILLA', 'جدة', 600, 250000),
+        ]:
+            Property.objects.create(
+                tenant=self.tenant, title='عقار', property_type=property_type,
+                city=city, address='Street', area=area, price=price,
+            )
+
+    def facets(self, **params):
+        response = self.api.get('/api/properties/facets/', params, **self.headers)
+        self.assertEqual(response.status_code, 200, response.content[:300])
+        return response.json()
+
+    def test_list_filters(self):
+        for params, expected in [
+            ({'city': 'جدة'}, 2),
+            ({'property_type': 'VILLA,APARTMENT', 'city': 'الرياض'}, 3),
+            ({'min_area': 100, 'max_area': 400}, 3),
+            ({'min_price': 60000, 'max_price': 150000}, 3),
+        ]:
+            with self.subTest(params=params):
+                response = self.api.get('/api/properties/', {**params, 'page': 1}, **self.headers)
+                self.assertEqual(response.json()['count'], expected)
+        response = self.api.get('/api/properties/', {'property_type': 'CASTLE'}, **self.headers)
+        self.assertEqual(response.status_code, 400)
+
+    def test_counts_leave_out_their_own_filter(self):
+        facets = self.facets(property_type='VILLA', city='الرياض')
+        self.assertEqual(facets['count'], 1)
+        # Types still show every type in the city, cities every city for villas
+        self.assertEqual(
+            [(row['value'], row['label'], row['count']) for row in facets['property_type']],
+            [('APARTMENT', 'Apartment', 2), ('VILLA', 'Villa', 1)],
+        )
+        self.assertEqual({row['value']: row['count'] for row in facets['city']}, {'الرياض': 1, 'جدة': 1})
+        self.assertEqual([row['count'] for row in facets['price']], [0, 0, 0, 1, 0, 0])
+        self.assertEqual(facets['area'][0], {'min': None, 'max': 50, 'count': 0})
+        self.assertEqual(sum(row['count'] for row in facets['area']), 1)
+
+        self.assertEqual(self.facets(search='عقار', min_price=50000)['count'], 4)
+
+    def test_cached_until_a_property_changes(self):
+        self.facets()
+        # Only the change version is read
+        with self.assertNumQueries(1):
+            self.assertEqual(self.facets()['count'], 5)
+        with self.assertNumQueries(5):
+            self.facets(city='جدة')
+
+        Property.objects.filter(tenant=self.tenant).first().delete()
+        self.assertEqual(self.facets()['count'], 4)
+
+    def test_rejects_bad_filters(self):
+        response = self.api.get('/api/properties/facets/', {'min_price': 'cheap'}, **self.headers)
+        self.assertEqual(response.status_code, 400)
+
+
+def photo(size=(3000, 2000), orientation=6):
+    """
+    A JPEG as a phone camera writes it: rotated via EXIF, with GPS tags
+    """
+    exif = Image.Exif()
+    exif[0x0112] = orientation
+    exif[0x010F] = 'PhoneMaker'
+    exif.get_ifd(0x8825)[2] = (24.0, 42.0, 0.0)
+    buffer = BytesIO()
+    Image.new('RGB', size, 'orange').save(buffer, 'JPEG', exif=exif)
+    return buffer.getvalue()
+
+
+class PropertyImageVariantTests(TestCase):
+    def setUp(self):
+        self.media_root = tempfile.mkdtemp()
+        self.settings_override = override_settings(MEDIA_ROOT=self.media_root)
+        self.settings_override.enable()
+
+        self.tenant = Tenant.objects.create(name='alpha', subdomain='alpha')
+        self.user = User.objects.create_user('owner', password='password', tenant=self.tenant)
+        self.api = APIClient()
+        self.api.force_authenticate(self.user)
+        self.headers = {'HTTP_X_TENANT_ID': str(self.tenant.pk)}
+
+    def tearDown(self):
+        self.settings_override.disable()
+        shutil.rmtree(self.media_root, ignore_errors=True)
+
+    def test_upload_is_resized_in_the_background(self):
+        response = self.api.post('/api/properties/', {
+            'title': 'فيلا', 'property_type': 'VILLA', 'city': 'جدة', 'address': 'Street', 'area': 300, 'price': 1000,
+            'main_image': SimpleUploadedFile('villa.jpg', photo(), content_type='image/jpeg'),
+        }, format='multipart', **self.headers)
+        self.assertEqual(response.status_code, 201)
+        self.assertEqual(response.json()['main_image_variants'], {})
+        self.assertEqual(Job.objects.filter(kind='process_property_image').count(), 1)
+
+        Worker().run(once=True)
+        variants = self.api.get(f"/api/properties/{response.json()['id']}/", **self.headers).json()['main_image_variants']
+        self.assertEqual(variants['thumbnail']['width'], 213)
+        self.assertEqual(variants['thumbnail']['height'], 320)
+        self.assertEqual(variants['full']['height'], 1920)
+        self.assertTrue(variants['card']['webp'].startswith('http://testserver/media/properties/main/variants/villa_card'))
+        self.assertEqual(variants['srcset']['jpeg'].count('w, '), 2)
+
+        stored = Property.objects.get().main_image_variants
+        for extension, image_format in (('webp', 'WEBP'), ('jpeg', 'JPEG')):
+            with Image.open(os.path.join(self.media_root, stored['card'][extension])) as image:
+                self.assertEqual((image.format, image.size), (image_format, (533, 800)))
+                self.assertEqual(len(image.getexif()), 0)
+
+    def test_backfill_and_replace(self):
+        prop = Property.objects.create(
+            tenant=self.tenant, title='شقة', property_type='APARTMENT', city='جدة', address='Street', area=100, price=1000,
+        )
+        gallery = PropertyImage.objects.create(property=prop, image=ContentFile(photo((400, 300), 1), name='small.jpg'))
+        Job.objects.all().delete()
+
+        call_command('process_property_images', processes=0, stdout=StringIO())
+        gallery.refresh_from_db()
+        # Never upscaled, and equal widths appear once in the srcset
+        self.assertEqual([gallery.variants[name]['width'] for name in ('thumbnail', 'card', 'full')], [320, 400, 400])
+        data = self.api.get(f'/api/properties/{prop.pk}/', **self.headers).json()['images'][0]['variants']
+        self.assertEqual(data['srcset']['webp'].count('w, '), 1)
+
+        old_files = [gallery.variants[name][extension] for name in ('thumbnail', 'card', 'full') for extension in ('webp', 'jpeg')]
+        gallery.image.save('other.jpg', ContentFile(photo((800, 600), 1)))
+        Worker().run(once=True)
+        gallery.refresh_from_db()
+        self.assertTrue(gallery.variants['card']['jpeg'].endswith('other_card.jpeg'))
+        self.assertFalse(any(os.path.exists(os.path.join(self.media_root, path)) for path in old_files))
@@ -1,7 +1,10 @@
 from django.urls import path
-from .views import PropertyListCreateView, PropertyDetailView
+from .views import PropertyListCreateView, PropertyExportView, PropertyBulkView, PropertyDetailView, PropertyFacetsView
 
 urlpatterns = [
     path('', PropertyListCreateView.as_view(), name='property-list-create'),
+    path('export/', PropertyExportView.as_view(), name='property-export'),
+    path('facets/', PropertyFacetsView.as_view(), name='property-facets'),
+    path('bulk/', PropertyBulkView.as_view(), name='property-bulk'),
     path('<int:pk>/', PropertyDetailView.as_view(), name='property-detail'),
 ]
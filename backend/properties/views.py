@@ -1,20 +1,85 @@
 from rest_framework import generics, permissions, filters
-from .models import Property
+from rest_framework.response import Response
+from rest_framework.views import APIView
+from django_filters.rest_framework import DjangoFilterBackend
+from core.bulk import BulkWriteMixin
+from core.export import ExportMixin
+from core.sparse import SparseFieldsViewMixin
+from core.versions import ConditionalGetMixin
+from .models import Property, PropertyImage
 from .serializers import PropertySerializer
+from .facets import cached_facets
+from .filters import PropertyFilter
+from .search import PropertySearchFilter
 
-class PropertyListCreateView(generics.ListCreateAPIView):
+class PropertyListCreateView(ConditionalGetMixin, SparseFieldsViewMixin, generics.ListCreateAPIView):
     serializer_class = PropertySerializer
+    etag_models = (Property, PropertyImage)
     permission_classes = [permissions.IsAuthenticated]
-    filter_backends = [filters.SearchFilter, filters.OrderingFilter]
-    search_fields = ['title', 'location']
+    filter_backends = [DjangoFilterBackend, PropertySearchFilter, filters.OrderingFilter]
+    filterset_class = PropertyFilter
+    search_fields = ['title', 'city', 'address', 'description']
     ordering_fields = ['price', 'created_at']
 
     def get_queryset(self):
-        return Property.objects.filter(tenant=self.request.tenant)
+        return Property.objects.filter(tenant=self.request.tenant).prefetch_related('images')
+
+class PropertyExportView(ExportMixin, PropertyListCreateView):
+    """
+    Stream the properties matching the list filters and search
+    as ?output=csv or ?output=xlsx
+    """
+    export_name = 'properties'
+    export_columns = (
+        ('id', 'ID'),
+        ('title', 'Title'),
+        ('property_type', 'Type'),
+        ('city', 'City'),
+        ('address', 'Address'),
+        ('area', 'Area (m²)'),
+        ('price', 'Price'),
+        ('created_at', 'Created at'),
+    )
+
+    http_method_names = ['get', 'head', 'options']
+
+    def get_queryset(self):
+        # Rows are read with values_list(); nothing to prefetch
+        return super().get_queryset().prefetch_related(None)
+
+    def get(self, request):
+        return self.export(request)
+
+class PropertyFacetsView(APIView):
+    """
+    Counts per type and city and price/area histograms for the list
+    filters and search in the query string (see properties.facets)
+    """
+    permission_classes = [permissions.IsAuthenticated]
 
-class PropertyDetailView(generics.RetrieveUpdateDestroyAPIView):
+    def get(self, request):
+        return Response(cached_facets(request.tenant, request.query_params, request))
+
+class PropertyBulkView(BulkWriteMixin, generics.GenericAPIView):
+    """
+    Create (POST) or update (PATCH) up to BULK_MAX_ITEMS properties at once
+    """
     serializer_class = PropertySerializer
     permission_classes = [permissions.IsAuthenticated]
 
     def get_queryset(self):
         return Property.objects.filter(tenant=self.request.tenant)
+
+    def post(self, request):
+        return self.bulk_write(request)
+
+    def patch(self, request):
+        return self.bulk_write(request)
+
+class PropertyDetailView(ConditionalGetMixin, SparseFieldsViewMixin, generics.RetrieveUpdateDestroyAPIView):
+    serializer_class = PropertySerializer
+    etag_models = (Property, PropertyImage)
+    permission_classes = [permissions.IsAuthenticated]
+
+    def get_queryset(self):
+        return Property.objects.filter(tenant=self.request.tenant).prefetch_related('images')
@@ -1,75 +1,56 @@
+"""
+Fill the database with realistic demo tenants (see core/synthetic.py).
+
+    python seed_data.py                              # 3 tenants, ~30k invoices
+    python seed_data.py --tenants 50 --invoices 1000000 --seed 7
+    python seed_data.py --tenants 5 --properties 200 --replace
+
+Every tenant gets an owner login demo<N>_owner / password, plus the
+admin / password superuser.
+"""
+import argparse
 import os
+import time
+
 import django
-import random
-from datetime import date, timedelta
 
 os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'config.settings')
-django.setup()
 
-from core.models import Tenant, User
-from properties.models import Property
-from contracts.models import Contract
-from finance.models import Invoice
 
-def seed():
-    print("Seeding data...")
+def seed(tenants, properties, seed=0, replace=False):
+    from core.models import Tenant, User
+    from core.synthetic import Generator
+
+    if replace:
+        Tenant.objects.filter(subdomain__startswith='demo').delete()
+    first_index = Tenant.objects.filter(subdomain__startswith='demo').count() + 1
+
+    if not User.objects.filter(username='admin').exists():
+        User.objects.create_superuser('admin', 'admin@example.com', 'password', role=User.Role.SUPERADMIN)
 
-    # Create Tenants
-    tenant1, _ = Tenant.objects.get_or_create(name="Alpha Real Estate", subdomain="alpha")
-    tenant2, _ = Tenant.objects.get_or_create(name="Beta Properties", subdomain="beta")
+    return Generator(seed=seed).run(tenants, properties, first_index=first_index)
 
-    # Create Users
-    # SuperAdmin
-    if not User.objects.filter(username="admin").exists():
-        User.objects.create_superuser("admin", "admin@example.com", "password")
-    
-    # Tenant 1 Users
-    owner1, _ = User.objects.get_or_create(username="alpha_owner", email="owner@alpha.com", role=User.Role.OWNER, tenant=tenant1)
-    owner1.set_password("password")
-    owner1.save()
 
-    client1, _ = User.objects.get_or_create(username="alpha_client", email="client@alpha.com", role=User.Role.CLIENT, tenant=tenant1)
-    client1.set_password("password")
-    client1.save()
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--tenants', type=int, default=3)
+    size = parser.add_mutually_exclusive_group()
+    size.add_argument('--properties', type=int, help="Properties over all tenants")
+    size.add_argument('--invoices', type=int, default=30000, help="Roughly how many invoices to generate")
+    parser.add_argument('--seed', type=int, default=0, help="Random seed; the same seed gives the same data")
+    parser.add_argument('--replace', action='store_true', help="Delete existing demo tenants first")
+    args = parser.parse_args()
 
-    # Tenant 2 Users
-    owner2, _ = User.objects.get_or_create(username="beta_owner", email="owner@beta.com", role=User.Role.OWNER, tenant=tenant2)
-    owner2.set_password("password")
-    owner2.save()
+    django.setup()
+    from core.synthetic import properties_for_invoices
 
-    # Create Properties for Tenant 1
-    for i in range(5):
-        prop = Property.objects.create(
-            tenant=tenant1,
-            title=f"Alpha Property {i+1}",
-            property_type=random.choice(['APARTMENT', 'VILLA', 'OFFICE']),
-            area=random.randint(50, 500),
-            location=f"Location {i+1}",
-            price=random.randint(1000, 10000),
-            description="Beautiful property"
-        )
-        
-        # Create Contract
-        if i < 2:
-            contract = Contract.objects.create(
-                tenant=tenant1,
-                property=prop,
-                client=client1,
-                start_date=date.today(),
-                end_date=date.today() + timedelta(days=365),
-                amount=prop.price
-            )
-            
-            # Create Invoice
-            Invoice.objects.create(
-                tenant=tenant1,
-                contract=contract,
-                amount=contract.amount,
-                due_date=date.today() + timedelta(days=30),
-                status='PENDING'
-            )
+    properties = args.properties or properties_for_invoices(args.invoices)
+    started = time.perf_counter()
+    counts = seed(max(1, min(args.tenants, properties)), properties, seed=args.seed, replace=args.replace)
+    elapsed = time.perf_counter() - started
+    print(', '.join(f'{count} {name}' for name, count in counts.items()))
+    print(f"Seeded in {elapsed:.1f}s ({counts['invoices'] / elapsed:.0f} invoices/s)")
 
-    print("Seeding complete!")
 
 if __name__ == '__main__':
-    seed()
+    main()
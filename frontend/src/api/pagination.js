@@ -0,0 +1,77 @@
+import { useEffect, useState } from 'react';
+import api from './axios';
+
+// List endpoints answer { next, previous, results }; `next` is the full URL
+// of the following page (a cursor, or ?page=N for search results).
+const LOOKUP_PAGE_SIZE = 200;
+
+export async function fetchPage(url, params) {
+    const response = await api.get(url, params ? { params } : undefined);
+    return { results: response.data.results, next: response.data.next };
+}
+
+// Every row of a list, following `next`; for dropdowns and lookups
+export async function fetchAll(url, params = {}) {
+    let page = await fetchPage(url, { page_size: LOOKUP_PAGE_SIZE, ...params });
+    const rows = [...page.results];
+    while (page.next) {
+        page = await fetchPage(page.next);
+        rows.push(...page.results);
+    }
+    return rows;
+}
+
+// First page of `url` with `params`, and loadMore() to append the next one.
+// `loading` is only true until the first page arrives, so a search box
+// driving `params` keeps its focus while results refresh.
+export function usePaginatedList(url, params = {}) {
+    const [items, setItems] = useState([]);
+    const [next, setNext] = useState(null);
+    const [loading, setLoading] = useState(true);
+    const [loadingMore, setLoadingMore] = useState(false);
+    const query = JSON.stringify(params);
+
+    useEffect(() => {
+        let cancelled = false;
+        fetchPage(url, JSON.parse(query))
+            .then((page) => {
+                if (!cancelled) {
+                    setItems(page.results);
+                    setNext(page.next);
+                }
+            })
+            .catch((error) => console.error(`Error fetching ${url}:`, error))
+            .finally(() => {
+                if (!cancelled) setLoading(false);
+            });
+        return () => {
+            cancelled = true;
+        };
+    }, [url, query]);
+
+    const loadMore = async () => {
+        if (!next || loadingMore) return;
+        setLoadingMore(true);
+        try {
+            const page = await fetchPage(next);
+            setItems((previous) => [...previous, ...page.results]);
+            setNext(page.next);
+        } catch (error) {
+            console.error(`Error fetching ${url}:`, error);
+        } finally {
+            setLoadingMore(false);
+        }
+    };
+
+    return { items, setItems, loading, loadingMore, hasMore: Boolean(next), loadMore };
+}
+
+// `value` once it has stopped changing for `delay` ms
+export function useDebounced(value, delay = 300) {
+    const [debounced, setDebounced] = useState(value);
+    useEffect(() => {
+        const timer = setTimeout(() => setDebounced(value), delay);
+        return () => clearTimeout(timer);
+    }, [value, delay]);
+    return debounced;
+}
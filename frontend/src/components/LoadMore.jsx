@@ -0,0 +1,17 @@
+// "Load more" under a paginated list (see api/pagination.js)
+export default function LoadMore({ hasMore, loading, onClick, label = 'Load more', loadingLabel = 'Loading...' }) {
+    if (!hasMore) return null;
+
+    return (
+        <div className="flex justify-center pt-2">
+            <button
+                type="button"
+                onClick={onClick}
+                disabled={loading}
+                className="bg-dark-800 hover:bg-dark-700 border border-gray-700 text-gray-300 px-6 py-2 rounded-lg transition-colors disabled:opacity-50"
+            >
+                {loading ? loadingLabel : label}
+            </button>
+        </div>
+    );
+}
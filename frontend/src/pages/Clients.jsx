@@ -1,33 +1,16 @@
-import { useState, useEffect } from 'react';
+import { useState } from 'react';
 import { Link } from 'react-router-dom';
-import axios from '../api/axios';
+import { useDebounced, usePaginatedList } from '../api/pagination';
+import LoadMore from '../components/LoadMore';
 import { Users, Plus, Search, Phone, Mail } from 'lucide-react';
 
 export default function Clients() {
-    const [clients, setClients] = useState([]);
-    const [loading, setLoading] = useState(true);
     const [searchTerm, setSearchTerm] = useState('');
-
-    useEffect(() => {
-        fetchClients();
-    }, []);
-
-    const fetchClients = async () => {
-        try {
-            const response = await axios.get('/clients/');
-            setClients(response.data);
-        } catch (error) {
-            console.error('Error fetching clients:', error);
-        } finally {
-            setLoading(false);
-        }
-    };
-
-    const filteredClients = clients.filter(client =>
-        client.name?.toLowerCase().includes(searchTerm.toLowerCase()) ||
-        client.phone?.includes(searchTerm) ||
-        client.email?.toLowerCase().includes(searchTerm.toLowerCase())
-    );
+    // Searched on the server, across every page
+    const search = useDebounced(searchTerm.trim());
+    const {
+        items: filteredClients, loading, loadingMore, hasMore, loadMore,
+    } = usePaginatedList('/clients/', search ? { search } : {});
 
     if (loading) {
         return (
@@ -124,6 +107,8 @@ export default function Clients() {
                 </div>
             </div>
 
+            <LoadMore hasMore={hasMore} loading={loadingMore} onClick={loadMore} />
+
             {filteredClients.length === 0 && (
                 <div className="text-center py-12">
                     <Users size={64} className="mx-auto text-gray-600 mb-4" />
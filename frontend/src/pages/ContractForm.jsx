@@ -1,6 +1,7 @@
 import { useState, useEffect } from 'react';
 import { useNavigate } from 'react-router-dom';
 import axios from '../api/axios';
+import { fetchAll } from '../api/pagination';
 import { useLanguage } from '../context/LanguageContext';
 import { Upload, X, Calendar, DollarSign, FileText, Building2, User } from 'lucide-react';
 
@@ -28,12 +29,13 @@ export default function ContractForm() {
 
     const fetchData = async () => {
         try {
-            const [propsRes, clientsRes] = await Promise.all([
-                axios.get('/properties/'),
-                axios.get('/clients/')
+            // Every property and client, not just the first page
+            const [allProperties, allClients] = await Promise.all([
+                fetchAll('/properties/', { fields: 'id,title,city' }),
+                fetchAll('/clients/', { fields: 'id,name,phone' }),
             ]);
-            setProperties(propsRes.data);
-            setClients(clientsRes.data);
+            setProperties(allProperties);
+            setClients(allClients);
         } catch (error) {
             console.error('Error fetching data:', error);
         }
@@ -1,6 +1,8 @@
-import { useState, useEffect } from 'react';
+import { useState } from 'react';
 import { Link } from 'react-router-dom';
 import axios from '../api/axios';
+import { usePaginatedList } from '../api/pagination';
+import LoadMore from '../components/LoadMore';
 import { useLanguage } from '../context/LanguageContext';
 import {
     FileText, Plus, Download, Eye, Trash2, Calendar,
@@ -9,30 +11,16 @@ import {
 
 export default function Contracts() {
     const { t } = useLanguage();
-    const [contracts, setContracts] = useState([]);
-    const [loading, setLoading] = useState(true);
+    const {
+        items: contracts, setItems: setContracts, loading, loadingMore, hasMore, loadMore,
+    } = usePaginatedList('/contracts/');
     const [selectedPdf, setSelectedPdf] = useState(null);
 
-    useEffect(() => {
-        fetchContracts();
-    }, []);
-
-    const fetchContracts = async () => {
-        try {
-            const response = await axios.get('/contracts/');
-            setContracts(response.data);
-        } catch (error) {
-            console.error('Error fetching contracts:', error);
-        } finally {
-            setLoading(false);
-        }
-    };
-
     const deleteContract = async (id) => {
         if (!confirm(t('هل أنت متأكد من حذف هذا العقد؟', 'Are you sure you want to delete this contract?'))) return;
         try {
             await axios.delete(`/contracts/${id}/`);
-            setContracts(contracts.filter(c => c.id !== id));
+            setContracts((current) => current.filter(c => c.id !== id));
         } catch (error) {
             alert(t('حدث خطأ أثناء الحذف', 'Error deleting contract'));
         }
@@ -204,6 +192,14 @@ export default function Contracts() {
                 })}
             </div>
 
+            <LoadMore
+                hasMore={hasMore}
+                loading={loadingMore}
+                onClick={loadMore}
+                label={t('عرض المزيد', 'Load more')}
+                loadingLabel={t('جاري التحميل...', 'Loading...')}
+            />
+
             {contracts.length === 0 && (
                 <div className="text-center py-16 bg-white rounded-2xl border-2 border-dashed border-gray-300">
                     <FileText size={64} className="mx-auto text-gray-400 mb-4" />
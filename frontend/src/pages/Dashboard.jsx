@@ -1,5 +1,7 @@
 import { useState, useEffect } from 'react';
 import axios from '../api/axios';
+import { usePaginatedList } from '../api/pagination';
+import LoadMore from '../components/LoadMore';
 import { useLanguage } from '../context/LanguageContext';
 import {
     Building2, Users, FileText, DollarSign, TrendingUp,
@@ -37,8 +39,10 @@ ChartJS.register(
 export default function Dashboard() {
     const { language, toggleLanguage, t } = useLanguage();
     const [stats, setStats] = useState(null);
-    const [properties, setProperties] = useState([]);
-    const [clients, setClients] = useState([]);
+    const propertyList = usePaginatedList('/properties/');
+    const clientList = usePaginatedList('/clients/');
+    const { items: properties, setItems: setProperties } = propertyList;
+    const { items: clients, setItems: setClients } = clientList;
     const [loading, setLoading] = useState(true);
     const [activeTab, setActiveTab] = useState('overview');
 
@@ -48,19 +52,13 @@ export default function Dashboard() {
 
     const fetchAllData = async () => {
         try {
-            const [statsRes, propsRes, clientsRes] = await Promise.all([
-                axios.get('/dashboard/stats/').catch(() => ({ data: null })),
-                axios.get('/properties/').catch(() => ({ data: [] })),
-                axios.get('/clients/').catch(() => ({ data: [] })),
-            ]);
+            const statsRes = await axios.get('/dashboard/stats/').catch(() => ({ data: null }));
 
             setStats(statsRes.data || {
                 counts: { properties: 0, clients: 0, active_contracts: 0 },
                 financial: { total_revenue: 0, pending_amount: 0, overdue_amount: 0 },
                 charts: { monthly_revenue: [], property_distribution: [] }
             });
-            setProperties(propsRes.data);
-            setClients(clientsRes.data);
         } catch (error) {
             console.error('Error fetching data:', error);
         } finally {
@@ -72,7 +70,7 @@ export default function Dashboard() {
         if (!confirm(t('هل أنت متأكد من حذف هذا العقار؟', 'Are you sure you want to delete this property?'))) return;
         try {
             await axios.delete(`/properties/${id}/`);
-            setProperties(properties.filter(p => p.id !== id));
+            setProperties((current) => current.filter(p => p.id !== id));
         } catch (error) {
             alert(t('حدث خطأ أثناء الحذف', 'Error deleting property'));
         }
@@ -82,13 +80,13 @@ export default function Dashboard() {
         if (!confirm(t('هل أنت متأكد من حذف هذا العميل؟', 'Are you sure you want to delete this client?'))) return;
         try {
             await axios.delete(`/clients/${id}/`);
-            setClients(clients.filter(c => c.id !== id));
+            setClients((current) => current.filter(c => c.id !== id));
         } catch (error) {
             alert(t('حدث خطأ أثناء الحذف', 'Error deleting client'));
         }
     };
 
-    if (loading) {
+    if (loading || propertyList.loading || clientList.loading) {
         return (
             <div className="flex items-center justify-center h-screen bg-gray-50">
                 <div className="text-center">
@@ -337,6 +335,14 @@ export default function Dashboard() {
                             ))}
                         </div>
 
+                        <LoadMore
+                            hasMore={propertyList.hasMore}
+                            loading={propertyList.loadingMore}
+                            onClick={propertyList.loadMore}
+                            label={t('عرض المزيد', 'Load more')}
+                            loadingLabel={t('جاري التحميل...', 'Loading...')}
+                        />
+
                         {properties.length === 0 && (
                             <div className="text-center py-16 bg-white rounded-2xl border-2 border-dashed border-gray-300">
                                 <Building2 size={64} className="mx-auto text-gray-400 mb-4" />
@@ -433,6 +439,14 @@ export default function Dashboard() {
                             </div>
                         </div>
 
+                        <LoadMore
+                            hasMore={clientList.hasMore}
+                            loading={clientList.loadingMore}
+                            onClick={clientList.loadMore}
+                            label={t('عرض المزيد', 'Load more')}
+                            loadingLabel={t('جاري التحميل...', 'Loading...')}
+                        />
+
                         {clients.length === 0 && (
                             <div className="text-center py-16 bg-white rounded-2xl border-2 border-dashed border-gray-300">
                                 <Users size={64} className="mx-auto text-gray-400 mb-4" />
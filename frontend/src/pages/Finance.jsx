@@ -1,6 +1,8 @@
-import { useState, useEffect } from 'react';
+import { useState } from 'react';
 import { Link } from 'react-router-dom';
 import axios from '../api/axios';
+import { usePaginatedList } from '../api/pagination';
+import LoadMore from '../components/LoadMore';
 import { useLanguage } from '../context/LanguageContext';
 import {
     DollarSign, Plus, Download, Eye, Trash2, Calendar,
@@ -9,31 +11,25 @@ import {
 
 export default function Finance() {
     const { t } = useLanguage();
-    const [invoices, setInvoices] = useState([]);
-    const [loading, setLoading] = useState(true);
+    const {
+        items: invoices, setItems: setInvoices, loading, loadingMore, hasMore, loadMore,
+    } = usePaginatedList('/finance/');
     const [downloadingId, setDownloadingId] = useState(null);
 
-    useEffect(() => {
-        fetchInvoices();
-    }, []);
-
-    const fetchInvoices = async () => {
-        try {
-            const response = await axios.get('/finance/');
-            setInvoices(response.data);
-        } catch (error) {
-            console.error('Error fetching invoices:', error);
-        } finally {
-            setLoading(false);
-        }
-    };
-
     const downloadPdf = async (invoice) => {
         setDownloadingId(invoice.id);
         try {
-            const response = await axios.get(`/finance/${invoice.id}/download_pdf/`, {
-                responseType: 'blob',
-            });
+            // 202 means the PDF is still being rendered; retry as told
+            let response;
+            for (let attempt = 0; attempt < 30; attempt++) {
+                response = await axios.get(`/finance/${invoice.id}/download_pdf/`, {
+                    responseType: 'blob',
+                });
+                if (response.status !== 202) break;
+                const retryAfter = Number(response.headers['retry-after'] || 2);
+                await new Promise((resolve) => setTimeout(resolve, retryAfter * 1000));
+            }
+            if (response.status === 202) throw new Error('PDF not ready');
 
             const url = window.URL.createObjectURL(new Blob([response.data]));
             const link = document.createElement('a');
@@ -54,7 +50,7 @@ export default function Finance() {
         if (!confirm(t('هل أنت متأكد من حذف هذه الفاتورة؟', 'Are you sure you want to delete this invoice?'))) return;
         try {
             await axios.delete(`/finance/${id}/`);
-            setInvoices(invoices.filter(inv => inv.id !== id));
+            setInvoices((current) => current.filter(inv => inv.id !== id));
         } catch (error) {
             alert(t('حدث خطأ أثناء الحذف', 'Error deleting invoice'));
         }
@@ -200,6 +196,14 @@ export default function Finance() {
                 })}
             </div>
 
+            <LoadMore
+                hasMore={hasMore}
+                loading={loadingMore}
+                onClick={loadMore}
+                label={t('عرض المزيد', 'Load more')}
+                loadingLabel={t('جاري التحميل...', 'Loading...')}
+            />
+
             {invoices.length === 0 && (
                 <div className="text-center py-16 bg-white rounded-2xl border-2 border-dashed border-gray-300">
                     <DollarSign size={64} className="mx-auto text-gray-400 mb-4" />
@@ -1,6 +1,7 @@
 import { useState, useEffect } from 'react';
 import { useNavigate } from 'react-router-dom';
 import axios from '../api/axios';
+import { fetchAll } from '../api/pagination';
 import { useLanguage } from '../context/LanguageContext';
 import { DollarSign, Calendar, FileText, CheckCircle } from 'lucide-react';
 
@@ -27,8 +28,11 @@ export default function InvoiceForm() {
 
     const fetchContracts = async () => {
         try {
-            const response = await axios.get('/contracts/');
-            setContracts(response.data.filter(c => c.status === 'ACTIVE'));
+            // Every ACTIVE contract, not just the first page
+            setContracts(await fetchAll('/contracts/', {
+                status: 'ACTIVE',
+                fields: 'id,property_title,client_name',
+            }));
         } catch (error) {
             console.error('Error fetching contracts:', error);
         }
@@ -142,7 +146,7 @@ export default function InvoiceForm() {
                                 <option value="">{t('اختر العقد (اختياري)', 'Select Contract (Optional)')}</option>
                                 {contracts.map(contract => (
                                     <option key={contract.id} value={contract.id}>
-                                        {contract.property?.title} - {contract.client?.name}
+                                        {contract.property_title} - {contract.client_name}
                                     </option>
                                 ))}
                             </select>
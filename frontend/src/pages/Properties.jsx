@@ -1,32 +1,16 @@
-import { useState, useEffect } from 'react';
+import { useState } from 'react';
 import { Link } from 'react-router-dom';
-import axios from '../api/axios';
+import { useDebounced, usePaginatedList } from '../api/pagination';
+import LoadMore from '../components/LoadMore';
 import { Building2, Plus, Search, MapPin, DollarSign } from 'lucide-react';
 
 export default function Properties() {
-    const [properties, setProperties] = useState([]);
-    const [loading, setLoading] = useState(true);
     const [searchTerm, setSearchTerm] = useState('');
-
-    useEffect(() => {
-        fetchProperties();
-    }, []);
-
-    const fetchProperties = async () => {
-        try {
-            const response = await axios.get('/properties/');
-            setProperties(response.data);
-        } catch (error) {
-            console.error('Error fetching properties:', error);
-        } finally {
-            setLoading(false);
-        }
-    };
-
-    const filteredProperties = properties.filter(property =>
-        property.title?.toLowerCase().includes(searchTerm.toLowerCase()) ||
-        property.city?.toLowerCase().includes(searchTerm.toLowerCase())
-    );
+    // Searched on the server, across every page
+    const search = useDebounced(searchTerm.trim());
+    const {
+        items: filteredProperties, loading, loadingMore, hasMore, loadMore,
+    } = usePaginatedList('/properties/', search ? { search } : {});
 
     if (loading) {
         return (
@@ -116,6 +100,8 @@ export default function Properties() {
                 ))}
             </div>
 
+            <LoadMore hasMore={hasMore} loading={loadingMore} onClick={loadMore} />
+
             {filteredProperties.length === 0 && (
                 <div className="text-center py-12">
                     <Building2 size={64} className="mx-auto text-gray-600 mb-4" />